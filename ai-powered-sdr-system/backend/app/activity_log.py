@@ -0,0 +1,186 @@
+# backend/app/activity_log.py
+"""Buffered, batched writer for the activity audit log"""
+
+import atexit
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import insert
+
+from . import models
+from .database import run_write
+from .metrics import metrics_registry
+
+ROWS_DROPPED = metrics_registry.counter(
+    "sdr_activity_rows_dropped_total", "Audit log rows that could not be written")
+
+
+class _FlushRequest:
+    """Queue marker: set once every row queued before it is written"""
+    __slots__ = ("done",)
+
+    def __init__(self):
+        self.done = threading.Event()
+
+
+class ActivityWriter:
+    """Append activities off the request path.
+
+    `log()` only enqueues a row. A background thread drains the bounded queue
+    and writes everything it has with one executemany INSERT once
+    `batch_size` rows are waiting or `flush_interval` seconds have passed.
+    The timestamp is taken at `log()` time, so timeline order is preserved no
+    matter when the batch lands. When the queue is full `log()` blocks, which
+    applies backpressure instead of growing memory without bound.
+
+    A batch that fails to write (usually "database is locked") is retried
+    with backoff. If it still fails, its rows are written one at a time, so
+    one bad row cannot take the others with it. Rows that still fail are
+    counted in sdr_activity_rows_dropped_total.
+
+    In sync mode (tests, scripts) every call is written immediately.
+    """
+
+    def __init__(self, max_queue: int = 10000, batch_size: int = 500, flush_interval: float = 0.2, sync: bool = False,
+                 max_retries: int = 3, retry_delay: float = 0.05):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.sync = sync
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self.rows_written = 0
+        self.batches_written = 0
+        self.rows_dropped = 0
+
+    def log(self, lead_id: int, activity_type: str, description: str, notes: Optional[str] = None) -> None:
+        row = {
+            "lead_id": lead_id,
+            "activity_type": activity_type,
+            "description": description,
+            "notes": notes,
+            "timestamp": datetime.utcnow()
+        }
+        if self.sync:
+            self._write([row])
+            return
+
+        self._ensure_started()
+        self._queue.put(row)
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    def flush(self, timeout: float = 30.0) -> None:
+        """Synchronously write everything logged so far.
+
+        With the writer thread running, a marker goes through the queue
+        behind the rows already logged. The thread writes its current batch
+        as soon as it sees the marker, so rows it has already dequeued are
+        covered too.
+        """
+        if self._thread and self._thread.is_alive():
+            request = _FlushRequest()
+            self._queue.put(request)
+            if request.done.wait(timeout):
+                return
+
+        rows = []
+        while True:
+            try:
+                row = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if isinstance(row, _FlushRequest):
+                row.done.set()
+            elif row is not None:
+                rows.append(row)
+        if rows:
+            self._write(rows)
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Drain the queue and stop the flusher - call on graceful shutdown"""
+        if self._thread and self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout)
+        self.flush()
+
+    def _ensure_started(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="activity-writer", daemon=True)
+            self._thread.start()
+            atexit.register(self.stop)
+
+    def _run(self) -> None:
+        while True:
+            row = self._queue.get()
+            if row is None:
+                return
+            if isinstance(row, _FlushRequest):
+                row.done.set()
+                continue
+
+            batch = [row]
+            deadline = time.monotonic() + self.flush_interval
+            stopping = False
+            flush_request = None
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    row = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if row is None:
+                    stopping = True
+                    break
+                if isinstance(row, _FlushRequest):
+                    flush_request = row
+                    break
+                batch.append(row)
+
+            self._write(batch)
+            if flush_request is not None:
+                flush_request.done.set()
+            if stopping:
+                return
+
+    def _insert(self, rows: List[Dict[str, Any]]) -> None:
+        run_write(lambda db: db.execute(insert(models.Activity), rows))
+        self.rows_written += len(rows)
+        self.batches_written += 1
+
+    def _write(self, rows: List[Dict[str, Any]]) -> None:
+        delay = self.retry_delay
+        for attempt in range(self.max_retries + 1):
+            try:
+                self._insert(rows)
+                return
+            except Exception as e:
+                error = e
+            if attempt < self.max_retries:
+                time.sleep(delay)
+                delay *= 2
+
+        dropped = 0
+        for row in rows:
+            try:
+                self._insert([row])
+            except Exception as e:
+                error = e
+                dropped += 1
+        if dropped:
+            self.rows_dropped += dropped
+            ROWS_DROPPED.inc(amount=dropped)
+            print(f"Warning: Dropped {dropped} of {len(rows)} activities: {str(error)}")
@@ -1,23 +1,173 @@
 # backend/app/database.py
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
 
+from .tracing import span
+from .write_queue import GroupCommitWriter
+
 # Use SQLite for simplicity - no setup required
 SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./sdr_system.db")
 
+# "default" keeps the plain single-engine setup; "production" enables WAL,
+# tuned pragmas, a read-only connection pool and the group-commit writer
+DB_PROFILE = os.getenv("DB_PROFILE", "default")
+
+IS_SQLITE = SQLALCHEMY_DATABASE_URL.startswith("sqlite")
+PRODUCTION_SQLITE = (
+    DB_PROFILE == "production"
+    and IS_SQLITE
+    and make_url(SQLALCHEMY_DATABASE_URL).database not in (None, "", ":memory:")
+)
+
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000")),
+    "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),
+    "cache_size": -int(os.getenv("SQLITE_CACHE_KB", "65536")),  # negative = KiB
+    "temp_store": "MEMORY",
+}
+
+
+def _configure_sqlite(engine, read_only: bool = False):
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        # Let SQLAlchemy issue BEGIN itself so SAVEPOINTs behave and writers
+        # can take the write lock up front (see the "begin" hook below)
+        dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        for pragma, value in SQLITE_PRAGMAS.items():
+            if read_only and pragma == "journal_mode":
+                continue
+            cursor.execute(f"PRAGMA {pragma}={value}")
+        if read_only:
+            cursor.execute("PRAGMA query_only=ON")
+        cursor.close()
+
+    @event.listens_for(engine, "begin")
+    def _on_begin(conn):
+        # Write sessions (run_write, the group-commit writer) take the write
+        # lock up front: BEGIN IMMEDIATE waits on busy_timeout instead of
+        # failing with "database is locked" when a deferred read upgrades.
+        # Request sessions stay deferred so a read never holds the lock
+        immediate = not read_only and conn.get_execution_options().get("sqlite_begin_immediate", False)
+        conn.exec_driver_sql("BEGIN IMMEDIATE" if immediate else "BEGIN")
+
+
+def _read_only_url(url: str) -> str:
+    path = os.path.abspath(make_url(url).database)
+    return f"sqlite:///file:{path}?mode=ro&uri=true"
+
+
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL,
-    connect_args={"check_same_thread": False} if "sqlite" in SQLALCHEMY_DATABASE_URL else {}
+    connect_args={"check_same_thread": False} if IS_SQLITE else {}
 )
 
+if PRODUCTION_SQLITE:
+    _configure_sqlite(engine)
+
+    # Readers never contend with each other in WAL mode, so give them their
+    # own pool sized to the machine
+    read_engine = create_engine(
+        _read_only_url(SQLALCHEMY_DATABASE_URL),
+        connect_args={"check_same_thread": False},
+        pool_size=int(os.getenv("DB_READ_POOL_SIZE", str(os.cpu_count() or 4))),
+        max_overflow=0
+    )
+    _configure_sqlite(read_engine, read_only=True)
+else:
+    read_engine = engine
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Short write transactions only; shares the primary engine's pool
+WriteSessionLocal = sessionmaker(
+    autocommit=False, autoflush=False, bind=engine.execution_options(sqlite_begin_immediate=True)
+)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
 Base = declarative_base()
 
+write_queue = GroupCommitWriter(WriteSessionLocal) if PRODUCTION_SQLITE else None
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+def get_read_db():
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+def run_write(fn):
+    """Run a small write transaction and return fn's result.
+
+    In the production profile the write is handed to the single writer thread
+    and group-committed with other small writes; otherwise it runs in its own
+    session. `fn` receives a session and must not commit itself.
+    """
+    with span("db.write", {"db.write_mode": "group_commit" if write_queue is not None else "direct"}):
+        if write_queue is not None:
+            return write_queue.execute(fn)
+
+        db = WriteSessionLocal()
+        try:
+            result = fn(db)
+            db.commit()
+            return result
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+def add_missing_columns(bind, metadata):
+    """ALTER TABLE ADD COLUMN for model columns an older database file lacks.
+
+    create_all never alters existing tables; new nullable columns are the
+    only schema change this covers.
+    """
+    # Inspect before opening the write transaction: the inspector uses its
+    # own connection, which would wait on the write lock held by begin()
+    inspector = inspect(bind)
+    missing = []
+    for table in metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        missing.extend((table, column) for column in table.columns if column.name not in existing)
+    if not missing:
+        return
+
+    with bind.begin() as conn:
+        for table, column in missing:
+            column_type = column.type.compile(dialect=bind.dialect)
+            conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN "{column.name}" {column_type}'))
+
+def init_db():
+    """Create or upgrade the schema, including the search and near-duplicate indexes"""
+    from . import models
+    from .near_duplicates import backfill_signatures
+    from .search import init_search_index
+
+    models.Base.metadata.create_all(bind=engine)
+    add_missing_columns(engine, models.Base.metadata)
+    # create_all only builds indexes together with new tables; add any that an
+    # older database file is missing
+    for table in models.Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+    init_search_index(engine)
+    # Messages are signed on insert; this only covers rows from before the index
+    backfill_signatures(engine)
+
+def shutdown_db():
+    if write_queue is not None:
+        write_queue.stop()
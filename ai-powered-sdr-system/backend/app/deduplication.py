@@ -0,0 +1,233 @@
+# backend/app/deduplication.py
+"""Duplicate lead detection with a blocking index and lead merging"""
+
+import re
+from collections import defaultdict
+from datetime import datetime
+from difflib import SequenceMatcher
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from . import models
+
+COMPANY_SUFFIXES = {
+    "inc", "incorporated", "llc", "ltd", "limited", "corp", "corporation",
+    "co", "company", "gmbh", "plc", "sa", "ag", "group", "holdings"
+}
+
+NICKNAMES = {
+    "jon": "john", "johnny": "john", "jack": "john",
+    "bob": "robert", "rob": "robert", "bobby": "robert",
+    "bill": "william", "will": "william", "liz": "elizabeth", "beth": "elizabeth",
+    "mike": "michael", "mick": "michael", "jim": "james", "jimmy": "james",
+    "dave": "david", "dan": "daniel", "danny": "daniel", "tom": "thomas",
+    "chris": "christopher", "kate": "katherine", "katie": "katherine",
+    "steve": "steven", "stephen": "steven", "matt": "matthew", "alex": "alexander",
+    "sam": "samuel", "ben": "benjamin", "nick": "nicholas", "tony": "anthony"
+}
+
+SOUNDEX_CODES = {
+    letter: digit
+    for letters, digit in (("bfpv", "1"), ("cgjkqsxz", "2"), ("dt", "3"),
+                           ("l", "4"), ("mn", "5"), ("r", "6"))
+    for letter in letters
+}
+
+# Blocks larger than this are split again on the first-name key so one very
+# common surname at a big company cannot turn the pass quadratic
+MAX_BLOCK_SIZE = 200
+
+LEAD_COLUMNS = [
+    models.Lead.id, models.Lead.first_name, models.Lead.last_name,
+    models.Lead.email, models.Lead.company, models.Lead.phone
+]
+
+# Fields copied from duplicates into the surviving lead when it has no value
+MERGEABLE_FIELDS = [
+    "phone", "company", "job_title", "industry", "company_size",
+    "location", "website", "linkedin_url"
+]
+
+
+def normalize_company(company: Optional[str]) -> str:
+    words = re.findall(r"[a-z0-9]+", (company or "").lower())
+    return " ".join(w for w in words if w not in COMPANY_SUFFIXES)
+
+
+def normalize_name(name: Optional[str]) -> str:
+    name = re.sub(r"[^a-z]", "", (name or "").lower())
+    return NICKNAMES.get(name, name)
+
+
+def soundex(name: str) -> str:
+    """American Soundex code, e.g. 'Smith' and 'Smyth' -> S530"""
+    name = re.sub(r"[^a-z]", "", name.lower())
+    if not name:
+        return ""
+
+    codes = SOUNDEX_CODES
+    result = name[0].upper()
+    previous = codes.get(name[0], "")
+    for letter in name[1:]:
+        digit = codes.get(letter, "")
+        if digit and digit != previous:
+            result += digit
+        if letter not in "hw":
+            previous = digit
+    return (result + "000")[:4]
+
+
+def blocking_key(row) -> Tuple[str, str]:
+    return (normalize_company(row.company), soundex(row.last_name or ""))
+
+
+def email_local(email: Optional[str]) -> str:
+    return re.sub(r"[^a-z0-9]", "", (email or "").split("@")[0].lower())
+
+
+def similarity(a, b) -> float:
+    """Fuzzy similarity between two lead rows in [0, 1]"""
+    first_a, first_b = normalize_name(a.first_name), normalize_name(b.first_name)
+    last_a, last_b = normalize_name(a.last_name), normalize_name(b.last_name)
+
+    first = SequenceMatcher(None, first_a, first_b).ratio()
+    if first_a and soundex(first_a) == soundex(first_b):
+        first = max(first, 0.9)
+    last = SequenceMatcher(None, last_a, last_b).ratio()
+    company = SequenceMatcher(None, normalize_company(a.company), normalize_company(b.company)).ratio()
+
+    score = 0.35 * first + 0.35 * last + 0.3 * company
+
+    # Same mailbox local part or same phone number is strong evidence
+    local_a, local_b = email_local(a.email), email_local(b.email)
+    if local_a and local_a == local_b:
+        score = max(score, 0.95)
+    digits_a = re.sub(r"\D", "", a.phone or "")
+    if len(digits_a) >= 7 and digits_a == re.sub(r"\D", "", b.phone or ""):
+        score = max(score, 0.95)
+
+    return round(score, 3)
+
+
+def _split_block(rows: List[Any]) -> List[List[Any]]:
+    if len(rows) <= MAX_BLOCK_SIZE:
+        return [rows]
+    sub_blocks = defaultdict(list)
+    for row in rows:
+        sub_blocks[soundex(normalize_name(row.first_name))].append(row)
+    return list(sub_blocks.values())
+
+
+def find_duplicates(db: Session, threshold: float = 0.85) -> Dict[str, Any]:
+    """Group likely duplicate leads into clusters.
+
+    Candidates are only compared within a block (normalized company plus
+    Soundex of the last name), so the pass is roughly linear in the table
+    size instead of comparing every pair.
+    """
+    blocks = defaultdict(list)
+    scanned = 0
+    stmt = select(*LEAD_COLUMNS).where(models.Lead.is_deleted == False)
+    for row in db.execute(stmt):
+        blocks[blocking_key(row)].append(row)
+        scanned += 1
+
+    # Union-find over matching pairs so A~B and B~C land in one cluster
+    parent: Dict[int, int] = {}
+
+    def find(x: int) -> int:
+        while parent.setdefault(x, x) != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    rows_by_id = {}
+    pair_scores: Dict[int, float] = {}
+    comparisons = 0
+
+    for rows in blocks.values():
+        if len(rows) < 2:
+            continue
+        for block in _split_block(rows):
+            for i in range(len(block)):
+                for j in range(i + 1, len(block)):
+                    comparisons += 1
+                    score = similarity(block[i], block[j])
+                    if score < threshold:
+                        continue
+                    a, b = block[i], block[j]
+                    rows_by_id[a.id], rows_by_id[b.id] = a, b
+                    parent[find(a.id)] = find(b.id)
+                    pair_scores[a.id] = max(pair_scores.get(a.id, 0), score)
+                    pair_scores[b.id] = max(pair_scores.get(b.id, 0), score)
+
+    clusters = defaultdict(list)
+    for lead_id in rows_by_id:
+        clusters[find(lead_id)].append(lead_id)
+
+    report = []
+    for lead_ids in clusters.values():
+        lead_ids.sort()
+        report.append({
+            "primary_id": lead_ids[0],
+            "confidence": min(pair_scores[i] for i in lead_ids),
+            "leads": [
+                {
+                    "id": i,
+                    "name": f"{rows_by_id[i].first_name} {rows_by_id[i].last_name}",
+                    "email": rows_by_id[i].email,
+                    "company": rows_by_id[i].company
+                }
+                for i in lead_ids
+            ]
+        })
+
+    report.sort(key=lambda cluster: cluster["confidence"], reverse=True)
+    return {
+        "leads_scanned": scanned,
+        "blocks": len(blocks),
+        "comparisons": comparisons,
+        "clusters": report
+    }
+
+
+def merge_leads(db: Session, primary: Any, duplicates: List[Any]) -> Dict[str, Any]:
+    """Fold duplicates into the primary lead.
+
+    Messages and activities are re-parented to the primary, empty fields on the
+    primary are filled from the duplicates, and the duplicates are soft-deleted
+    so the merge stays auditable. The caller commits.
+    """
+    duplicate_ids = [lead.id for lead in duplicates]
+
+    for lead in duplicates:
+        for field in MERGEABLE_FIELDS:
+            if not getattr(primary, field) and getattr(lead, field):
+                setattr(primary, field, getattr(lead, field))
+        if lead.notes:
+            primary.notes = f"{primary.notes}\n{lead.notes}" if primary.notes else lead.notes
+        primary.score = max(primary.score or 0, lead.score or 0)
+
+        lead.is_deleted = True
+        lead.deleted_at = datetime.utcnow()
+        lead.deleted_by = f"merged_into:{primary.id}"
+
+    moved_messages = db.execute(
+        update(models.Message)
+        .where(models.Message.lead_id.in_(duplicate_ids))
+        .values(lead_id=primary.id)
+    ).rowcount
+    moved_activities = db.execute(
+        update(models.Activity)
+        .where(models.Activity.lead_id.in_(duplicate_ids))
+        .values(lead_id=primary.id)
+    ).rowcount
+
+    return {
+        "primary_id": primary.id,
+        "merged_ids": duplicate_ids,
+        "messages_moved": moved_messages,
+        "activities_moved": moved_activities
+    }
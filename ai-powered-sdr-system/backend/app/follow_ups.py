@@ -0,0 +1,337 @@
+# backend/app/follow_ups.py
+"""Persistent follow-up cadence driven by each message's follow_up_timing"""
+
+import threading
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+from . import models
+from .database import ReadSessionLocal, run_write
+from .lead_cache import LEAD_COLUMNS
+from .llm_scheduler import llm_priority, map_concurrently
+from .metrics import metrics_registry
+from .pregeneration import NEXT_MESSAGE_TYPE
+
+# No automatic touches once an opportunity is decided
+TERMINAL_STAGES = ("closed_won", "closed_lost")
+
+DEFAULT_FOLLOW_UP_DAYS = 3
+MAX_FOLLOW_UP_DAYS = 90
+
+
+def follow_up_days(message: Dict[str, Any]) -> int:
+    """Days to wait after a message, from the model's follow_up_timing when usable"""
+    value = message.get("follow_up_timing")
+    if isinstance(value, bool):
+        return DEFAULT_FOLLOW_UP_DAYS
+    try:
+        days = int(value)
+    except (TypeError, ValueError):
+        return DEFAULT_FOLLOW_UP_DAYS
+    return days if 1 <= days <= MAX_FOLLOW_UP_DAYS else DEFAULT_FOLLOW_UP_DAYS
+
+
+def cancel_follow_ups(db: Session, lead_id: int, reason: str) -> int:
+    """Cancel the lead's scheduled follow-up in the caller's transaction"""
+    return db.execute(
+        update(models.FollowUp)
+        .where(models.FollowUp.lead_id == lead_id, models.FollowUp.status == "scheduled")
+        .values(status="cancelled", last_error=reason, completed_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    ).rowcount
+
+
+def schedule_follow_up(db: Session, lead_id: int, stage: str, message_id: Optional[int], days: int,
+                       touch: int = 1, replace: bool = True, now: Optional[datetime] = None) -> Optional[datetime]:
+    """Schedule the lead's next touch `days` from now, in the caller's transaction.
+
+    A lead has at most one scheduled follow-up: an existing one is moved to
+    the new due time (or left alone when `replace` is False). Returns the
+    due time, or None when nothing was scheduled.
+    """
+    message_type = NEXT_MESSAGE_TYPE.get(stage)
+    if stage in TERMINAL_STAGES or message_type is None:
+        cancel_follow_ups(db, lead_id, f"stage {stage}")
+        return None
+
+    due_at = (now or datetime.utcnow()) + timedelta(days=days)
+    values = {
+        "message_id": message_id,
+        "message_type": message_type,
+        "touch": touch,
+        "due_at": due_at,
+        "attempts": 0,
+        "last_error": None
+    }
+    existing = db.execute(
+        select(models.FollowUp.id)
+        .where(models.FollowUp.lead_id == lead_id, models.FollowUp.status == "scheduled")
+        .limit(1)
+    ).first()
+    if existing is not None:
+        if not replace:
+            return None
+        db.execute(
+            update(models.FollowUp).where(models.FollowUp.id == existing.id).values(**values)
+            .execution_options(synchronize_session=False)
+        )
+    else:
+        db.add(models.FollowUp(lead_id=lead_id, status="scheduled", **values))
+    return due_at
+
+
+def retarget_follow_ups(db: Session, lead_id: int, stage: str) -> None:
+    """After a stage change: cancel on a terminal stage, otherwise keep the due
+    time but generate the message the new stage calls for"""
+    message_type = NEXT_MESSAGE_TYPE.get(stage)
+    if stage in TERMINAL_STAGES or message_type is None:
+        cancel_follow_ups(db, lead_id, f"stage {stage}")
+        return
+    db.execute(
+        update(models.FollowUp)
+        .where(models.FollowUp.lead_id == lead_id, models.FollowUp.status == "scheduled")
+        .values(message_type=message_type)
+        .execution_options(synchronize_session=False)
+    )
+
+
+class FollowUpScheduler:
+    """Dispatch due follow-ups to the message generator in batches.
+
+    The queue is the follow_ups table. An index on (status, due_at) lets
+    each tick claim the next `batch_size` due rows with a single UPDATE ...
+    RETURNING. That is an O(log n) seek no matter how many touches are
+    scheduled, and it is atomic, so several processes can run dispatchers
+    without generating a touch twice. Between ticks the thread sleeps until
+    the earliest due time (capped at `tick_interval`), and `notify()` wakes
+    it early for a sooner touch.
+
+    Claimed rows are leased: if a process dies mid-batch, its rows go back
+    to the queue after `lease_seconds`. A failed generation is retried with
+    backoff up to `max_attempts`. Each generated follow-up schedules the
+    next touch from its own follow_up_timing, up to `max_touches` in a row
+    without a manual send.
+    """
+
+    def __init__(self, message_generator, activity_writer, batch_size: int = 200, tick_interval: float = 30.0,
+                 lease_seconds: float = 900.0, max_attempts: int = 3, max_touches: int = 3, concurrency: int = 4):
+        self.message_generator = message_generator
+        self.activity_writer = activity_writer
+        self.batch_size = batch_size
+        self.tick_interval = tick_interval
+        self.lease = timedelta(seconds=lease_seconds)
+        self.max_attempts = max_attempts
+        self.max_touches = max_touches
+        self.concurrency = concurrency
+        self._wake = threading.Event()
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+        self._next_wake: Optional[datetime] = None
+        self.ticks = 0
+        self.generated = 0
+        self.cancelled = 0
+        self.retried = 0
+        self.failed = 0
+        self.reclaimed = 0
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="follow-ups", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        self._stopping = True
+        self._wake.set()
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout)
+
+    def notify(self, due_at: Optional[datetime]) -> None:
+        """A touch was scheduled; wake the dispatcher if it is due before its next tick"""
+        if due_at is not None and (self._next_wake is None or due_at < self._next_wake):
+            self._wake.set()
+
+    def _run(self) -> None:
+        while not self._stopping:
+            try:
+                processed = self.tick()
+            except Exception as e:
+                print(f"Warning: Follow-up dispatch failed: {str(e)}")
+                processed = 0
+            if processed >= self.batch_size:
+                continue  # more are due right now
+
+            delay = self.tick_interval
+            next_due = self.next_due()
+            if next_due is not None:
+                delay = min(delay, max((next_due - datetime.utcnow()).total_seconds(), 0.05))
+            self._next_wake = datetime.utcnow() + timedelta(seconds=delay)
+            self._wake.wait(delay)
+            self._wake.clear()
+
+    def next_due(self) -> Optional[datetime]:
+        db = ReadSessionLocal()
+        try:
+            return db.execute(
+                select(func.min(models.FollowUp.due_at)).where(models.FollowUp.status == "scheduled")
+            ).scalar()
+        finally:
+            db.close()
+
+    def _claim(self, now: datetime) -> List[Any]:
+        def claim(db: Session):
+            # Rows of a dispatcher that died mid-batch go back to the queue
+            reclaimed = db.execute(
+                update(models.FollowUp)
+                .where(models.FollowUp.status == "dispatched", models.FollowUp.dispatched_at < now - self.lease)
+                .values(status="scheduled")
+                .execution_options(synchronize_session=False)
+            ).rowcount
+
+            due = (
+                select(models.FollowUp.id)
+                .where(models.FollowUp.status == "scheduled", models.FollowUp.due_at <= now)
+                .order_by(models.FollowUp.due_at)
+                .limit(self.batch_size)
+                .scalar_subquery()
+            )
+            rows = db.execute(
+                update(models.FollowUp)
+                .where(models.FollowUp.id.in_(due))
+                .values(status="dispatched", dispatched_at=now, attempts=models.FollowUp.attempts + 1)
+                .returning(models.FollowUp.id, models.FollowUp.lead_id, models.FollowUp.message_type,
+                           models.FollowUp.touch, models.FollowUp.attempts)
+                .execution_options(synchronize_session=False)
+            ).all()
+            return reclaimed, rows
+
+        reclaimed, rows = run_write(claim)
+        self.reclaimed += reclaimed
+        return rows
+
+    def _load_leads(self, lead_ids: List[int]) -> Dict[int, SimpleNamespace]:
+        # Read directly rather than through the lead cache: a batch of cold
+        # leads would evict the hot rows the cache is there for
+        db = ReadSessionLocal()
+        try:
+            rows = db.execute(select(*LEAD_COLUMNS).where(models.Lead.id.in_(lead_ids))).all()
+        finally:
+            db.close()
+        return {row.id: SimpleNamespace(**row._asdict()) for row in rows}
+
+    def tick(self, now: Optional[datetime] = None) -> int:
+        """Claim and generate one batch of due follow-ups; returns how many were claimed"""
+        now = now or datetime.utcnow()
+        self.ticks += 1
+        claimed = self._claim(now)
+        if not claimed:
+            return 0
+
+        leads = self._load_leads([item.lead_id for item in claimed])
+
+        def generate(item):
+            lead = leads.get(item.lead_id)
+            if lead is None or lead.is_deleted or lead.pipeline_stage in TERMINAL_STAGES:
+                return None, None
+            try:
+                return self.message_generator.generate_message(lead, item.message_type), None
+            except Exception as e:
+                return None, str(e)
+
+        # Batch priority: follow-ups never delay an SDR's own generate click
+        with llm_priority("batch"):
+            outcomes = map_concurrently(generate, claimed, self.concurrency)
+
+        self._complete(claimed, outcomes, leads)
+        return len(claimed)
+
+    def _complete(self, claimed: List[Any], outcomes: List[Any], leads: Dict[int, SimpleNamespace]) -> None:
+        done = []
+
+        def persist(db: Session):
+            done.clear()
+            finished = datetime.utcnow()
+            for item, (message, error) in zip(claimed, outcomes):
+                row = update(models.FollowUp).where(models.FollowUp.id == item.id).execution_options(synchronize_session=False)
+                if error is not None:
+                    if item.attempts >= self.max_attempts:
+                        db.execute(row.values(status="failed", last_error=error[:500], completed_at=finished))
+                        FOLLOW_UPS.inc("failed")
+                    else:
+                        retry_at = finished + timedelta(minutes=5 * 2 ** (item.attempts - 1))
+                        db.execute(row.values(status="scheduled", due_at=retry_at, last_error=error[:500]))
+                        FOLLOW_UPS.inc("retried")
+                    continue
+                if message is None:
+                    db.execute(row.values(status="cancelled", last_error="lead deleted or closed", completed_at=finished))
+                    FOLLOW_UPS.inc("cancelled")
+                    continue
+
+                lead = leads[item.lead_id]
+                db_message = models.Message(
+                    lead_id=lead.id,
+                    message_type=item.message_type,
+                    content=message["content"],
+                    subject=message.get("subject"),
+                    prompt_version=message.get("prompt_version")
+                )
+                db.add(db_message)
+                db.flush()
+                db.execute(row.values(status="done", completed_at=finished, result_message_id=db_message.id))
+                if item.touch < self.max_touches:
+                    # A manual send since dispatch already scheduled the next touch
+                    schedule_follow_up(db, lead.id, lead.pipeline_stage, db_message.id, follow_up_days(message),
+                                       touch=item.touch + 1, replace=False, now=finished)
+                done.append((item, message))
+                FOLLOW_UPS.inc("generated")
+
+        run_write(persist)
+
+        for item, message in done:
+            self.activity_writer.log(
+                lead_id=item.lead_id,
+                activity_type="follow_up_generated",
+                description=f"Follow-up #{item.touch} ({item.message_type.replace('_', ' ')}) generated",
+                notes=f"Subject: {message.get('subject', 'N/A')}"
+            )
+        self.generated += len(done)
+        self.cancelled += sum(1 for message, error in outcomes if message is None and error is None)
+        errors = [item for item, (_, error) in zip(claimed, outcomes) if error is not None]
+        self.failed += sum(1 for item in errors if item.attempts >= self.max_attempts)
+        self.retried += sum(1 for item in errors if item.attempts < self.max_attempts)
+
+    def stats(self) -> Dict[str, Any]:
+        db = ReadSessionLocal()
+        try:
+            by_status = dict(db.execute(
+                select(models.FollowUp.status, func.count()).group_by(models.FollowUp.status)
+            ).all())
+            due_now = db.execute(
+                select(func.count()).select_from(models.FollowUp)
+                .where(models.FollowUp.status == "scheduled", models.FollowUp.due_at <= datetime.utcnow())
+            ).scalar()
+        finally:
+            db.close()
+        return {
+            "running": bool(self._thread and self._thread.is_alive()),
+            "by_status": by_status,
+            "due_now": due_now,
+            "next_due": self.next_due(),
+            "ticks": self.ticks,
+            "generated": self.generated,
+            "cancelled": self.cancelled,
+            "retried": self.retried,
+            "failed": self.failed,
+            "reclaimed": self.reclaimed,
+            "batch_size": self.batch_size,
+            "max_touches": self.max_touches
+        }
+
+
+FOLLOW_UPS = metrics_registry.counter(
+    "sdr_follow_ups_total", "Dispatched follow-ups by outcome", ("outcome",))
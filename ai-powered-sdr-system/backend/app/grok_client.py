@@ -1,9 +1,26 @@
 # backend/app/grok_client.py
 import httpx
 import json
+import threading
+import time
 from typing import Dict, Any, Optional
 import os
 
+from . import tracing
+from .llm_scheduler import current_priority, llm_scheduler
+from .metrics import record_llm_call
+from .token_budget import token_budget
+
+def strip_code_fence(content: str) -> str:
+    """Remove a markdown code fence that models sometimes wrap JSON in"""
+    text = content.strip()
+    if text.startswith("```"):
+        text = text.split("\n", 1)[1] if "\n" in text else ""
+        text = text.rstrip()
+        if text.endswith("```"):
+            text = text[:-3]
+    return text
+
 class GrokClient:
     def __init__(self, api_key: str):
         self.api_key = api_key
@@ -12,6 +29,9 @@ class GrokClient:
             "Authorization": f"Bearer {api_key}",
             "Content-Type": "application/json"
         }
+        # Per-thread record of the last completion, read by callers that
+        # account for tokens (evaluation, metrics)
+        self._local = threading.local()
     
     def test_connection(self) -> bool:
         """Test if the Grok API connection is working"""
@@ -36,6 +56,7 @@ class GrokClient:
     
     def chat_completion(self, messages: list, temperature: float = 0.7, max_tokens: int = 1000) -> Dict[str, Any]:
         """Send a chat completion request to Grok"""
+        self._local.usage = None
         try:
             with httpx.Client() as client:
                 response = client.post(
@@ -51,7 +72,9 @@ class GrokClient:
                 )
                 
                 if response.status_code == 200:
-                    return response.json()
+                    result = response.json()
+                    self._local.usage = result.get("usage")
+                    return result
                 else:
                     return {
                         "error": f"API request failed with status {response.status_code}",
@@ -60,7 +83,85 @@ class GrokClient:
         except Exception as e:
             return {"error": str(e)}
     
-    def analyze_json(self, prompt: str, data: Dict, system_prompt: Optional[str] = None) -> Dict[str, Any]:
+    def last_usage(self) -> Optional[Dict[str, int]]:
+        """Token usage reported for the last completion made on this thread"""
+        return getattr(self._local, "usage", None)
+
+    def complete_json(self, messages: list, temperature: float = 0.3, max_tokens: int = 1000, call_site: str = "adhoc") -> Dict[str, Any]:
+        """Send prebuilt messages and parse the reply as JSON.
+
+        Each call is charged to the token budget (which may refuse it up
+        front), waits for a slot from the LLM scheduler at the caller's
+        priority, is a trace span and is recorded in /metrics under `call_site`.
+        """
+        with tracing.span(f"llm.{call_site}", {
+            "llm.call_site": call_site,
+            "llm.model": "grok-3",
+            "llm.temperature": temperature,
+            "llm.max_tokens": max_tokens
+        }, kind=tracing.KIND_CLIENT) as span:
+            reservation = token_budget.reserve(call_site, messages, max_tokens)
+            if reservation.denied:
+                # Callers treat this like an outage and take their local fallback
+                span.set_attribute("llm.budget_denied", reservation.denied)
+                return {"error": f"LLM budget reached: {reservation.denied}", "budget_exhausted": True}
+
+            # Wait for a scheduler slot; interactive calls go ahead of batch work
+            priority = current_priority()
+            waited = llm_scheduler.acquire(priority)
+            span.set_attribute("llm.priority", priority)
+            if waited is None:
+                token_budget.settle(reservation, None)
+                span.set_attribute("llm.queue_timeout", True)
+                return {"error": f"Timed out waiting for an LLM slot ({priority})"}
+            span.set_attribute("llm.queue_wait_ms", round(waited * 1000, 3))
+
+            start = time.perf_counter()
+            usage = None
+            try:
+                result, error = self._complete_json(messages, temperature, max_tokens)
+                usage = self.last_usage() if error != "api" else None
+            finally:
+                llm_scheduler.release(priority)
+                token_budget.settle(reservation, usage)
+            record_llm_call(call_site, time.perf_counter() - start, usage, error)
+
+            if usage:
+                span.set_attribute("llm.prompt_tokens", usage.get("prompt_tokens"))
+                span.set_attribute("llm.completion_tokens", usage.get("completion_tokens"))
+            if error:
+                span.set_error(f"{error}: {result.get('error')}")
+        return result
+
+    def _complete_json(self, messages: list, temperature: float, max_tokens: int):
+        """(parsed reply or error dict, None / "api" / "parse")"""
+        result = self.chat_completion(messages, temperature=temperature, max_tokens=max_tokens)
+
+        if "error" in result:
+            return result, "api"
+
+        content = None
+        try:
+            content = result["choices"][0]["message"]["content"]
+            # Try to parse JSON from the response
+            parsed = json.loads(strip_code_fence(content))
+        except:
+            return {"error": "Failed to parse JSON response", "raw": content}, "parse"
+
+        if not isinstance(parsed, dict):
+            return {"error": "Expected a JSON object", "raw": content}, "parse"
+        return parsed, None
+
+    def run_prompt(self, prompt, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Render a registry prompt (see prompts.py) and return its JSON reply"""
+        return self.complete_json(
+            prompt.render(data),
+            temperature=prompt.temperature,
+            max_tokens=prompt.max_tokens,
+            call_site=prompt.name
+        )
+
+    def analyze_json(self, prompt: str, data: Dict, system_prompt: Optional[str] = None, max_tokens: int = 1000) -> Dict[str, Any]:
         """Analyze data and return structured JSON response"""
         messages = []
         
@@ -72,14 +173,17 @@ class GrokClient:
             "content": f"{prompt}\n\nData: {json.dumps(data)}\n\nRespond with valid JSON only."
         })
         
-        result = self.chat_completion(messages, temperature=0.3)
-        
-        if "error" in result:
-            return result
-        
-        try:
-            content = result["choices"][0]["message"]["content"]
-            # Try to parse JSON from the response
-            return json.loads(content)
-        except:
-            return {"error": "Failed to parse JSON response", "raw": content}
+        return self.complete_json(messages, temperature=0.3, max_tokens=max_tokens, call_site="analyze_json")
+
+
+def client_from_env() -> GrokClient:
+    """The configured LLM client; SDR_LLM_BACKEND=simulated answers locally
+    (load tests, benchmarks) and needs no API key"""
+    if os.getenv("SDR_LLM_BACKEND", "grok") == "simulated":
+        from .simulated_llm import SimulatedGrokClient
+        return SimulatedGrokClient()
+
+    api_key = os.getenv("GROK_API_KEY")
+    if not api_key:
+        raise ValueError("GROK_API_KEY environment variable is required")
+    return GrokClient(api_key=api_key)
@@ -0,0 +1,306 @@
+# backend/app/jobs.py
+"""Durable job queue in the database, consumed by worker processes (worker.py)"""
+
+import json
+import os
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.orm import Session, aliased
+
+from . import models
+from .database import ReadSessionLocal, run_write
+from .metrics import metrics_registry
+
+# Job kinds a worker knows how to run, with their queue priority (lower
+# runs first): a message someone asked for jumps ahead of a bulk rescore
+JOB_KINDS = {
+    "generate_message": 0,
+    "score_lead": 10,
+}
+
+# A job queued for one lead from an endpoint has someone waiting on it and
+# runs ahead of everything a batch endpoint queued
+INTERACTIVE_JOB_PRIORITY = 0
+
+# Handlers registered by the worker process, keyed by job kind
+JOB_HANDLERS: Dict[str, Callable[[Dict[str, Any]], Optional[Dict[str, Any]]]] = {}
+
+
+def job_handler(kind: str):
+    """Register fn(payload) -> result dict as the handler for a job kind"""
+    if kind not in JOB_KINDS:
+        raise ValueError(f"Unknown job kind '{kind}'")
+
+    def register(fn):
+        JOB_HANDLERS[kind] = fn
+        return fn
+    return register
+
+
+class LeaseLost(Exception):
+    """The job's lease expired and it was handed to another worker"""
+
+
+def _job_row(kind: str, payload: Dict[str, Any], dedupe_key: Optional[str], max_attempts: int,
+             run_after: Optional[datetime], priority: Optional[int] = None) -> Dict[str, Any]:
+    if kind not in JOB_KINDS:
+        raise ValueError(f"Unknown job kind '{kind}'")
+    now = datetime.utcnow()
+    return {
+        "kind": kind,
+        "payload": json.dumps(payload),
+        "status": "queued",
+        "priority": JOB_KINDS[kind] if priority is None else priority,
+        "dedupe_key": dedupe_key,
+        "attempts": 0,
+        "max_attempts": max_attempts,
+        "run_after": run_after or now,
+        "created_at": now
+    }
+
+
+def enqueue_many(db: Session, kind: str, payloads: Iterable[Dict[str, Any]],
+                 dedupe_key: Optional[Callable[[Dict[str, Any]], str]] = None, max_attempts: int = 5,
+                 run_after: Optional[datetime] = None) -> int:
+    """Queue one job per payload in the caller's transaction; returns how many were queued.
+
+    Payloads whose dedupe key already has a queued or running job are
+    skipped, so rescoring everything twice does not score every lead twice.
+    """
+    rows = [
+        _job_row(kind, payload, dedupe_key(payload) if dedupe_key else None, max_attempts, run_after)
+        for payload in payloads
+    ]
+    if not rows:
+        return 0
+    # Core executemany on the session's connection: one statement, and a rowcount
+    return db.connection().execute(insert(models.Job).prefix_with("OR IGNORE", dialect="sqlite"), rows).rowcount
+
+
+def enqueue(db: Session, kind: str, payload: Dict[str, Any], dedupe_key: Optional[str] = None,
+            max_attempts: int = 5, run_after: Optional[datetime] = None,
+            priority: Optional[int] = None) -> Optional[int]:
+    """Queue one job in the caller's transaction; returns its id, or None when
+    deduplicated. `priority` overrides the kind's default queue priority."""
+    row = _job_row(kind, payload, dedupe_key, max_attempts, run_after, priority)
+    return db.execute(
+        insert(models.Job).prefix_with("OR IGNORE", dialect="sqlite").returning(models.Job.id), row
+    ).scalar()
+
+
+def job_to_dict(job: Any) -> Dict[str, Any]:
+    return {
+        "id": job.id,
+        "kind": job.kind,
+        "status": job.status,
+        "payload": json.loads(job.payload or "{}"),
+        "result": json.loads(job.result) if job.result else None,
+        "attempts": job.attempts,
+        "max_attempts": job.max_attempts,
+        "run_after": job.run_after,
+        "locked_by": job.locked_by,
+        "lease_expires_at": job.lease_expires_at,
+        "last_error": job.last_error,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at
+    }
+
+
+class JobQueue:
+    """Lease-based claiming with at-least-once delivery.
+
+    `claim()` moves due jobs to 'running' in one UPDATE ... RETURNING over
+    the (status, priority, run_after) index, so concurrent workers never
+    get the same job. A claim holds a lease of `lease_seconds`. The worker
+    extends it with `heartbeat()` while the handler runs, and `complete()`
+    or `fail()` only take effect while the worker still holds it. If a
+    worker dies, its lease expires and the job is handed out again. A job
+    can therefore run more than once, and handlers must be safe to repeat.
+    Failures are retried with exponential backoff. After `max_attempts`
+    the job is dead-lettered (status 'dead') until someone retries it.
+    """
+
+    def __init__(self, lease_seconds: float = 60.0, retry_base_seconds: float = 10.0, retry_max_seconds: float = 3600.0):
+        self.lease = timedelta(seconds=lease_seconds)
+        self.retry_base_seconds = retry_base_seconds
+        self.retry_max_seconds = retry_max_seconds
+
+    def _reclaim_expired(self, db: Session, now: datetime) -> None:
+        lease_lost = (models.Job.status == "running") & (models.Job.lease_expires_at < now)
+        db.execute(
+            update(models.Job)
+            .where(lease_lost, models.Job.attempts >= models.Job.max_attempts)
+            .values(status="dead", locked_by=None, finished_at=now, last_error="Lease expired on the final attempt")
+            .execution_options(synchronize_session=False)
+        )
+        db.execute(
+            update(models.Job)
+            .where(lease_lost)
+            .values(status="queued", locked_by=None, run_after=now, last_error="Lease expired (worker lost)")
+            .execution_options(synchronize_session=False)
+        )
+
+    def claim(self, worker_id: str, limit: int, kinds: Optional[List[str]] = None) -> List[Any]:
+        """Lease up to `limit` due jobs to this worker"""
+        def claim(db: Session):
+            now = datetime.utcnow()
+            self._reclaim_expired(db, now)
+            due = select(models.Job.id).where(models.Job.status == "queued", models.Job.run_after <= now)
+            if kinds:
+                due = due.where(models.Job.kind.in_(kinds))
+            due = due.order_by(models.Job.priority, models.Job.run_after).limit(limit).scalar_subquery()
+            return db.execute(
+                update(models.Job)
+                .where(models.Job.id.in_(due), models.Job.status == "queued")
+                .values(status="running", locked_by=worker_id, lease_expires_at=now + self.lease,
+                        heartbeat_at=now, started_at=now, attempts=models.Job.attempts + 1)
+                .returning(models.Job.id, models.Job.kind, models.Job.payload, models.Job.attempts,
+                           models.Job.max_attempts)
+                .execution_options(synchronize_session=False)
+            ).all()
+
+        return run_write(claim)
+
+    def heartbeat(self, worker_id: str, job_ids: List[int]) -> List[int]:
+        """Extend the leases this worker still holds; returns their ids"""
+        if not job_ids:
+            return []
+
+        def extend(db: Session):
+            now = datetime.utcnow()
+            return db.execute(
+                update(models.Job)
+                .where(models.Job.id.in_(job_ids), models.Job.status == "running", models.Job.locked_by == worker_id)
+                .values(lease_expires_at=now + self.lease, heartbeat_at=now)
+                .returning(models.Job.id)
+                .execution_options(synchronize_session=False)
+            ).scalars().all()
+
+        return run_write(extend)
+
+    def _held(self, job_id: int, worker_id: str):
+        return update(models.Job).where(
+            models.Job.id == job_id, models.Job.status == "running", models.Job.locked_by == worker_id
+        ).execution_options(synchronize_session=False)
+
+    def complete(self, job_id: int, worker_id: str, result: Optional[Dict[str, Any]] = None) -> None:
+        def finish(db: Session):
+            return db.execute(self._held(job_id, worker_id).values(
+                status="done", locked_by=None, finished_at=datetime.utcnow(),
+                result=json.dumps(result, default=str) if result is not None else None
+            )).rowcount
+
+        if not run_write(finish):
+            raise LeaseLost(f"Job {job_id} is no longer leased to {worker_id}")
+
+    def fail(self, job_id: int, worker_id: str, attempts: int, max_attempts: int, error: str) -> str:
+        """Schedule a retry with backoff, or dead-letter the job; returns the new status"""
+        now = datetime.utcnow()
+        if attempts >= max_attempts:
+            values = {"status": "dead", "finished_at": now}
+        else:
+            delay = min(self.retry_base_seconds * 2 ** (attempts - 1), self.retry_max_seconds)
+            values = {"status": "queued", "run_after": now + timedelta(seconds=delay)}
+
+        def record(db: Session):
+            return db.execute(self._held(job_id, worker_id).values(
+                locked_by=None, last_error=error[:2000], **values
+            )).rowcount
+
+        if not run_write(record):
+            raise LeaseLost(f"Job {job_id} is no longer leased to {worker_id}")
+        return values["status"]
+
+    def retry(self, job_id: int) -> bool:
+        """Put a dead job back in the queue with a fresh set of attempts.
+
+        Refused (False) while another job with the same dedupe key is queued
+        or running, which the partial unique index would reject anyway.
+        """
+        live = aliased(models.Job)
+        live_duplicate = select(live.id).where(
+            live.dedupe_key == models.Job.dedupe_key, live.status.in_(("queued", "running"))
+        ).exists()
+
+        def requeue(db: Session):
+            return db.execute(
+                update(models.Job)
+                .where(models.Job.id == job_id, models.Job.status == "dead", ~live_duplicate)
+                .values(status="queued", attempts=0, run_after=datetime.utcnow(), finished_at=None)
+                .execution_options(synchronize_session=False)
+            ).rowcount
+
+        return bool(run_write(requeue))
+
+    def counts(self) -> Dict[tuple, int]:
+        """Live and dead-lettered jobs by (kind, status); done jobs are not counted"""
+        db = ReadSessionLocal()
+        try:
+            rows = db.execute(
+                select(models.Job.kind, models.Job.status, func.count())
+                .where(models.Job.status.in_(("queued", "running", "dead")))
+                .group_by(models.Job.kind, models.Job.status)
+            ).all()
+        finally:
+            db.close()
+        return {(kind, status): count for kind, status, count in rows}
+
+    def stats(self) -> Dict[str, Any]:
+        now = datetime.utcnow()
+        db = ReadSessionLocal()
+        try:
+            oldest = db.execute(
+                select(func.min(models.Job.run_after))
+                .where(models.Job.status == "queued", models.Job.run_after <= now)
+            ).scalar()
+            workers = db.execute(
+                select(models.Job.locked_by, func.count(), func.max(models.Job.heartbeat_at))
+                .where(models.Job.status == "running")
+                .group_by(models.Job.locked_by)
+            ).all()
+            done_last_hour = db.execute(
+                select(func.count()).select_from(models.Job)
+                .where(models.Job.status == "done", models.Job.finished_at >= now - timedelta(hours=1))
+            ).scalar()
+        finally:
+            db.close()
+
+        by_kind: Dict[str, Dict[str, int]] = {}
+        for (kind, status), count in self.counts().items():
+            by_kind.setdefault(kind, {})[status] = count
+        return {
+            "lease_seconds": self.lease.total_seconds(),
+            "by_kind": by_kind,
+            "oldest_due_seconds": round((now - oldest).total_seconds(), 3) if oldest else 0.0,
+            "done_last_hour": done_last_hour,
+            "workers": [
+                {"worker_id": worker_id, "running": count, "last_heartbeat": heartbeat}
+                for worker_id, count, heartbeat in workers
+            ]
+        }
+
+
+def list_jobs(db: Session, status: Optional[str] = None, kind: Optional[str] = None, limit: int = 100) -> List[Dict[str, Any]]:
+    query = select(models.Job)
+    if status:
+        query = query.where(models.Job.status == status)
+    if kind:
+        query = query.where(models.Job.kind == kind)
+    jobs = db.execute(query.order_by(models.Job.id.desc()).limit(limit)).scalars().all()
+    return [job_to_dict(job) for job in jobs]
+
+
+job_queue = JobQueue(
+    lease_seconds=float(os.getenv("JOB_LEASE_SECONDS", "60")),
+    retry_base_seconds=float(os.getenv("JOB_RETRY_BASE_SECONDS", "10"))
+)
+
+metrics_registry.callback_gauge(
+    "sdr_jobs",
+    "Background jobs queued, running or dead-lettered",
+    job_queue.counts,
+    ("kind", "status")
+)
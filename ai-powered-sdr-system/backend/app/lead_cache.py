@@ -0,0 +1,167 @@
+# backend/app/lead_cache.py
+"""Bounded in-process LRU of lead snapshots, invalidated on every write"""
+
+import threading
+import time
+from collections import OrderedDict
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional, Set
+
+from sqlalchemy import event, select, text
+from sqlalchemy.orm import Session
+
+from . import models
+
+LEAD_COLUMNS = list(models.Lead.__table__.columns)
+
+# Caches living in this process; flushes of Lead rows invalidate all of them
+_caches: List["LeadCache"] = []
+
+BUMP_VERSION_SQL = text("""
+    INSERT INTO lead_versions (lead_id, version)
+    VALUES (:lead_id, (SELECT COALESCE(MAX(version), 0) + 1 FROM lead_versions))
+    ON CONFLICT(lead_id) DO UPDATE SET version = excluded.version
+""")
+
+
+@event.listens_for(Session, "after_flush")
+def _bump_lead_versions(session, flush_context):
+    """Record a new version for every lead row written in this flush.
+
+    The version rows commit (or roll back) with the write itself, which is
+    what lets other worker processes find out which of their cached leads
+    went stale. ORM flushes are covered automatically; Core UPDATEs against
+    `leads` must call `LeadCache.invalidate` themselves.
+    """
+    lead_ids = {
+        obj.id
+        for obj in list(session.new) + list(session.dirty) + list(session.deleted)
+        if isinstance(obj, models.Lead) and obj.id is not None
+    }
+    if not lead_ids:
+        return
+
+    connection = session.connection()
+    for lead_id in lead_ids:
+        connection.execute(BUMP_VERSION_SQL, {"lead_id": lead_id})
+
+    session.info.setdefault("stale_lead_ids", set()).update(lead_ids)
+    for cache in _caches:
+        cache.invalidate(lead_ids)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session):
+    # Evict again once the write is visible, in case a concurrent reader
+    # re-populated the entry between flush and commit
+    lead_ids = session.info.pop("stale_lead_ids", None)
+    if lead_ids:
+        for cache in _caches:
+            cache.invalidate(lead_ids)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_rollback(session):
+    session.info.pop("stale_lead_ids", None)
+
+
+class LeadCache:
+    """Serve hot lead reads from memory.
+
+    Entries are immutable snapshots (attribute access like a `models.Lead`),
+    so they can be handed to `LeadScorer` / `MessageGenerator` directly.
+    Local writes evict entries immediately through the session hooks above.
+    Writes from other processes are picked up by polling `lead_versions` for
+    versions newer than the last one seen, at most once per `sync_interval`
+    seconds - every other hit is served without touching SQLite.
+    """
+
+    def __init__(self, max_size: int = 1024, sync_interval: float = 1.0):
+        self.max_size = max_size
+        self.sync_interval = sync_interval
+        self._entries: "OrderedDict[int, SimpleNamespace]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._invalidations = 0  # bumped on every eviction-by-write, guards racing loads
+        self._seen_version: Optional[int] = None
+        self._next_sync = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidated = 0
+        _caches.append(self)
+
+    def get(self, db: Session, lead_id: int) -> Optional[SimpleNamespace]:
+        self._maybe_sync(db)
+
+        with self._lock:
+            snapshot = self._entries.get(lead_id)
+            if snapshot is not None:
+                self._entries.move_to_end(lead_id)
+                self.hits += 1
+                return snapshot
+            self.misses += 1
+            invalidations_before = self._invalidations
+
+        row = db.execute(select(*LEAD_COLUMNS).where(models.Lead.id == lead_id)).first()
+        if row is None:
+            return None
+        snapshot = SimpleNamespace(**row._asdict())
+
+        with self._lock:
+            # A write that landed while we were reading may have made this
+            # row stale already - serve it, but do not cache it
+            if self._invalidations == invalidations_before:
+                self._entries[lead_id] = snapshot
+                self._entries.move_to_end(lead_id)
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return snapshot
+
+    def invalidate(self, lead_ids: Set[int]) -> None:
+        with self._lock:
+            self._invalidations += 1
+            for lead_id in lead_ids:
+                if self._entries.pop(lead_id, None) is not None:
+                    self.invalidated += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._invalidations += 1
+            self._entries.clear()
+
+    def _maybe_sync(self, db: Session) -> None:
+        now = time.monotonic()
+        if now < self._next_sync:
+            return
+        self._next_sync = now + self.sync_interval
+
+        if self._seen_version is None:
+            # Nothing cached yet, so only the high-water mark matters
+            self._seen_version = db.execute(
+                text("SELECT COALESCE(MAX(version), 0) FROM lead_versions")
+            ).scalar()
+            return
+
+        rows = db.execute(
+            text("SELECT lead_id, version FROM lead_versions WHERE version > :seen"),
+            {"seen": self._seen_version}
+        ).all()
+        if not rows:
+            return
+
+        self._seen_version = max(self._seen_version, max(version for _, version in rows))
+        self.invalidate({lead_id for lead_id, _ in rows})
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidated": self.invalidated,
+            "seen_version": self._seen_version
+        }
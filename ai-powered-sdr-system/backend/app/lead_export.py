@@ -0,0 +1,88 @@
+# backend/app/lead_export.py
+"""Streaming lead export in CSV or NDJSON with constant memory"""
+
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+from typing import Iterator, List, Optional
+
+from . import models
+from .database import ReadSessionLocal
+from .lead_queries import lead_columns_select, serialize_value
+
+EXPORT_FORMATS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson"
+}
+
+# Rows fetched from SQLite per round trip; also the unit of each streamed chunk
+CHUNK_SIZE = 1000
+
+
+def build_export_query(
+    field_names: List[str],
+    stage: Optional[str] = None,
+    industry: Optional[str] = None,
+    min_score: Optional[float] = None,
+    updated_since: Optional[datetime] = None,
+    include_deleted: bool = False
+):
+    stmt = lead_columns_select(field_names, include_deleted)
+    if stage:
+        stmt = stmt.where(models.Lead.pipeline_stage == stage)
+    if industry:
+        stmt = stmt.where(models.Lead.industry == industry)
+    if min_score is not None:
+        stmt = stmt.where(models.Lead.score >= min_score)
+    if updated_since:
+        # Incremental mode: oldest change first so a consumer can checkpoint
+        # on the last updated_at it received
+        stmt = stmt.where(models.Lead.updated_at > updated_since)
+        return stmt.order_by(models.Lead.updated_at, models.Lead.id)
+    return stmt.order_by(models.Lead.id)
+
+
+def _encode_chunk(rows, field_names: List[str], export_format: str) -> str:
+    if export_format == "ndjson":
+        return "".join(
+            json.dumps({name: serialize_value(value) for name, value in zip(field_names, row)}) + "\n"
+            for row in rows
+        )
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerows([serialize_value(value) for value in row] for row in rows)
+    return buffer.getvalue()
+
+
+def stream_leads(stmt, field_names: List[str], export_format: str = "csv", compress: bool = False) -> Iterator[bytes]:
+    """Yield encoded export chunks.
+
+    Runs in its own session because the response body is produced after the
+    request dependency has returned. Rows are pulled `CHUNK_SIZE` at a time
+    with `yield_per`, so memory stays flat regardless of table size.
+    """
+    # wbits=31 produces a gzip container rather than a raw zlib stream
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+
+    def emit(text: str) -> bytes:
+        data = text.encode("utf-8")
+        return compressor.compress(data) if compressor else data
+
+    db = ReadSessionLocal()
+    try:
+        if export_format == "csv":
+            yield emit(",".join(field_names) + "\n")
+
+        result = db.execute(stmt.execution_options(yield_per=CHUNK_SIZE))
+        for rows in result.partitions():
+            chunk = emit(_encode_chunk(rows, field_names, export_format))
+            if chunk:
+                yield chunk
+
+        if compressor:
+            yield compressor.flush()
+    finally:
+        db.close()
@@ -0,0 +1,79 @@
+# backend/app/lead_queries.py
+"""Column-level lead queries that bypass the ORM identity map"""
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from . import models
+
+# Columns a client may request through `fields=`. Soft-delete bookkeeping
+# columns stay internal.
+LEAD_FIELDS = {
+    column.name: column
+    for column in models.Lead.__table__.columns
+    if column.name not in ("is_deleted", "deleted_at", "deleted_by")
+}
+
+# Cheap default for list views - everything except the long text columns
+LIST_VIEW_FIELDS = [
+    name for name in LEAD_FIELDS if name not in ("score_reasoning", "notes")
+]
+
+
+def parse_fields(fields: Optional[str]) -> List[str]:
+    """Turn a comma separated `fields=` value into a validated column list"""
+    if not fields:
+        return list(LIST_VIEW_FIELDS)
+
+    requested = []
+    for name in fields.split(","):
+        name = name.strip()
+        if not name or name in requested:
+            continue
+        if name not in LEAD_FIELDS:
+            raise HTTPException(
+                status_code=422,
+                detail=f"Unknown field '{name}'. Available fields: {', '.join(LEAD_FIELDS)}"
+            )
+        requested.append(name)
+
+    # Always return the primary key so rows can be addressed
+    if "id" not in requested:
+        requested.insert(0, "id")
+    return requested
+
+
+def lead_columns_select(field_names: List[str], include_deleted: bool = False):
+    """Build a Core select for the given lead columns"""
+    stmt = select(*[LEAD_FIELDS[name] for name in field_names])
+    if not include_deleted:
+        stmt = stmt.where(models.Lead.is_deleted == False)
+    return stmt
+
+
+def serialize_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def fetch_lead_rows(
+    db: Session,
+    field_names: List[str],
+    skip: int = 0,
+    limit: int = 100,
+    include_deleted: bool = False
+) -> List[Dict[str, Any]]:
+    """Fetch plain dict rows for the requested columns, ready for JSON encoding"""
+    stmt = lead_columns_select(field_names, include_deleted)
+    stmt = stmt.order_by(models.Lead.id).offset(skip).limit(limit)
+
+    result = db.execute(stmt)
+    return [
+        {name: serialize_value(value) for name, value in zip(field_names, row)}
+        for row in result
+    ]
@@ -1,6 +1,34 @@
 # backend/app/lead_scorer.py
 from typing import Dict, Any, Optional
-import json
+
+from .metrics import FALLBACKS
+from .prompts import prompt_registry
+
+DEFAULT_CRITERIA = {
+    "target_industries": ["Technology", "Finance", "Healthcare", "SaaS", "Enterprise Software"],
+    "target_titles": ["CEO", "CTO", "VP", "Director", "Head of", "Manager"],
+    "ideal_company_size": "50-500 employees",
+    "location_preference": "North America"
+}
+
+# Recorded as the prompt version of scores computed without the LLM
+FALLBACK_SCORING_VERSION = "fallback@v1"
+
+# New leads scoring at least this much move straight to "qualified"
+AUTO_QUALIFY_SCORE = 80
+
+def should_auto_qualify(score: float, pipeline_stage: str) -> bool:
+    return score >= AUTO_QUALIFY_SCORE and pipeline_stage == "new"
+
+def parse_score(value: Any) -> Optional[float]:
+    """A model-reported score as a number in 0-100, or None if unusable"""
+    if isinstance(value, bool):
+        return None
+    try:
+        score = float(value)
+    except (TypeError, ValueError):
+        return None
+    return score if 0 <= score <= 100 else None
 
 class LeadScorer:
     def __init__(self, grok_client):
@@ -20,45 +48,18 @@ class LeadScorer:
             "location": lead.location
         }
         
-        # Default criteria
-        criteria = {
-            "target_industries": ["Technology", "Finance", "Healthcare", "SaaS", "Enterprise Software"],
-            "target_titles": ["CEO", "CTO", "VP", "Director", "Head of", "Manager"],
-            "ideal_company_size": "50-500 employees",
-            "location_preference": "North America"
-        }
-        
-        # Override with custom criteria if provided
+        # Default criteria, overridden with custom criteria if provided
+        criteria = dict(DEFAULT_CRITERIA)
         if custom_criteria:
             criteria.update(custom_criteria.dict() if hasattr(custom_criteria, 'dict') else custom_criteria)
+
+        prompt = prompt_registry.get("lead_scoring")
+        result = self.grok_client.run_prompt(prompt, {"criteria": criteria, "lead": lead_data})
         
-        system_prompt = """You are an expert sales lead qualification AI. Score leads from 0-100 based on:
-        1. Job title relevance and decision-making power
-        2. Company size and growth potential
-        3. Industry fit
-        4. Geographic location
-        5. Overall fit with ideal customer profile
-        
-        Return a JSON object with:
-        - score: number between 0-100
-        - reasoning: brief explanation (2-3 sentences)
-        - strengths: array of positive factors
-        - weaknesses: array of limiting factors
-        - recommended_action: "high_priority", "medium_priority", "low_priority", or "disqualify"
-        """
-        
-        prompt = f"""Score this lead based on the criteria:
-        
-        Lead Information: {json.dumps(lead_data)}
-        
-        Scoring Criteria: {json.dumps(criteria)}
-        
-        Provide a comprehensive scoring analysis."""
-        
-        result = self.grok_client.analyze_json(prompt, lead_data, system_prompt)
-        
-        # Fallback scoring if API fails
-        if "error" in result:
+        # Fallback scoring if API fails or returns no usable score
+        score = None if "error" in result else parse_score(result.get("score"))
+        if score is None:
+            FALLBACKS.inc("lead_scorer", "rule_based")
             score = 50
             if lead.job_title and any(title in lead.job_title for title in ["CEO", "CTO", "VP", "Director"]):
                 score += 20
@@ -72,7 +73,12 @@ class LeadScorer:
                 "reasoning": "Scored using fallback algorithm due to API unavailability",
                 "strengths": ["Basic criteria met"],
                 "weaknesses": ["Manual review recommended"],
-                "recommended_action": "medium_priority"
+                "recommended_action": "medium_priority",
+                "prompt_version": FALLBACK_SCORING_VERSION
             }
-        
-        return result
\ No newline at end of file
+
+        if isinstance(result["score"], str):
+            result["score"] = score
+        result.setdefault("reasoning", "")
+        result["prompt_version"] = prompt.key
+        return result
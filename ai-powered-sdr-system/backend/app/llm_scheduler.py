@@ -0,0 +1,229 @@
+# backend/app/llm_scheduler.py
+"""Priority scheduling of LLM calls: interactive first, fair sharing, no starvation"""
+
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from .metrics import metrics_registry
+
+PRIORITIES = ("interactive", "near_real_time", "batch")
+
+_priority: ContextVar[str] = ContextVar("llm_priority", default="interactive")
+
+
+@contextmanager
+def llm_priority(level: str) -> Iterator[None]:
+    """Mark LLM calls made inside the block as interactive, near_real_time or batch"""
+    if level not in PRIORITIES:
+        raise ValueError(f"Unknown LLM priority '{level}'")
+    token = _priority.set(level)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority() -> str:
+    return _priority.get()
+
+
+def map_concurrently(fn: Callable[[Any], Any], items: Iterable[Any], max_workers: int) -> List[Any]:
+    """fn over items on a small pool, each call in a copy of the caller's context
+    so the LLM priority and trace span carry over. Results keep item order."""
+    items = list(items)
+    if max_workers <= 1 or len(items) <= 1:
+        return [fn(item) for item in items]
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items)), thread_name_prefix="llm-batch") as executor:
+        futures = [executor.submit(copy_context().run, fn, item) for item in items]
+        return [future.result() for future in futures]
+
+
+class _Waiter:
+    __slots__ = ("priority", "tag", "enqueued", "event", "granted")
+
+    def __init__(self, priority: str, tag: float):
+        self.priority = priority
+        self.tag = tag
+        self.enqueued = time.monotonic()
+        self.event = threading.Event()
+        self.granted = False
+
+
+class LLMScheduler:
+    """Admission control for concurrent LLM calls, one queue per priority class.
+
+    At most `max_concurrency` calls are in flight. Calls that cannot start
+    wait in their class's queue. Whenever a slot frees, the next call is
+    picked in this order:
+
+    1. Starvation guarantee: the longest-overdue head of a class that has
+       waited past its `max_wait` deadline.
+    2. Interactive preempts at dispatch time: any waiting interactive call.
+    3. Weighted fair queuing between the other classes by virtual finish
+       tag (1 / weight per call), so backlogged near-real-time work gets
+       `weight` times the dispatches of batch work.
+
+    A call in flight is never interrupted, so `interactive_reserve` slots
+    are kept out of reach of the other classes. A click then starts at
+    once even while a batch job has every other slot busy.
+    """
+
+    def __init__(self, max_concurrency: int = 32, interactive_reserve: int = 8,
+                 weights: Optional[Dict[str, float]] = None, max_wait: Optional[Dict[str, float]] = None,
+                 queue_timeout: Optional[Dict[str, Optional[float]]] = None):
+        self.max_concurrency = max(1, max_concurrency)
+        self.interactive_reserve = max(0, min(interactive_reserve, self.max_concurrency - 1))
+        self.weights = {"interactive": 8.0, "near_real_time": 3.0, "batch": 1.0, **(weights or {})}
+        self.max_wait = {"near_real_time": 2.0, "batch": 10.0, **(max_wait or {})}
+        self.queue_timeout = {"interactive": 30.0, "near_real_time": 120.0, "batch": None, **(queue_timeout or {})}
+        self._queues: Dict[str, deque] = {p: deque() for p in PRIORITIES}
+        self._in_flight = {p: 0 for p in PRIORITIES}
+        self._last_tag = {p: 0.0 for p in PRIORITIES}
+        self._vtime = 0.0
+        self._lock = threading.Lock()
+        self.dispatched = {p: 0 for p in PRIORITIES}
+        self.promoted = {p: 0 for p in PRIORITIES}
+        self.timeouts = {p: 0 for p in PRIORITIES}
+        self.wait_total = {p: 0.0 for p in PRIORITIES}
+        self.wait_max = {p: 0.0 for p in PRIORITIES}
+
+    def _has_capacity(self, priority: str) -> bool:
+        if sum(self._in_flight.values()) >= self.max_concurrency:
+            return False
+        if priority == "interactive":
+            return True
+        others = self._in_flight["near_real_time"] + self._in_flight["batch"]
+        return others < self.max_concurrency - self.interactive_reserve
+
+    def _pick(self, now: float) -> Optional[str]:
+        overdue = None
+        for priority, deadline in self.max_wait.items():
+            queue = self._queues[priority]
+            if queue and now - queue[0].enqueued >= deadline and self._has_capacity(priority):
+                if overdue is None or queue[0].enqueued < self._queues[overdue][0].enqueued:
+                    overdue = priority
+        if overdue is not None:
+            if self._queues["interactive"]:
+                self.promoted[overdue] += 1
+            return overdue
+
+        if self._queues["interactive"] and self._has_capacity("interactive"):
+            return "interactive"
+
+        best = None
+        for priority in PRIORITIES[1:]:
+            queue = self._queues[priority]
+            if queue and self._has_capacity(priority):
+                if best is None or queue[0].tag < self._queues[best][0].tag:
+                    best = priority
+        return best
+
+    def _dispatch(self) -> None:
+        now = time.monotonic()
+        while True:
+            priority = self._pick(now)
+            if priority is None:
+                return
+            waiter = self._queues[priority].popleft()
+            self._vtime = max(self._vtime, waiter.tag)
+            self._in_flight[priority] += 1
+            self.dispatched[priority] += 1
+            waiter.granted = True
+            waiter.event.set()
+
+    def acquire(self, priority: Optional[str] = None) -> Optional[float]:
+        """Block until the call may start; seconds waited, or None on queue timeout"""
+        priority = priority or _priority.get()
+        with self._lock:
+            tag = max(self._vtime, self._last_tag[priority]) + 1.0 / self.weights[priority]
+            self._last_tag[priority] = tag
+            waiter = _Waiter(priority, tag)
+            self._queues[priority].append(waiter)
+            self._dispatch()
+
+        if not waiter.event.wait(self.queue_timeout.get(priority)):
+            with self._lock:
+                if not waiter.granted:
+                    self._queues[priority].remove(waiter)
+                    self.timeouts[priority] += 1
+                    return None
+
+        waited = time.monotonic() - waiter.enqueued
+        with self._lock:
+            self.wait_total[priority] += waited
+            self.wait_max[priority] = max(self.wait_max[priority], waited)
+        QUEUE_WAIT.observe(waited, priority)
+        return waited
+
+    def release(self, priority: Optional[str] = None) -> None:
+        priority = priority or _priority.get()
+        with self._lock:
+            self._in_flight[priority] -= 1
+            self._dispatch()
+
+    def depths(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {p: {"queued": len(self._queues[p]), "in_flight": self._in_flight[p]} for p in PRIORITIES}
+
+    def stats(self) -> Dict[str, Any]:
+        depths = self.depths()
+        with self._lock:
+            classes = {
+                p: {
+                    **depths[p],
+                    "weight": self.weights[p],
+                    "max_wait_seconds": self.max_wait.get(p),
+                    "dispatched": self.dispatched[p],
+                    "promoted_over_interactive": self.promoted[p],
+                    "timeouts": self.timeouts[p],
+                    "avg_wait_ms": round(self.wait_total[p] / self.dispatched[p] * 1000, 3) if self.dispatched[p] else 0.0,
+                    "max_wait_ms": round(self.wait_max[p] * 1000, 3)
+                }
+                for p in PRIORITIES
+            }
+        return {
+            "max_concurrency": self.max_concurrency,
+            "interactive_reserve": self.interactive_reserve,
+            "classes": classes
+        }
+
+
+def _per_class(name: str, default: str) -> Dict[str, float]:
+    """"batch=10,near_real_time=2" -> {"batch": 10.0, "near_real_time": 2.0}"""
+    values = {}
+    for item in os.getenv(name, default).split(","):
+        if "=" in item:
+            priority, value = item.split("=", 1)
+            if priority.strip() not in PRIORITIES:
+                raise ValueError(f"Unknown LLM priority '{priority.strip()}' in {name}")
+            values[priority.strip()] = float(value)
+    return values
+
+
+QUEUE_WAIT = metrics_registry.histogram(
+    "sdr_llm_queue_wait_seconds", "Time LLM calls waited for a scheduler slot", ("priority",),
+    (0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0))
+
+llm_scheduler = LLMScheduler(
+    max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", "32")),
+    interactive_reserve=int(os.getenv("LLM_INTERACTIVE_RESERVE", "8")),
+    weights=_per_class("LLM_PRIORITY_WEIGHTS", ""),
+    max_wait=_per_class("LLM_MAX_WAIT_SECONDS", "")
+)
+
+metrics_registry.callback_gauge(
+    "sdr_llm_scheduler_calls",
+    "LLM calls queued or in flight per priority class",
+    lambda: {
+        (priority, state): count
+        for priority, counts in llm_scheduler.depths().items()
+        for state, count in counts.items()
+    },
+    ("priority", "state")
+)
@@ -1,22 +1,64 @@
 # backend/app/main.py
 from fastapi import FastAPI, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from datetime import datetime
+from datetime import datetime, timedelta
 import os
 from dotenv import load_dotenv
 
 from . import models, schemas
-from .database import engine, get_db
-from .grok_client import GrokClient
-from .lead_scorer import LeadScorer
+from .database import engine, read_engine, write_queue, get_db, get_read_db, run_write, shutdown_db, init_db
+from .lead_queries import LEAD_FIELDS, parse_fields, fetch_lead_rows
+from .lead_export import EXPORT_FORMATS, build_export_query, stream_leads
+from .activity_log import ActivityWriter
+from .lead_cache import LeadCache
+from .deduplication import find_duplicates, merge_leads
+from .query_profiler import QueryProfiler
+from .metrics import CONTENT_TYPE, MetricsMiddleware, instrument_engine, metrics_registry
+from .tracing import TracingMiddleware, trace_engine, trace_sessions, tracer_from_env
+from .search import build_match_query, search_leads, search_messages
+from .near_duplicates import find_near_duplicate_clusters, find_similar_messages
+from .grok_client import client_from_env
+from .lead_scorer import LeadScorer, AUTO_QUALIFY_SCORE, should_auto_qualify
 from .message_generator import MessageGenerator
+from .prompts import prompt_registry
+from .llm_scheduler import llm_priority, llm_scheduler, map_concurrently
+from .token_budget import token_budget
+from .pregeneration import Pregenerator
+from .jobs import INTERACTIVE_JOB_PRIORITY, JOB_KINDS, enqueue, enqueue_many, job_queue, job_to_dict, list_jobs
+from .follow_ups import FollowUpScheduler, cancel_follow_ups, follow_up_days, retarget_follow_ups, schedule_follow_up
 
 load_dotenv()
 
 # Create database tables
-models.Base.metadata.create_all(bind=engine)
+init_db()
+
+# Time every SQL statement and capture query plans for slow ones
+query_profiler = QueryProfiler(slow_threshold_ms=float(os.getenv("SLOW_QUERY_MS", "25")))
+if os.getenv("QUERY_PROFILER", "1") == "1":
+    query_profiler.attach(engine)
+    if read_engine is not engine:
+        query_profiler.attach(read_engine)
+
+# Prometheus metrics: request, DB statement and LLM timings in per-thread
+# counters, scraped from /metrics; METRICS=0 skips the request and SQL hooks
+METRICS_ENABLED = os.getenv("METRICS", "1") == "1"
+if METRICS_ENABLED:
+    instrument_engine(engine, "primary")
+    if read_engine is not engine:
+        instrument_engine(read_engine, "read")
+
+# Spans for each request, SQL statement, commit and Grok call; slow or failed
+# traces are kept and exported (TRACE_EXPORTER, TRACE_SLOW_MS); TRACING=0 disables
+tracer = tracer_from_env()
+TRACING_ENABLED = os.getenv("TRACING", "1") == "1"
+if TRACING_ENABLED:
+    trace_engine(engine, "primary")
+    if read_engine is not engine:
+        trace_engine(read_engine, "read")
+    trace_sessions()
 
 app = FastAPI(title="Grok SDR System")
 
@@ -28,16 +70,107 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
-
-# Initialize Grok services
-api_key = os.getenv("GROK_API_KEY")
-if not api_key:
-    raise ValueError("GROK_API_KEY environment variable is required")
-
-grok_client = GrokClient(api_key=api_key)
+if TRACING_ENABLED:
+    app.add_middleware(TracingMiddleware, tracer=tracer)
+if METRICS_ENABLED:
+    # Added last so it wraps CORS and times the whole request
+    app.add_middleware(MetricsMiddleware)
+
+# Initialize Grok services; SDR_LLM_BACKEND=simulated answers locally
+# (load tests, benchmarks) and needs no API key
+grok_client = client_from_env()
 lead_scorer = LeadScorer(grok_client)
 message_generator = MessageGenerator(grok_client)
 
+# Batch endpoints fan LLM calls out this wide; llm_scheduler decides when
+# each one actually runs
+BATCH_CONCURRENCY = int(os.getenv("LLM_BATCH_CONCURRENCY", "4"))
+
+# JOB_QUEUE=1 hands scoring, message generation and follow-up dispatch to
+# worker processes (python -m app.worker --follow-ups) through the jobs
+# table instead of running them inside the API process
+JOB_QUEUE_ENABLED = os.getenv("JOB_QUEUE", "0") == "1"
+
+# Audit log rows are buffered and bulk-inserted off the request path;
+# ACTIVITY_LOG_SYNC=1 writes each row immediately (tests, scripts)
+activity_writer = ActivityWriter(sync=os.getenv("ACTIVITY_LOG_SYNC") == "1")
+
+# Hot lead rows read before every LLM call are served from memory
+lead_cache = LeadCache(
+    max_size=int(os.getenv("LEAD_CACHE_SIZE", "1024")),
+    sync_interval=float(os.getenv("LEAD_CACHE_SYNC_SECONDS", "1.0"))
+)
+
+# Draft the likely next message in the background whenever a lead changes
+# stage; PREGENERATION=0 turns speculation off
+pregenerator = None
+if os.getenv("PREGENERATION", "1") == "1":
+    pregenerator = Pregenerator(
+        message_generator,
+        lead_cache,
+        ttl_seconds=int(os.getenv("PREGENERATION_TTL_SECONDS", "3600")),
+        max_per_hour=int(os.getenv("PREGENERATION_BUDGET_PER_HOUR", "100"))
+    )
+
+# Every generated message schedules the lead's next touch from its
+# follow_up_timing; due touches are drafted in batches by a background
+# dispatcher. FOLLOW_UPS=0 keeps scheduling but never dispatches
+follow_up_scheduler = FollowUpScheduler(
+    message_generator,
+    activity_writer,
+    batch_size=int(os.getenv("FOLLOW_UP_BATCH_SIZE", "200")),
+    tick_interval=float(os.getenv("FOLLOW_UP_TICK_SECONDS", "30")),
+    max_touches=int(os.getenv("FOLLOW_UP_MAX_TOUCHES", "3")),
+    concurrency=BATCH_CONCURRENCY
+)
+
+def queue_depths():
+    depths = {("activity_log",): activity_writer.depth}
+    if write_queue is not None:
+        depths[("db_writer",)] = write_queue.depth
+    if pregenerator is not None:
+        depths[("pregeneration",)] = pregenerator.depth
+    return depths
+
+metrics_registry.callback_gauge("sdr_queue_depth", "Items waiting in background work queues", queue_depths, ("queue",))
+
+def queue_lead_job(db: Session, kind: str, payload: dict, dedupe_key: str) -> JSONResponse:
+    """Queue a job someone is waiting on and answer 202 with where to poll it.
+    A live job with the same dedupe key (a double click, a pending rescore)
+    is returned instead of queueing a second one."""
+    job_id = enqueue(db, kind, payload, dedupe_key=dedupe_key, priority=INTERACTIVE_JOB_PRIORITY)
+    db.commit()
+    already_queued = job_id is None
+    if already_queued:
+        job_id = db.query(models.Job.id).filter(
+            models.Job.dedupe_key == dedupe_key, models.Job.status.in_(("queued", "running"))
+        ).scalar()
+    return JSONResponse(status_code=202, content={
+        "job_id": job_id,
+        "already_queued": already_queued,
+        "status_url": f"/api/jobs/{job_id}" if job_id is not None else f"/api/jobs?kind={kind}"
+    })
+
+def schedule_pregeneration(lead_id: int):
+    if pregenerator is not None:
+        pregenerator.schedule(lead_id)
+
+@app.on_event("startup")
+def startup():
+    # With the job queue, due follow-ups are drafted by `app.worker --follow-ups`
+    if os.getenv("FOLLOW_UPS", "1") == "1" and not JOB_QUEUE_ENABLED:
+        follow_up_scheduler.start()
+
+@app.on_event("shutdown")
+def shutdown():
+    follow_up_scheduler.stop()
+    if pregenerator is not None:
+        pregenerator.stop()
+    # Flush buffered activities before the writer goes away
+    activity_writer.stop()
+    shutdown_db()
+    tracer.exporter.stop()
+
 @app.get("/")
 def read_root():
     return {"message": "Grok SDR System API", "status": "operational"}
@@ -57,6 +190,11 @@ def health_check():
         "version": "1.0.0"
     }
 
+@app.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    """Prometheus text exposition of request, DB, LLM, fallback and queue metrics"""
+    return PlainTextResponse(metrics_registry.render(), media_type=CONTENT_TYPE)
+
 # Lead CRUD Operations
 @app.post("/api/leads", response_model=schemas.Lead)
 def create_lead(lead: schemas.LeadCreate, db: Session = Depends(get_db)):
@@ -91,39 +229,55 @@ def create_lead(lead: schemas.LeadCreate, db: Session = Depends(get_db)):
     try:
         db_lead = models.Lead(**lead.dict())
         db.add(db_lead)
+        if JOB_QUEUE_ENABLED:
+            # Scored by a worker; the lead is returned unscored
+            db.flush()
+            enqueue(db, "score_lead", {"lead_id": db_lead.id}, dedupe_key=f"score_lead:{db_lead.id}",
+                    priority=INTERACTIVE_JOB_PRIORITY)
         db.commit()
         db.refresh(db_lead)
+        # Release the connection before the LLM call; db_lead stays loaded
+        # (detached) and is re-attached to save the score
+        db.close()
 
         # Log lead creation activity
-        activity = models.Activity(
+        activity_writer.log(
             lead_id=db_lead.id,
             activity_type="lead_created",
             description=f"Lead {db_lead.first_name} {db_lead.last_name} was created",
             notes=f"Company: {db_lead.company}, Job Title: {db_lead.job_title}"
         )
-        db.add(activity)
+        if JOB_QUEUE_ENABLED:
+            return db_lead
 
         # Score the lead immediately
         try:
             score_data = lead_scorer.score_lead(db_lead)
+            db.add(db_lead)
             db_lead.score = score_data["score"]
             db_lead.score_reasoning = score_data["reasoning"]
+            db_lead.score_prompt_version = score_data.get("prompt_version")
 
             # Auto-progress based on score
-            if db_lead.score >= 80 and db_lead.pipeline_stage == "new":
+            auto_qualified = should_auto_qualify(db_lead.score, db_lead.pipeline_stage)
+            if auto_qualified:
                 db_lead.pipeline_stage = "qualified"
-                activity = models.Activity(
+
+            db.commit()
+
+            if auto_qualified:
+                activity_writer.log(
                     lead_id=db_lead.id,
                     activity_type="auto_stage_change",
                     description=f"Auto-qualified based on high score ({db_lead.score})",
-                    notes="Automatically moved to Qualified stage due to score >= 80"
+                    notes=f"Automatically moved to Qualified stage due to score >= {AUTO_QUALIFY_SCORE}"
                 )
-                db.add(activity)
-
-            db.commit()
+            schedule_pregeneration(db_lead.id)
         except Exception as score_error:
             # If scoring fails, log it but don't fail the lead creation
             print(f"Warning: Failed to score lead {db_lead.id}: {str(score_error)}")
+            db.rollback()
+            db.add(db_lead)
             db_lead.score = 0.0
             db_lead.score_reasoning = "Scoring temporarily unavailable. Please try rescoring later."
             db.commit()
@@ -160,15 +314,60 @@ def create_lead(lead: schemas.LeadCreate, db: Session = Depends(get_db)):
             )
 
 @app.get("/api/leads", response_model=List[schemas.Lead])
-def get_leads(skip: int = 0, limit: int = 100, include_deleted: bool = False, db: Session = Depends(get_db)):
+def get_leads(
+    skip: int = 0,
+    limit: int = 100,
+    include_deleted: bool = False,
+    fields: Optional[str] = None,
+    db: Session = Depends(get_read_db)
+):
+    # Sparse fieldset: select only the requested columns and skip ORM
+    # hydration plus response_model validation entirely
+    if fields is not None:
+        rows = fetch_lead_rows(db, parse_fields(fields), skip, limit, include_deleted)
+        return JSONResponse(content=rows)
+
     query = db.query(models.Lead)
     if not include_deleted:
         query = query.filter(models.Lead.is_deleted == False)
     leads = query.offset(skip).limit(limit).all()
     return leads
 
+@app.get("/api/leads/export")
+def export_leads(
+    format: str = "csv",
+    fields: Optional[str] = None,
+    stage: Optional[str] = None,
+    industry: Optional[str] = None,
+    min_score: Optional[float] = None,
+    updated_since: Optional[datetime] = None,
+    include_deleted: bool = False,
+    gzip: bool = False
+):
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Unsupported export format '{format}'. Use one of: {', '.join(EXPORT_FORMATS)}"
+        )
+
+    field_names = parse_fields(fields or ",".join(LEAD_FIELDS))
+    stmt = build_export_query(field_names, stage, industry, min_score, updated_since, include_deleted)
+
+    filename = f"leads.{format}" + (".gz" if gzip else "")
+    return StreamingResponse(
+        stream_leads(stmt, field_names, format, compress=gzip),
+        media_type="application/gzip" if gzip else EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@app.get("/api/leads/duplicates")
+def get_duplicate_leads(threshold: float = 0.85, db: Session = Depends(get_read_db)):
+    if not 0 < threshold <= 1:
+        raise HTTPException(status_code=422, detail="Threshold must be between 0 and 1.")
+    return find_duplicates(db, threshold)
+
 @app.get("/api/leads/{lead_id}", response_model=schemas.Lead)
-def get_lead(lead_id: int, db: Session = Depends(get_db)):
+def get_lead(lead_id: int, db: Session = Depends(get_read_db)):
     lead = db.query(models.Lead).filter(
         models.Lead.id == lead_id,
         models.Lead.is_deleted == False
@@ -177,6 +376,50 @@ def get_lead(lead_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Lead not found")
     return lead
 
+@app.get("/api/leads/{lead_id}/full", response_model=schemas.LeadDetail)
+def get_lead_detail(
+    lead_id: int,
+    messages_limit: int = 5,
+    activities_limit: int = 20,
+    activities_offset: int = 0,
+    db: Session = Depends(get_read_db)
+):
+    """Lead drawer in one round trip: the lead, its latest messages and one
+    page of the activity timeline, each from a bounded indexed query"""
+    lead = db.query(models.Lead).filter(
+        models.Lead.id == lead_id,
+        models.Lead.is_deleted == False
+    ).first()
+    if not lead:
+        raise HTTPException(status_code=404, detail="Lead not found")
+
+    messages_limit = max(0, min(messages_limit, 50))
+    activities_limit = max(1, min(activities_limit, 200))
+    activities_offset = max(0, activities_offset)
+
+    messages = db.query(models.Message).filter(
+        models.Message.lead_id == lead_id
+    ).order_by(models.Message.created_at.desc()).limit(messages_limit).all()
+
+    # One extra row tells the client whether another page exists without a
+    # COUNT over the whole timeline
+    activities = db.query(models.Activity).filter(
+        models.Activity.lead_id == lead_id
+    ).order_by(
+        models.Activity.timestamp.desc()
+    ).offset(activities_offset).limit(activities_limit + 1).all()
+
+    return {
+        "lead": lead,
+        "messages": messages,
+        "activities": {
+            "items": activities[:activities_limit],
+            "has_more": len(activities) > activities_limit,
+            "offset": activities_offset,
+            "limit": activities_limit
+        }
+    }
+
 @app.put("/api/leads/{lead_id}", response_model=schemas.Lead)
 def update_lead(lead_id: int, lead_update: schemas.LeadUpdate, db: Session = Depends(get_db)):
     lead = db.query(models.Lead).filter(models.Lead.id == lead_id).first()
@@ -218,11 +461,17 @@ def update_lead(lead_id: int, lead_update: schemas.LeadUpdate, db: Session = Dep
             )
 
     try:
-        for key, value in lead_update.dict(exclude_unset=True).items():
+        updates = lead_update.dict(exclude_unset=True)
+        stage_changed = "pipeline_stage" in updates and updates["pipeline_stage"] != lead.pipeline_stage
+        for key, value in updates.items():
             setattr(lead, key, value)
 
+        if stage_changed:
+            retarget_follow_ups(db, lead.id, lead.pipeline_stage)
         db.commit()
         db.refresh(lead)
+        if stage_changed:
+            schedule_pregeneration(lead.id)
         return lead
     except Exception as e:
         db.rollback()
@@ -252,17 +501,16 @@ def delete_lead(lead_id: int, db: Session = Depends(get_db)):
     lead.is_deleted = True
     lead.deleted_at = datetime.utcnow()
     lead.deleted_by = "system"  # TODO: Replace with actual user when auth is implemented
+    cancel_follow_ups(db, lead.id, "lead deleted")
+    db.commit()
 
     # Log activity for audit trail
-    activity = models.Activity(
+    activity_writer.log(
         lead_id=lead.id,
         activity_type="lead_deleted",
         description=f"Lead {lead.first_name} {lead.last_name} was deleted",
         notes=f"Email: {lead.email}"
     )
-    db.add(activity)
-
-    db.commit()
     return {"message": "Lead deleted successfully", "lead_id": lead_id}
 
 @app.post("/api/leads/{lead_id}/restore")
@@ -278,68 +526,145 @@ def restore_lead(lead_id: int, db: Session = Depends(get_db)):
     lead.is_deleted = False
     lead.deleted_at = None
     lead.deleted_by = None
+    db.commit()
 
     # Log activity for audit trail
-    activity = models.Activity(
+    activity_writer.log(
         lead_id=lead.id,
         activity_type="lead_restored",
         description=f"Lead {lead.first_name} {lead.last_name} was restored",
         notes=f"Email: {lead.email}"
     )
-    db.add(activity)
+    return {"message": "Lead restored successfully", "lead_id": lead_id}
+
+@app.post("/api/leads/{lead_id}/merge")
+def merge_duplicate_leads(lead_id: int, merge_request: schemas.MergeRequest, db: Session = Depends(get_db)):
+    duplicate_ids = [i for i in set(merge_request.duplicate_ids) if i != lead_id]
+    if not duplicate_ids:
+        raise HTTPException(status_code=422, detail="Provide at least one duplicate lead to merge.")
 
+    primary = db.query(models.Lead).filter(
+        models.Lead.id == lead_id,
+        models.Lead.is_deleted == False
+    ).first()
+    if not primary:
+        raise HTTPException(status_code=404, detail="Lead not found")
+
+    duplicates = db.query(models.Lead).filter(
+        models.Lead.id.in_(duplicate_ids),
+        models.Lead.is_deleted == False
+    ).all()
+    missing = set(duplicate_ids) - {lead.id for lead in duplicates}
+    if missing:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Duplicate leads not found: {', '.join(str(i) for i in sorted(missing))}"
+        )
+
+    # Land buffered audit rows first so they are re-parented with the rest
+    activity_writer.flush()
+    result = merge_leads(db, primary, duplicates)
     db.commit()
-    return {"message": "Lead restored successfully", "lead_id": lead_id}
+
+    # Log merge activity for audit trail
+    activity_writer.log(
+        lead_id=primary.id,
+        activity_type="leads_merged",
+        description=f"Merged {len(duplicates)} duplicate lead(s) into {primary.first_name} {primary.last_name}",
+        notes="Merged: " + ", ".join(f"{lead.email} (#{lead.id})" for lead in duplicates)
+    )
+    return result
 
 # Lead Scoring
 @app.post("/api/leads/{lead_id}/score")
 def score_lead(lead_id: int, criteria: Optional[schemas.ScoringCriteria] = None, db: Session = Depends(get_db)):
-    lead = db.query(models.Lead).filter(models.Lead.id == lead_id).first()
-    if not lead:
+    snapshot = lead_cache.get(db, lead_id)
+    if not snapshot:
         raise HTTPException(status_code=404, detail="Lead not found")
-    score_data = lead_scorer.score_lead(lead, custom_criteria=criteria)
+    if JOB_QUEUE_ENABLED:
+        return queue_lead_job(
+            db, "score_lead", {"lead_id": lead_id, "criteria": criteria.dict() if criteria else None},
+            dedupe_key=f"score_lead:{lead_id}"
+        )
+    score_data = lead_scorer.score_lead(snapshot, custom_criteria=criteria)
 
+    lead = db.get(models.Lead, lead_id)
     old_score = lead.score
     lead.score = score_data["score"]
     lead.score_reasoning = score_data["reasoning"]
+    lead.score_prompt_version = score_data.get("prompt_version")
+
+    # Auto-progress based on score
+    auto_qualified = should_auto_qualify(lead.score, lead.pipeline_stage)
+    if auto_qualified:
+        lead.pipeline_stage = "qualified"
+
+    db.commit()
 
     # Log scoring activity
-    activity = models.Activity(
+    activity_writer.log(
         lead_id=lead.id,
         activity_type="lead_scored",
         description=f"Lead scored: {lead.score}/100" + (f" (was {old_score})" if old_score else ""),
         notes=score_data["reasoning"][:200] if score_data["reasoning"] else None
     )
-    db.add(activity)
-
-    # Auto-progress based on score
-    if lead.score >= 80 and lead.pipeline_stage == "new":
-        lead.pipeline_stage = "qualified"
-        activity = models.Activity(
+    if auto_qualified:
+        activity_writer.log(
             lead_id=lead.id,
             activity_type="auto_stage_change",
             description=f"Auto-qualified based on high score ({lead.score})",
-            notes="Automatically moved to Qualified stage due to score >= 80"
+            notes=f"Automatically moved to Qualified stage due to score >= {AUTO_QUALIFY_SCORE}"
         )
-        db.add(activity)
-
-    db.commit()
+        schedule_pregeneration(lead.id)
 
     return score_data
 
 @app.post("/api/leads/score-batch")
 def score_all_leads(criteria: Optional[schemas.ScoringCriteria] = None, db: Session = Depends(get_db)):
+    if JOB_QUEUE_ENABLED:
+        # One job per lead so every worker process shares the batch; a lead
+        # with a rescore already pending is not queued twice
+        lead_ids = db.query(models.Lead.id).filter(models.Lead.is_deleted == False).all()
+        queued = enqueue_many(
+            db,
+            "score_lead",
+            ({"lead_id": lead_id, "batch": True, "criteria": criteria.dict() if criteria else None} for lead_id, in lead_ids),
+            dedupe_key=lambda payload: f"score_lead:{payload['lead_id']}"
+        )
+        db.commit()
+        return JSONResponse(status_code=202, content={
+            "queued": queued,
+            "already_queued": len(lead_ids) - queued,
+            "status_url": "/api/jobs?kind=score_lead"
+        })
+
     leads = db.query(models.Lead).all()
     results = []
-    
-    for lead in leads:
-        score_data = lead_scorer.score_lead(lead, custom_criteria=criteria)
+    skipped = 0
+
+    # Once the token budget throttles batch work, leads that already have a
+    # score keep it rather than being overwritten by the fallback scorer
+    def score(lead):
+        if lead.score and not token_budget.allows("lead_scoring"):
+            return None
+        return lead_scorer.score_lead(lead, custom_criteria=criteria)
+
+    # Batch priority: the scheduler serves interactive calls first, so the
+    # fan-out cannot slow down a user's click
+    with llm_priority("batch"):
+        scored = map_concurrently(score, leads, BATCH_CONCURRENCY)
+
+    for lead, score_data in zip(leads, scored):
+        if score_data is None:
+            skipped += 1
+            continue
         lead.score = score_data["score"]
         lead.score_reasoning = score_data["reasoning"]
+        lead.score_prompt_version = score_data.get("prompt_version")
         results.append({"lead_id": lead.id, "score": score_data["score"]})
-    
+
     db.commit()
-    return {"scored": len(results), "results": results}
+    return {"scored": len(results), "skipped_budget": skipped, "results": results}
 
 # Message Generation
 @app.post("/api/leads/{lead_id}/generate-message")
@@ -348,57 +673,94 @@ def generate_message(
     message_type: str = "initial_outreach",
     db: Session = Depends(get_db)
 ):
-    lead = db.query(models.Lead).filter(models.Lead.id == lead_id).first()
+    lead = lead_cache.get(db, lead_id)
     if not lead:
         raise HTTPException(status_code=404, detail="Lead not found")
     
-    message = message_generator.generate_message(lead, message_type)
+    # A speculative draft written after the last stage change is served as
+    # is when nothing it was written from has changed since
+    message = pregenerator.take(db, lead, message_type) if pregenerator is not None else None
+    if message is None and JOB_QUEUE_ENABLED:
+        return queue_lead_job(
+            db, "generate_message", {"lead_id": lead_id, "message_type": message_type},
+            dedupe_key=f"generate_message:{lead_id}:{message_type}"
+        )
+    if message is None:
+        message = message_generator.generate_message(lead, message_type)
 
     # Save message to database
     db_message = models.Message(
         lead_id=lead.id,
         message_type=message_type,
         content=message["content"],
-        subject=message.get("subject")
+        subject=message.get("subject"),
+        prompt_version=message.get("prompt_version")
     )
     db.add(db_message)
 
+    # Auto-progress to "contacted" if message is initial outreach and lead is qualified or new
+    auto_contacted = message_type == "initial_outreach" and lead.pipeline_stage in ["new", "qualified"]
+    if auto_contacted:
+        db.get(models.Lead, lead_id).pipeline_stage = "contacted"
+
+    # The next touch is due after the wait the model suggested for this message
+    db.flush()
+    follow_up_due = schedule_follow_up(
+        db, lead.id, "contacted" if auto_contacted else lead.pipeline_stage, db_message.id, follow_up_days(message)
+    )
+    db.commit()
+    follow_up_scheduler.notify(follow_up_due)
+
     # Log message generation activity
-    activity = models.Activity(
+    activity_writer.log(
         lead_id=lead.id,
         activity_type="message_generated",
         description=f"{message_type.replace('_', ' ').title()} message generated",
         notes=f"Subject: {message.get('subject', 'N/A')}"
     )
-    db.add(activity)
-
-    # Auto-progress to "contacted" if message is initial outreach and lead is qualified or new
-    if message_type == "initial_outreach" and lead.pipeline_stage in ["new", "qualified"]:
-        lead.pipeline_stage = "contacted"
-        activity = models.Activity(
+    if auto_contacted:
+        activity_writer.log(
             lead_id=lead.id,
             activity_type="auto_stage_change",
             description=f"Auto-moved to Contacted after {message_type} message generated",
             notes="Automatically moved to Contacted stage after initial outreach message was created"
         )
-        db.add(activity)
-
-    db.commit()
+        schedule_pregeneration(lead.id)
 
     return message
 
 @app.get("/api/leads/{lead_id}/messages")
-def get_lead_messages(lead_id: int, db: Session = Depends(get_db)):
+def get_lead_messages(lead_id: int, db: Session = Depends(get_read_db)):
     messages = db.query(models.Message).filter(models.Message.lead_id == lead_id).all()
     return messages
 
+@app.get("/api/messages/near-duplicates")
+def get_near_duplicate_messages(
+    threshold: float = 0.7,
+    min_cluster_size: int = 2,
+    limit: int = 50,
+    db: Session = Depends(get_read_db)
+):
+    if not 0 < threshold <= 1:
+        raise HTTPException(status_code=422, detail="threshold must be between 0 and 1.")
+    return find_near_duplicate_clusters(db, threshold=threshold, min_cluster_size=max(min_cluster_size, 2), limit=limit)
+
+@app.get("/api/messages/{message_id}/similar")
+def get_similar_messages(message_id: int, threshold: float = 0.7, limit: int = 20, db: Session = Depends(get_read_db)):
+    if not 0 < threshold <= 1:
+        raise HTTPException(status_code=422, detail="threshold must be between 0 and 1.")
+    similar = find_similar_messages(db, message_id, threshold=threshold, limit=limit)
+    if similar is None:
+        raise HTTPException(status_code=404, detail="Message not found")
+    return {"message_id": message_id, "similar": similar}
+
 @app.post("/api/leads/{lead_id}/tune-message")
 def tune_message(
     lead_id: int,
     tune_request: dict,
     db: Session = Depends(get_db)
 ):
-    lead = db.query(models.Lead).filter(models.Lead.id == lead_id).first()
+    lead = lead_cache.get(db, lead_id)
     if not lead:
         raise HTTPException(status_code=404, detail="Lead not found")
 
@@ -419,20 +781,19 @@ def tune_message(
         lead_id=lead.id,
         message_type=f"{message_type}_tuned",
         content=tuned_content["content"],
-        subject=tuned_content.get("subject")
+        subject=tuned_content.get("subject"),
+        prompt_version=tuned_content.get("prompt_version")
     )
     db.add(db_message)
+    db.commit()
 
     # Log tune-up activity
-    activity = models.Activity(
+    activity_writer.log(
         lead_id=lead.id,
         activity_type="message_tuned",
         description=f"Message tuned based on feedback",
         notes=f"Instructions: {instructions[:200]}"
     )
-    db.add(activity)
-
-    db.commit()
 
     return tuned_content
 
@@ -441,36 +802,123 @@ def tune_message(
 def update_lead_stage(
     lead_id: int, 
     stage_update: schemas.StageUpdate,
-    db: Session = Depends(get_db)
 ):
-    lead = db.query(models.Lead).filter(models.Lead.id == lead_id).first()
-    if not lead:
-        raise HTTPException(status_code=404, detail="Lead not found")
-    
-    lead.pipeline_stage = stage_update.stage
-    
+    # Small write: group-committed by the single writer in the production profile
+    def apply_stage_change(db: Session):
+        lead = db.query(models.Lead).filter(models.Lead.id == lead_id).first()
+        if not lead:
+            raise HTTPException(status_code=404, detail="Lead not found")
+
+        lead.pipeline_stage = stage_update.stage
+        retarget_follow_ups(db, lead_id, lead.pipeline_stage)
+        return lead.pipeline_stage
+
+    new_stage = run_write(apply_stage_change)
+
     # Log activity
-    activity = models.Activity(
-        lead_id=lead.id,
+    activity_writer.log(
+        lead_id=lead_id,
         activity_type="stage_change",
         description=f"Stage changed to {stage_update.stage}",
         notes=stage_update.notes
     )
-    db.add(activity)
-    db.commit()
-    
-    return {"message": "Stage updated", "new_stage": lead.pipeline_stage}
+    schedule_pregeneration(lead_id)
+    return {"message": "Stage updated", "new_stage": new_stage}
 
 @app.get("/api/leads/{lead_id}/activities")
-def get_lead_activities(lead_id: int, db: Session = Depends(get_db)):
+def get_lead_activities(lead_id: int, db: Session = Depends(get_read_db)):
     activities = db.query(models.Activity).filter(
         models.Activity.lead_id == lead_id
     ).order_by(models.Activity.timestamp.desc()).all()
     return activities
 
+# Follow-ups
+@app.get("/api/follow-ups")
+def list_follow_ups(due_before: Optional[datetime] = None, limit: int = 100, db: Session = Depends(get_read_db)):
+    """Scheduled follow-ups soonest first (served from the status/due_at index)"""
+    query = db.query(models.FollowUp).filter(models.FollowUp.status == "scheduled")
+    if due_before is not None:
+        query = query.filter(models.FollowUp.due_at <= due_before)
+    return query.order_by(models.FollowUp.due_at).limit(min(max(limit, 1), 1000)).all()
+
+@app.get("/api/leads/{lead_id}/follow-ups")
+def get_lead_follow_ups(lead_id: int, db: Session = Depends(get_read_db)):
+    return db.query(models.FollowUp).filter(
+        models.FollowUp.lead_id == lead_id
+    ).order_by(models.FollowUp.created_at.desc()).all()
+
+@app.delete("/api/leads/{lead_id}/follow-ups")
+def cancel_lead_follow_ups(lead_id: int):
+    cancelled = run_write(lambda db: cancel_follow_ups(db, lead_id, "cancelled by user"))
+    if cancelled:
+        activity_writer.log(
+            lead_id=lead_id,
+            activity_type="follow_up_cancelled",
+            description="Scheduled follow-up cancelled"
+        )
+    return {"message": "Follow-ups cancelled", "cancelled": cancelled}
+
+@app.post("/api/follow-ups/dispatch")
+def dispatch_follow_ups():
+    """Draft one batch of due follow-ups now instead of waiting for the next tick"""
+    if JOB_QUEUE_ENABLED:
+        raise HTTPException(
+            status_code=409,
+            detail="Follow-ups are dispatched by the worker (python -m app.worker --follow-ups) when JOB_QUEUE=1."
+        )
+    return {"dispatched": follow_up_scheduler.tick()}
+
+# Background Jobs
+@app.post("/api/jobs", status_code=202)
+def create_job(job: schemas.JobCreate, db: Session = Depends(get_db)):
+    if job.kind not in JOB_KINDS:
+        raise HTTPException(status_code=422, detail=f"Unknown job kind '{job.kind}'. Use one of: {', '.join(JOB_KINDS)}.")
+    if not isinstance(job.payload.get("lead_id"), int):
+        raise HTTPException(status_code=422, detail="payload.lead_id is required.")
+    if not 1 <= job.max_attempts <= 20:
+        raise HTTPException(status_code=422, detail="max_attempts must be between 1 and 20.")
+
+    job_id = enqueue(
+        db, job.kind, job.payload,
+        dedupe_key=job.dedupe_key,
+        max_attempts=job.max_attempts,
+        run_after=datetime.utcnow() + timedelta(seconds=max(job.delay_seconds, 0))
+    )
+    db.commit()
+    if job_id is None:
+        raise HTTPException(status_code=409, detail=f"A job with dedupe key '{job.dedupe_key}' is already queued or running.")
+    return job_to_dict(db.get(models.Job, job_id))
+
+@app.get("/api/jobs")
+def get_jobs(status: Optional[str] = None, kind: Optional[str] = None, limit: int = 100, db: Session = Depends(get_read_db)):
+    return list_jobs(db, status=status, kind=kind, limit=min(max(limit, 1), 1000))
+
+@app.get("/api/jobs/{job_id}")
+def get_job(job_id: int, db: Session = Depends(get_read_db)):
+    job = db.get(models.Job, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job_to_dict(job)
+
+@app.post("/api/jobs/{job_id}/retry")
+def retry_job(job_id: int):
+    """Requeue a dead-lettered job with a fresh set of attempts"""
+    if not job_queue.retry(job_id):
+        raise HTTPException(
+            status_code=409,
+            detail="Only dead jobs can be retried, and not while another job with the same dedupe key is queued or running."
+        )
+    return {"message": "Job requeued", "job_id": job_id}
+
+# LLM Budget
+@app.get("/api/llm/budget")
+def get_llm_budget():
+    """Token and cost budgets: limits, spend and what is left in each window"""
+    return token_budget.stats()
+
 # Analytics
 @app.get("/api/analytics/pipeline")
-def get_pipeline_analytics(db: Session = Depends(get_db)):
+def get_pipeline_analytics(db: Session = Depends(get_read_db)):
     from sqlalchemy import func
     
     pipeline_stats = db.query(
@@ -486,4 +934,81 @@ def get_pipeline_analytics(db: Session = Depends(get_db)):
             "avg_score": float(stat[2]) if stat[2] else 0
         }
         for stat in pipeline_stats
-    ]
\ No newline at end of file
+    ]
+
+# Search
+@app.get("/api/search")
+def search(
+    q: str,
+    limit: int = 20,
+    prefix: bool = True,
+    types: str = "leads,messages",
+    db: Session = Depends(get_read_db)
+):
+    match = build_match_query(q, prefix=prefix)
+    if not match:
+        raise HTTPException(status_code=422, detail="Search query must contain at least one word.")
+
+    limit = max(1, min(limit, 100))
+    requested = {t.strip() for t in types.split(",")}
+
+    return {
+        "query": q,
+        "leads": search_leads(db, match, limit) if "leads" in requested else [],
+        "messages": search_messages(db, match, limit) if "messages" in requested else []
+    }
+
+# Debug
+@app.get("/api/debug/queries")
+def get_query_profile(sort: str = "total_ms", limit: int = 50):
+    if sort not in ("total_ms", "avg_ms", "max_ms", "count", "slow_count"):
+        raise HTTPException(status_code=422, detail=f"Cannot sort by '{sort}'.")
+
+    queries = query_profiler.snapshot(sort=sort, limit=limit)
+    return {
+        "slow_threshold_ms": query_profiler.slow_threshold_ms,
+        "full_scans": [q["sql"] for q in queries if q["full_scan"]],
+        "queries": queries
+    }
+
+@app.delete("/api/debug/queries")
+def reset_query_profile():
+    query_profiler.reset()
+    return {"message": "Query profile reset"}
+
+@app.get("/api/debug/lead-cache")
+def get_lead_cache_stats():
+    return lead_cache.stats()
+
+@app.get("/api/debug/pregeneration")
+def get_pregeneration_stats():
+    if pregenerator is None:
+        return {"enabled": False}
+    return {"enabled": True, **pregenerator.stats()}
+
+@app.get("/api/debug/traces")
+def get_recent_traces(limit: int = 50):
+    return {**tracer.stats(), "traces": tracer.recent(limit)}
+
+@app.get("/api/debug/traces/{trace_id}")
+def get_trace(trace_id: str):
+    trace = tracer.get(trace_id)
+    if trace is None:
+        raise HTTPException(status_code=404, detail="Trace not found (only recently kept traces are held in memory)")
+    return trace
+
+@app.get("/api/debug/jobs")
+def get_job_queue_stats():
+    return {"enabled": JOB_QUEUE_ENABLED, **job_queue.stats()}
+
+@app.get("/api/debug/follow-ups")
+def get_follow_up_stats():
+    return follow_up_scheduler.stats()
+
+@app.get("/api/debug/llm-scheduler")
+def get_llm_scheduler_stats():
+    return llm_scheduler.stats()
+
+@app.get("/api/debug/prompts")
+def get_prompt_versions():
+    return prompt_registry.active_versions()
@@ -0,0 +1,251 @@
+# backend/app/message_templates.py
+"""Precompiled outreach templates keyed by message type, pipeline stage and industry"""
+
+from dataclasses import dataclass
+from functools import lru_cache
+from string import Template
+from typing import Any, Dict, List, Optional, Tuple
+
+SIGN_OFF = "Best regards,\n[Your Name]"
+
+# Sentences the LLM writes; everything else in a message is template text.
+# Each slot is a single sentence, capped so a runaway completion cannot
+# swallow the email.
+LLM_SLOTS = {
+    "opener": 300,
+    "hook": 300
+}
+
+# Per-stage framing. "cta" closes the email unless the message type brings
+# its own call-to-action.
+STAGE_LINES = {
+    "new": {
+        "stage_line": "",
+        "cta": "Would you be open to a brief 15-minute call next week to see if this could help your team?"
+    },
+    "qualified": {
+        "stage_line": "",
+        "cta": "Would you be open to a brief 15-minute call next week to see if this could help your team?"
+    },
+    "contacted": {
+        "stage_line": "Building on my earlier note, I wanted to share something specific to $company.",
+        "cta": "Would a short call this week make sense to pick up where we left off?"
+    },
+    "meeting": {
+        "stage_line": "Thanks again for making time to meet - I've been thinking about what we discussed.",
+        "cta": "Shall I send over an agenda so we can build on our last conversation?"
+    },
+    "negotiation": {
+        "stage_line": "As you weigh the proposal, here is how teams like yours have measured ROI in their first quarter.",
+        "cta": "Would it help to walk through pricing and implementation details together this week?"
+    },
+    "closed_won": {
+        "stage_line": "Welcome aboard - we're excited to help $company get the most out of the platform.",
+        "cta": "Would you like to set up a quick onboarding check-in with our success team?"
+    },
+    "closed_lost": {
+        "stage_line": "I know the timing wasn't right before, and I respect that.",
+        "cta": "If priorities shift, I'd be glad to reconnect - no pressure either way."
+    }
+}
+
+INDUSTRY_LINES = {
+    "Technology": "Technology teams often lose pipeline to slow, manual lead qualification.",
+    "SaaS": "SaaS sales teams are under constant pressure to shorten sales cycles without adding headcount.",
+    "Enterprise Software": "Enterprise software deals involve long cycles and many stakeholders, which makes qualification expensive.",
+    "Finance": "Finance teams need to grow pipeline while keeping every touchpoint compliant and consistent.",
+    "Healthcare": "Healthcare organizations juggle long buying cycles and many decision-makers.",
+    "Retail": "Retail sales teams have to move quickly on seasonal demand with lean teams.",
+    "Manufacturing": "Manufacturing sales teams often rely on manual follow-ups across long, complex deals.",
+    "*": "Companies in $industry often struggle with lengthy sales cycles and manual lead qualification."
+}
+
+
+@dataclass(frozen=True)
+class MessageTemplate:
+    subject: str
+    paragraphs: Tuple[str, ...]
+    key_points: Tuple[str, ...]
+    follow_up_timing: int
+
+
+MESSAGE_TEMPLATES = {
+    "initial_outreach": MessageTemplate(
+        subject="Quick question for $company, $first_name",
+        paragraphs=(
+            "Hi $first_name,",
+            "$opener",
+            "$stage_line",
+            "$industry_line Our AI-powered platform helps sales teams qualify leads 3x faster and increase conversion rates by 40%.",
+            "$hook",
+            "$cta",
+            SIGN_OFF
+        ),
+        key_points=("AI-powered qualification", "3x faster qualification", "40% higher conversion"),
+        follow_up_timing=3
+    ),
+    "follow_up": MessageTemplate(
+        subject="Following up - $first_name",
+        paragraphs=(
+            "Hi $first_name,",
+            "$opener",
+            "I wanted to follow up on my previous message about helping $company streamline your sales process.",
+            "$hook",
+            "$cta",
+            SIGN_OFF
+        ),
+        key_points=("Brief call", "Streamlined sales process"),
+        follow_up_timing=5
+    ),
+    "meeting_request": MessageTemplate(
+        subject="20 minutes next week, $first_name?",
+        paragraphs=(
+            "Hi $first_name,",
+            "$opener",
+            "$stage_line",
+            "I'd like to show you how $company could automate repetitive sales tasks and get data-driven insights into your pipeline.",
+            "$hook",
+            "Would Tuesday or Thursday next week work for a 20-minute demo? I'll tailor the agenda to your priorities.",
+            SIGN_OFF
+        ),
+        key_points=("Tailored demo", "Sales task automation", "Pipeline insights"),
+        follow_up_timing=2
+    ),
+    "value_proposition": MessageTemplate(
+        subject="How $company could qualify leads 3x faster",
+        paragraphs=(
+            "Hi $first_name,",
+            "$opener",
+            "$stage_line",
+            "$industry_line",
+            "Teams using our platform qualify leads 3x faster, increase conversion rates by 40% and spend far less time on repetitive tasks.",
+            "$hook",
+            "$cta",
+            SIGN_OFF
+        ),
+        key_points=("3x faster qualification", "40% higher conversion", "Less manual work"),
+        follow_up_timing=4
+    ),
+    "casual_check_in": MessageTemplate(
+        subject="Checking in, $first_name",
+        paragraphs=(
+            "Hi $first_name,",
+            "$opener",
+            "$stage_line",
+            "$hook",
+            "No agenda here - just wanted to stay in touch. Let me know if there's anything I can help with.",
+            SIGN_OFF
+        ),
+        key_points=("Relationship building",),
+        follow_up_timing=14
+    ),
+    "problem_solution": MessageTemplate(
+        subject="An idea for the sales pipeline at $company",
+        paragraphs=(
+            "Hi $first_name,",
+            "$opener",
+            "$industry_line",
+            "Our platform automates lead qualification and follow-ups so your reps spend their time on conversations that close.",
+            "$hook",
+            "$cta",
+            SIGN_OFF
+        ),
+        key_points=("Automated qualification", "Automated follow-ups", "More selling time"),
+        follow_up_timing=4
+    )
+}
+
+
+@dataclass(frozen=True)
+class CompiledTemplate:
+    subject: Template
+    paragraphs: Tuple[Template, ...]
+    stage_line: Template
+    cta: Template
+    industry_line: Template
+    key_points: Tuple[str, ...]
+    follow_up_timing: int
+
+
+@lru_cache(maxsize=1024)
+def resolve_template(message_type: str, stage: Optional[str], industry: Optional[str]) -> CompiledTemplate:
+    """Compiled template for a (message type, stage, industry) key.
+
+    Unknown message types fall back to initial_outreach, unknown stages to
+    "new" and unknown industries to the generic line. Compiled keys are
+    memoized, so each is built once per process.
+    """
+    template = MESSAGE_TEMPLATES.get(message_type, MESSAGE_TEMPLATES["initial_outreach"])
+    stage_lines = STAGE_LINES.get(stage, STAGE_LINES["new"])
+
+    return CompiledTemplate(
+        subject=Template(template.subject),
+        paragraphs=tuple(Template(p) for p in template.paragraphs),
+        stage_line=Template(stage_lines["stage_line"]),
+        cta=Template(stage_lines["cta"]),
+        industry_line=Template(INDUSTRY_LINES.get(industry, INDUSTRY_LINES["*"])),
+        key_points=template.key_points,
+        follow_up_timing=template.follow_up_timing
+    )
+
+
+def lead_slots(lead: Any) -> Dict[str, str]:
+    """Typed lead slots with safe defaults for missing data"""
+    return {
+        "first_name": (lead.first_name or "there").strip(),
+        "company": (lead.company or "your company").strip(),
+        "job_title": (lead.job_title or "").strip(),
+        "industry": (lead.industry or "your industry").strip()
+    }
+
+
+def default_llm_slots(slots: Dict[str, str]) -> Dict[str, str]:
+    """Instant stand-ins for the LLM-written sentences"""
+    if slots["job_title"]:
+        opener = f"I noticed you're {slots['job_title']} at {slots['company']}."
+    else:
+        opener = f"I came across {slots['company']} and wanted to reach out."
+    return {
+        "opener": opener,
+        "hook": f"I'd love to share how a team similar to {slots['company']} achieved these results."
+    }
+
+
+def clean_llm_slots(result: Any) -> Dict[str, str]:
+    """Keep only well-formed LLM slot values; anything else falls back"""
+    cleaned = {}
+    if not isinstance(result, dict):
+        return cleaned
+    for name, max_length in LLM_SLOTS.items():
+        value = result.get(name)
+        if isinstance(value, str):
+            value = " ".join(value.split())
+            if value and len(value) <= max_length:
+                cleaned[name] = value
+    return cleaned
+
+
+def render_message(lead: Any, message_type: str, llm_slots: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    """Render a complete message; LLM slots that are missing use defaults"""
+    compiled = resolve_template(message_type, lead.pipeline_stage, lead.industry)
+    slots = lead_slots(lead)
+
+    values = dict(slots)
+    values.update(default_llm_slots(slots))
+    values.update(llm_slots or {})
+    values["stage_line"] = compiled.stage_line.safe_substitute(slots)
+    values["cta"] = compiled.cta.safe_substitute(slots)
+    values["industry_line"] = compiled.industry_line.safe_substitute(slots)
+
+    paragraphs: List[str] = []
+    for paragraph in compiled.paragraphs:
+        text = paragraph.safe_substitute(values).strip()
+        if text:
+            paragraphs.append(text)
+
+    return {
+        "subject": compiled.subject.safe_substitute(values),
+        "content": "\n\n".join(paragraphs),
+        "key_points": list(compiled.key_points),
+        "follow_up_timing": compiled.follow_up_timing
+    }
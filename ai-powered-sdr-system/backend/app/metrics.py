@@ -0,0 +1,306 @@
+# backend/app/metrics.py
+"""Prometheus text-format metrics recorded into per-thread shards"""
+
+import bisect
+import threading
+import time
+import weakref
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+
+# Seconds. HTTP requests range from a cached read to a full LLM round trip
+HTTP_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+DB_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+LLM_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 15.0, 30.0)
+
+# PlainTextResponse appends the charset
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_text(names: Sequence[str], values: Sequence[Any]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+class _Metric:
+    """A named metric whose values live in one dict per thread.
+
+    The recording thread is the only writer of its shard, so `inc()` and
+    `observe()` take no lock. Collection copies every shard and adds them
+    up; shards of threads that have exited are folded into a retired total
+    so thread pools that recycle workers don't grow the shard list.
+    """
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        self._shards: List[Tuple[threading.Thread, dict]] = []
+        self._retired: dict = {}
+        self._lock = threading.Lock()
+
+    def _shard(self) -> dict:
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = {}
+            with self._lock:
+                self._shards.append((threading.current_thread(), shard))
+            return shard
+
+    def _merge(self, into: dict, shard: dict) -> None:
+        for labels, value in shard.items():
+            into[labels] = into.get(labels, 0) + value
+
+    def collect(self) -> dict:
+        """Label values -> aggregated value across all threads"""
+        with self._lock:
+            live = []
+            for thread, shard in self._shards:
+                if thread.is_alive():
+                    live.append((thread, shard))
+                else:
+                    self._merge(self._retired, shard.copy())
+            self._shards = live
+            total: dict = {}
+            self._merge(total, self._retired)
+        for _, shard in live:
+            self._merge(total, shard.copy())
+        return total
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for labels, value in sorted(self.collect().items()):
+            lines.append(f"{self.name}{_label_text(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        shard = self._shard()
+        shard[labels] = shard.get(labels, 0) + amount
+
+
+class Gauge(Counter):
+    """Up/down value such as requests in flight; shards sum to the current value"""
+
+    kind = "gauge"
+
+    def dec(self, *labels: str, amount: float = 1) -> None:
+        self.inc(*labels, amount=-amount)
+
+
+class CallbackGauge(_Metric):
+    """Gauge read from a function at scrape time (queue depths and the like).
+
+    The function returns a number, or a dict of label-value tuples to numbers.
+    """
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, fn: Callable[[], Any], labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self.fn = fn
+
+    def collect(self) -> dict:
+        try:
+            value = self.fn()
+        except Exception as e:
+            print(f"Warning: Failed to read metric {self.name}: {str(e)}")
+            return {}
+        return value if isinstance(value, dict) else {(): value}
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = HTTP_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labels: str) -> None:
+        shard = self._shard()
+        counts = shard.get(labels)
+        if counts is None:
+            # One slot per bucket, one for +Inf, then the running sum
+            counts = shard[labels] = [0] * (len(self.buckets) + 2)
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        counts[-1] += value
+
+    def _merge(self, into: dict, shard: dict) -> None:
+        for labels, counts in shard.items():
+            merged = into.get(labels)
+            if merged is None:
+                into[labels] = list(counts)
+            else:
+                for i, count in enumerate(counts):
+                    merged[i] += count
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        bounds = [_format_value(float(b)) for b in self.buckets] + ["+Inf"]
+        names = self.labelnames + ("le",)
+        for labels, counts in sorted(self.collect().items()):
+            # The count is the sum of the buckets so a scrape racing an
+            # observe() never shows +Inf disagreeing with _count
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_label_text(names, labels + (bound,))} {cumulative}")
+            label_text = _label_text(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(counts[-1])}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = HTTP_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def callback_gauge(self, name: str, documentation: str, fn: Callable[[], Any], labelnames: Sequence[str] = ()) -> CallbackGauge:
+        return self.register(CallbackGauge(name, documentation, fn, labelnames))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+metrics_registry = MetricsRegistry()
+
+HTTP_REQUESTS = metrics_registry.counter(
+    "sdr_http_requests_total", "HTTP requests by route template and status", ("method", "route", "status"))
+HTTP_LATENCY = metrics_registry.histogram(
+    "sdr_http_request_duration_seconds", "HTTP request latency until the last body byte", ("method", "route"))
+HTTP_IN_FLIGHT = metrics_registry.gauge(
+    "sdr_http_requests_in_flight", "HTTP requests currently being served")
+DB_STATEMENT_LATENCY = metrics_registry.histogram(
+    "sdr_db_statement_duration_seconds", "SQL statement execution time", ("engine", "operation"), DB_BUCKETS)
+LLM_LATENCY = metrics_registry.histogram(
+    "sdr_llm_call_duration_seconds", "LLM completion latency by call site", ("call_site",), LLM_BUCKETS)
+LLM_TOKENS = metrics_registry.counter(
+    "sdr_llm_tokens_total", "LLM tokens reported by the provider", ("call_site", "kind"))
+LLM_ERRORS = metrics_registry.counter(
+    "sdr_llm_errors_total", "LLM calls that failed (api) or returned unusable JSON (parse)", ("call_site", "reason"))
+FALLBACKS = metrics_registry.counter(
+    "sdr_fallbacks_total", "Results produced by a local fallback path instead of the LLM", ("component", "path"))
+
+
+def record_llm_call(call_site: str, seconds: float, usage: Optional[Dict[str, int]], error: Optional[str] = None) -> None:
+    LLM_LATENCY.observe(seconds, call_site)
+    if usage:
+        LLM_TOKENS.inc(call_site, "prompt", amount=usage.get("prompt_tokens") or 0)
+        LLM_TOKENS.inc(call_site, "completion", amount=usage.get("completion_tokens") or 0)
+    if error:
+        LLM_ERRORS.inc(call_site, error)
+
+
+@lru_cache(maxsize=1024)
+def statement_operation(statement: str) -> str:
+    """select / insert / update / delete / with / other"""
+    words = statement.split(None, 1)
+    verb = words[0].lower() if words else ""
+    return verb if verb in ("select", "insert", "update", "delete", "with") else "other"
+
+
+def instrument_engine(engine, name: str) -> None:
+    """Time every statement issued through the engine"""
+
+    def before_execute(conn, cursor, statement, parameters, context, executemany):
+        context._metrics_start = time.perf_counter()
+
+    def after_execute(conn, cursor, statement, parameters, context, executemany):
+        DB_STATEMENT_LATENCY.observe(time.perf_counter() - context._metrics_start, name, statement_operation(statement))
+
+    event.listen(engine, "before_cursor_execute", before_execute)
+    event.listen(engine, "after_cursor_execute", after_execute)
+
+
+# Starlette app -> {endpoint function: route template}
+_route_templates: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+def route_template(scope) -> str:
+    """The matched route's path template ("/api/leads/{lead_id}"), or "unmatched".
+
+    Used as a label instead of the raw path so cardinality stays bounded.
+    """
+    app = scope.get("app")
+    if app is None:
+        return "unmatched"
+    templates = _route_templates.get(app)
+    if templates is None:
+        templates = _route_templates[app] = {
+            route.endpoint: route.path
+            for route in getattr(app, "routes", ())
+            if hasattr(route, "endpoint")
+        }
+    return templates.get(scope.get("endpoint"), "unmatched")
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording request count, latency and in-flight gauge"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        start = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            method, route = scope["method"], route_template(scope)
+            HTTP_LATENCY.observe(time.perf_counter() - start, method, route)
+            HTTP_REQUESTS.inc(method, route, str(status))
@@ -1,5 +1,5 @@
 # backend/app/models.py
-from sqlalchemy import Column, Integer, String, Float, DateTime, Text, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, Float, DateTime, Text, ForeignKey, Boolean, Index, LargeBinary, text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from .database import Base
@@ -26,6 +26,7 @@ class Lead(Base):
     # Scoring
     score = Column(Float, default=0.0)
     score_reasoning = Column(Text)
+    score_prompt_version = Column(String)  # prompts.py key, e.g. "lead_scoring@v2"
     
     # Pipeline
     pipeline_stage = Column(String, default="new")  # new, qualified, contacted, meeting, negotiation, closed_won, closed_lost
@@ -46,6 +47,10 @@ class Lead(Base):
 
 class Message(Base):
     __tablename__ = "messages"
+    __table_args__ = (
+        # Backs "most recent messages for a lead"
+        Index("ix_messages_lead_id_created_at", "lead_id", "created_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     lead_id = Column(Integer, ForeignKey("leads.id"))
@@ -54,11 +59,16 @@ class Message(Base):
     content = Column(Text)
     sent = Column(DateTime)
     created_at = Column(DateTime, default=datetime.utcnow)
+    prompt_version = Column(String)  # prompts.py key, or "template@v1" when no LLM was used
     
     lead = relationship("Lead", back_populates="messages")
 
 class Activity(Base):
     __tablename__ = "activities"
+    __table_args__ = (
+        # Backs the per-lead timeline: WHERE lead_id = ? ORDER BY timestamp DESC
+        Index("ix_activities_lead_id_timestamp", "lead_id", "timestamp"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     lead_id = Column(Integer, ForeignKey("leads.id"))
@@ -67,4 +77,98 @@ class Activity(Base):
     timestamp = Column(DateTime, default=datetime.utcnow)
     notes = Column(Text)
     
-    lead = relationship("Lead", back_populates="activities")
\ No newline at end of file
+    lead = relationship("Lead", back_populates="activities")
+
+class LeadVersion(Base):
+    """Write counter per lead; lets every process invalidate cached lead reads"""
+    __tablename__ = "lead_versions"
+
+    lead_id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, index=True)
+
+class PendingDraft(Base):
+    """Speculatively generated next message for a lead, consumed by generate-message"""
+    __tablename__ = "pending_drafts"
+
+    lead_id = Column(Integer, ForeignKey("leads.id"), primary_key=True)
+    message_type = Column(String, nullable=False)
+    fingerprint = Column(String, nullable=False)  # hash of the lead inputs the draft was written from
+    payload = Column(Text, nullable=False)  # JSON of the generated message
+    created_at = Column(DateTime, default=datetime.utcnow)
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+class MessageSignature(Base):
+    """MinHash signature of a message (see near_duplicates.py)"""
+    __tablename__ = "message_signatures"
+
+    message_id = Column(Integer, ForeignKey("messages.id"), primary_key=True)
+    signature = Column(LargeBinary, nullable=False)
+
+class MessageBand(Base):
+    """LSH bucket of one signature band; equal buckets mark candidate near-duplicates"""
+    __tablename__ = "message_lsh_bands"
+    __table_args__ = (
+        Index("ix_message_lsh_bands_band_bucket", "band", "bucket"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    band = Column(Integer, nullable=False)
+    bucket = Column(Integer, nullable=False)
+    message_id = Column(Integer, ForeignKey("messages.id"), nullable=False, index=True)
+
+class FollowUp(Base):
+    """One scheduled follow-up touch for a lead (see follow_ups.py)"""
+    __tablename__ = "follow_ups"
+    __table_args__ = (
+        # The due-time queue: WHERE status = 'scheduled' AND due_at <= ? ORDER BY due_at
+        Index("ix_follow_ups_status_due_at", "status", "due_at"),
+        # The lead's scheduled touch, replaced on every send and stage change
+        Index("ix_follow_ups_lead_id_status", "lead_id", "status"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    lead_id = Column(Integer, ForeignKey("leads.id"), nullable=False)
+    message_id = Column(Integer, ForeignKey("messages.id"))  # the message being followed up
+    message_type = Column(String, nullable=False)  # what to generate when due
+    touch = Column(Integer, nullable=False, default=1)  # 1 = first follow-up after a manual send
+    status = Column(String, nullable=False, default="scheduled")  # scheduled, dispatched, done, cancelled, failed
+    due_at = Column(DateTime, nullable=False)
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text)
+    dispatched_at = Column(DateTime)
+    completed_at = Column(DateTime)
+    result_message_id = Column(Integer, ForeignKey("messages.id"))
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class Job(Base):
+    """Durable background job consumed by worker processes (see jobs.py)"""
+    __tablename__ = "jobs"
+    __table_args__ = (
+        # The claim query: WHERE status = 'queued' AND run_after <= ? ORDER BY priority, run_after
+        Index("ix_jobs_status_priority_run_after", "status", "priority", "run_after"),
+        # Expired leases of crashed workers
+        Index("ix_jobs_status_lease_expires_at", "status", "lease_expires_at"),
+        # At most one live job per dedupe key, e.g. one pending rescore per lead
+        Index(
+            "ux_jobs_active_dedupe_key", "dedupe_key", unique=True,
+            sqlite_where=text("status IN ('queued', 'running') AND dedupe_key IS NOT NULL")
+        ),
+    )
+
+    id = Column(Integer, primary_key=True)
+    kind = Column(String, nullable=False)  # score_lead, generate_message
+    payload = Column(Text, nullable=False, default="{}")  # JSON
+    status = Column(String, nullable=False, default="queued")  # queued, running, done, dead
+    priority = Column(Integer, nullable=False, default=0)  # lower runs first
+    dedupe_key = Column(String)
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=5)
+    run_after = Column(DateTime, nullable=False, default=datetime.utcnow)
+    locked_by = Column(String)  # worker id holding the lease
+    lease_expires_at = Column(DateTime)
+    heartbeat_at = Column(DateTime)
+    last_error = Column(Text)
+    result = Column(Text)  # JSON
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
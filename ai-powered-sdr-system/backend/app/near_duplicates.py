@@ -0,0 +1,265 @@
+# backend/app/near_duplicates.py
+"""MinHash signatures with an LSH banding index for near-duplicate messages"""
+
+import hashlib
+import random
+import re
+from array import array
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import event, insert, select, func
+from sqlalchemy.orm import Session
+
+from . import models
+
+NUM_PERM = 128
+BANDS = 16
+ROWS = NUM_PERM // BANDS  # 8 rows per band: pairs around 0.7 Jaccard start colliding
+SHINGLE_SIZE = 3
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 61) - 1
+
+# Fixed seed: signatures are stored, so every process must use the same permutations
+_rng = random.Random(20240611)
+PERMUTATIONS = [(_rng.randrange(1, MERSENNE_PRIME), _rng.randrange(0, MERSENNE_PRIME)) for _ in range(NUM_PERM)]
+
+WORD_RE = re.compile(r"[a-z0-9']+")
+
+
+def shingle_hashes(text: str) -> List[int]:
+    """64-bit hashes of the word 3-grams in a message"""
+    words = WORD_RE.findall((text or "").lower())
+    if len(words) < SHINGLE_SIZE:
+        shingles = {" ".join(words)} if words else set()
+    else:
+        shingles = {" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+    return [
+        int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "little")
+        for shingle in shingles
+    ]
+
+
+@lru_cache(maxsize=8192)
+def _permuted(shingle_hash: int) -> array:
+    """One shingle's value under every permutation (~1KB each)"""
+    return array("Q", [(a * shingle_hash + b) % MERSENNE_PRIME for a, b in PERMUTATIONS])
+
+
+def minhash(text: str) -> array:
+    """MinHash signature: the minimum of each permutation over all shingle hashes.
+
+    Messages rendered from the same template share most of their shingles,
+    so each shingle's permuted values are cached and the signature is the
+    element-wise minimum of those vectors.
+    """
+    return minhash_from_hashes(shingle_hashes(text))
+
+
+def minhash_from_hashes(hashes, base: Optional[array] = None) -> array:
+    """Signature of a set of shingle hashes.
+
+    `base` is the signature of shingles already known to be in the set, so
+    callers signing many messages from one template only fold in the
+    shingles that differ.
+    """
+    vectors = [_permuted(h) for h in hashes]
+    if base is not None:
+        vectors.append(base)
+    if not vectors:
+        return array("Q", [MAX_HASH] * NUM_PERM)
+    if len(vectors) == 1:
+        return array("Q", vectors[0])
+    return array("Q", map(min, *vectors))
+
+
+def band_buckets(signature: array) -> List[int]:
+    """One bucket key per band; messages sharing any bucket are candidates"""
+    buckets = []
+    for band in range(BANDS):
+        chunk = signature[band * ROWS:(band + 1) * ROWS].tobytes()
+        buckets.append(int.from_bytes(hashlib.blake2b(chunk, digest_size=8).digest(), "little", signed=True))
+    return buckets
+
+
+def estimate_similarity(a: array, b: array) -> float:
+    """Estimated Jaccard similarity of two signatures"""
+    return sum(1 for x, y in zip(a, b) if x == y) / NUM_PERM
+
+
+def message_text(subject: Optional[str], content: Optional[str]) -> str:
+    return f"{subject or ''}\n{content or ''}"
+
+
+def _signature_rows(message_id: int, subject: Optional[str], content: Optional[str]):
+    signature = minhash(message_text(subject, content))
+    signature_row = {"message_id": message_id, "signature": signature.tobytes()}
+    band_rows = [
+        {"band": band, "bucket": bucket, "message_id": message_id}
+        for band, bucket in enumerate(band_buckets(signature))
+    ]
+    return signature_row, band_rows
+
+
+@event.listens_for(models.Message, "after_insert")
+def _index_new_message(mapper, connection, target):
+    """Sign every message once, in the same transaction that inserts it"""
+    signature_row, band_rows = _signature_rows(target.id, target.subject, target.content)
+    connection.execute(insert(models.MessageSignature), [signature_row])
+    connection.execute(insert(models.MessageBand), band_rows)
+
+
+def backfill_signatures(engine, batch_size: int = 500) -> int:
+    """Sign messages written before the index existed; returns how many"""
+    total = 0
+    while True:
+        with engine.begin() as conn:
+            rows = conn.execute(
+                select(models.Message.id, models.Message.subject, models.Message.content)
+                .outerjoin(models.MessageSignature, models.MessageSignature.message_id == models.Message.id)
+                .where(models.MessageSignature.message_id.is_(None))
+                .limit(batch_size)
+            ).all()
+            if not rows:
+                return total
+
+            signature_rows, band_rows = [], []
+            for row in rows:
+                signature_row, bands = _signature_rows(row.id, row.subject, row.content)
+                signature_rows.append(signature_row)
+                band_rows.extend(bands)
+            conn.execute(insert(models.MessageSignature), signature_rows)
+            conn.execute(insert(models.MessageBand), band_rows)
+            total += len(rows)
+
+
+def _load_signatures(db: Session, message_ids) -> Dict[int, array]:
+    signatures = {}
+    for message_id, blob in db.execute(
+        select(models.MessageSignature.message_id, models.MessageSignature.signature)
+        .where(models.MessageSignature.message_id.in_(message_ids))
+    ):
+        signature = array("Q")
+        signature.frombytes(blob)
+        signatures[message_id] = signature
+    return signatures
+
+
+def _message_summaries(db: Session, message_ids) -> Dict[int, Dict[str, Any]]:
+    rows = db.execute(
+        select(
+            models.Message.id,
+            models.Message.lead_id,
+            models.Message.message_type,
+            models.Message.subject,
+            models.Message.created_at
+        )
+        .join(models.Lead, models.Lead.id == models.Message.lead_id)
+        .where(models.Message.id.in_(message_ids), models.Lead.is_deleted == False)
+    ).all()
+    return {row.id: dict(row._asdict()) for row in rows}
+
+
+def find_similar_messages(db: Session, message_id: int, threshold: float = 0.7, limit: int = 20) -> Optional[List[Dict[str, Any]]]:
+    """Messages estimated at least `threshold` similar; None if the message is not indexed.
+
+    Only messages sharing an LSH bucket are looked at, through the
+    (band, bucket) index, so the cost depends on the number of candidates
+    rather than on the size of the table.
+    """
+    target = _load_signatures(db, [message_id]).get(message_id)
+    if target is None:
+        return None
+
+    own_buckets = select(models.MessageBand.band, models.MessageBand.bucket).where(
+        models.MessageBand.message_id == message_id
+    ).subquery()
+    candidate_ids = db.execute(
+        select(models.MessageBand.message_id)
+        .join(own_buckets, (models.MessageBand.band == own_buckets.c.band) & (models.MessageBand.bucket == own_buckets.c.bucket))
+        .where(models.MessageBand.message_id != message_id)
+        .distinct()
+    ).scalars().all()
+    if not candidate_ids:
+        return []
+
+    signatures = _load_signatures(db, candidate_ids)
+    scored = []
+    for candidate_id, signature in signatures.items():
+        similarity = estimate_similarity(target, signature)
+        if similarity >= threshold:
+            scored.append((similarity, candidate_id))
+    scored.sort(reverse=True)
+
+    summaries = _message_summaries(db, [candidate_id for _, candidate_id in scored])
+    results = []
+    for similarity, candidate_id in scored:
+        if candidate_id in summaries:
+            results.append({**summaries[candidate_id], "similarity": round(similarity, 3)})
+            if len(results) >= limit:
+                break
+    return results
+
+
+def find_near_duplicate_clusters(db: Session, threshold: float = 0.7, min_cluster_size: int = 2, limit: int = 50) -> Dict[str, Any]:
+    """Groups of messages that are near-copies of each other.
+
+    Candidate pairs come only from shared LSH buckets. Each bucket member is
+    verified against the bucket's first member rather than against every
+    other member, so a bucket of n messages costs n comparisons, not n^2.
+    """
+    buckets = db.execute(
+        select(func.group_concat(models.MessageBand.message_id))
+        .group_by(models.MessageBand.band, models.MessageBand.bucket)
+        .having(func.count() > 1)
+    ).scalars().all()
+
+    member_lists = [[int(message_id) for message_id in bucket.split(",")] for bucket in buckets]
+    signatures = _load_signatures(db, {message_id for members in member_lists for message_id in members})
+
+    parent: Dict[int, int] = {}
+
+    def find(x: int) -> int:
+        while parent.setdefault(x, x) != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    compared = set()
+    for members in member_lists:
+        representative = members[0]
+        for other in members[1:]:
+            pair = (min(representative, other), max(representative, other))
+            if pair in compared:
+                continue
+            compared.add(pair)
+            if estimate_similarity(signatures[representative], signatures[other]) >= threshold:
+                parent[find(other)] = find(representative)
+
+    groups: Dict[int, List[int]] = {}
+    for message_id in parent:
+        groups.setdefault(find(message_id), []).append(message_id)
+
+    clusters = []
+    for members in groups.values():
+        if len(members) < min_cluster_size:
+            continue
+        summaries = _message_summaries(db, members)
+        if len(summaries) < min_cluster_size:
+            continue
+        messages = sorted(summaries.values(), key=lambda m: m["id"])
+        clusters.append({
+            "size": len(messages),
+            "lead_count": len({m["lead_id"] for m in messages}),
+            "subject": messages[0]["subject"],
+            "messages": messages
+        })
+    clusters.sort(key=lambda c: c["size"], reverse=True)
+
+    return {
+        "threshold": threshold,
+        "candidate_buckets": len(member_lists),
+        "comparisons": len(compared),
+        "cluster_count": len(clusters),
+        "clusters": clusters[:limit]
+    }
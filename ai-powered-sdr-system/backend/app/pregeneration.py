@@ -0,0 +1,212 @@
+# backend/app/pregeneration.py
+"""Speculative drafting of the next likely message after a stage change"""
+
+import hashlib
+import json
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from . import models
+from .database import ReadSessionLocal, run_write
+from .prompts import prompt_registry
+from .llm_scheduler import llm_priority
+
+# The message an SDR almost always sends next from each stage
+NEXT_MESSAGE_TYPE = {
+    "new": "initial_outreach",
+    "qualified": "initial_outreach",
+    "contacted": "follow_up",
+    "meeting": "value_proposition",
+    "negotiation": "problem_solution",
+    "closed_won": "casual_check_in",
+    "closed_lost": "casual_check_in"
+}
+
+# Lead attributes the generator reads; a change to any of them invalidates a draft
+FINGERPRINT_FIELDS = ("first_name", "last_name", "company", "job_title", "industry", "score", "notes", "pipeline_stage")
+
+
+def lead_fingerprint(lead: Any, message_type: str, mode: str) -> str:
+    """Hash of everything a generated message depends on"""
+    parts = {field: getattr(lead, field, None) for field in FINGERPRINT_FIELDS}
+    parts["message_type"] = message_type
+    parts["mode"] = mode
+    parts["prompts"] = prompt_registry.active_versions()
+    encoded = json.dumps(parts, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class Pregenerator:
+    """Draft the next message in the background when a lead changes stage.
+
+    `schedule()` is cheap and never blocks the request: it checks the hourly
+    budget and hands the lead to a small thread pool. The worker writes the
+    draft to `pending_drafts` with a fingerprint of the lead's inputs and an
+    expiry. `take()` atomically consumes a draft only if the fingerprint
+    still matches and it has not expired, so a lead edited after drafting
+    is always generated fresh. A lead scheduled again while its draft is
+    being written is drafted once more when that one finishes, since the
+    running draft will be discarded as stale.
+    """
+
+    def __init__(self, message_generator, lead_cache, max_workers: int = 2, ttl_seconds: int = 3600,
+                 max_per_hour: int = 100, max_pending: int = 50):
+        self.message_generator = message_generator
+        self.lead_cache = lead_cache
+        self.ttl = timedelta(seconds=ttl_seconds)
+        self.max_per_hour = max_per_hour
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="pregenerate")
+        self._lock = threading.Lock()
+        self._in_flight = set()
+        self._rerun = set()  # in-flight leads that changed again since their draft started
+        self._recent = deque()  # monotonic times of drafts started in the last hour
+        self.scheduled = 0
+        self.generated = 0
+        self.hits = 0
+        self.misses = 0
+        self.skipped_budget = 0
+        self.discarded_stale = 0
+
+    def schedule(self, lead_id: int) -> bool:
+        """Queue a draft for the lead's next message; False when over budget"""
+        with self._lock:
+            if lead_id in self._in_flight:
+                self._rerun.add(lead_id)
+                return True
+            if len(self._in_flight) >= self.max_pending or not self._reserve():
+                self.skipped_budget += 1
+                return False
+            self._in_flight.add(lead_id)
+        return self._submit(lead_id)
+
+    def _reserve(self) -> bool:
+        """Count a draft against the hourly budget; caller holds the lock"""
+        now = time.monotonic()
+        while self._recent and now - self._recent[0] > 3600:
+            self._recent.popleft()
+        if len(self._recent) >= self.max_per_hour:
+            return False
+        self._recent.append(now)
+        self.scheduled += 1
+        return True
+
+    def _submit(self, lead_id: int) -> bool:
+        try:
+            self._executor.submit(self._draft, lead_id)
+        except RuntimeError:
+            # Executor already shut down
+            with self._lock:
+                self._in_flight.discard(lead_id)
+                self._rerun.discard(lead_id)
+            return False
+        return True
+
+    def take(self, db: Session, lead: Any, message_type: str) -> Optional[Dict[str, Any]]:
+        """Consume a fresh matching draft, or None"""
+        fingerprint = lead_fingerprint(lead, message_type, self.message_generator.mode)
+        matches = (
+            models.PendingDraft.lead_id == lead.id,
+            models.PendingDraft.message_type == message_type,
+            models.PendingDraft.fingerprint == fingerprint,
+            models.PendingDraft.expires_at > datetime.utcnow()
+        )
+        # Look before deleting: a DELETE takes the write lock even when it
+        # matches nothing, and on a miss the caller's session stays open
+        # through the LLM call. A hit is consumed in its own short write
+        row = None
+        if db.execute(select(models.PendingDraft.lead_id).where(*matches).limit(1)).first() is not None:
+            row = run_write(lambda write_db: write_db.execute(
+                delete(models.PendingDraft).where(*matches).returning(models.PendingDraft.payload)
+            ).first())
+
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        message = json.loads(row.payload)
+        message["pregenerated"] = True
+        return message
+
+    def _draft(self, lead_id: int) -> None:
+        try:
+            db = ReadSessionLocal()
+            try:
+                lead = self.lead_cache.get(db, lead_id)
+            finally:
+                db.close()
+            message_type = NEXT_MESSAGE_TYPE.get(lead.pipeline_stage) if lead and not lead.is_deleted else None
+            if message_type is None:
+                return
+
+            mode = self.message_generator.mode
+            fingerprint = lead_fingerprint(lead, message_type, mode)
+            # Drafts are wanted soon but never ahead of a user's click
+            with llm_priority("near_real_time"):
+                message = self.message_generator.generate_message(lead, message_type)
+            if message.get("generation_mode") == "template":
+                # The LLM was unavailable; the template is instant at request time anyway
+                return
+            self.generated += 1
+
+            def store(db: Session):
+                # The lead may have changed while the LLM was writing
+                current = db.get(models.Lead, lead_id)
+                if current is None or lead_fingerprint(current, message_type, mode) != fingerprint:
+                    return False
+                now = datetime.utcnow()
+                db.execute(delete(models.PendingDraft).where(models.PendingDraft.expires_at <= now))
+                db.merge(models.PendingDraft(
+                    lead_id=lead_id,
+                    message_type=message_type,
+                    fingerprint=fingerprint,
+                    payload=json.dumps(message),
+                    created_at=now,
+                    expires_at=now + self.ttl
+                ))
+                return True
+
+            if not run_write(store):
+                self.discarded_stale += 1
+        except Exception as e:
+            print(f"Warning: Failed to pre-generate message for lead {lead_id}: {str(e)}")
+        finally:
+            with self._lock:
+                rerun = lead_id in self._rerun
+                self._rerun.discard(lead_id)
+                if rerun and not self._reserve():
+                    self.skipped_budget += 1
+                    rerun = False
+                if not rerun:
+                    self._in_flight.discard(lead_id)
+            if rerun:
+                self._submit(lead_id)
+
+    @property
+    def depth(self) -> int:
+        return len(self._in_flight)
+
+    def stop(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "scheduled": self.scheduled,
+            "in_flight": len(self._in_flight),
+            "generated": self.generated,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "skipped_budget": self.skipped_budget,
+            "discarded_stale": self.discarded_stale,
+            "budget_per_hour": self.max_per_hour,
+            "ttl_seconds": int(self.ttl.total_seconds())
+        }
@@ -0,0 +1,119 @@
+# backend/app/query_profiler.py
+"""Per-statement timing with automatic EXPLAIN QUERY PLAN capture for slow SQL"""
+
+import re
+import threading
+import time
+from functools import lru_cache
+from typing import Any, Dict, List
+
+from sqlalchemy import event
+
+SKIP_EXPLAIN_PREFIXES = ("PRAGMA", "BEGIN", "COMMIT", "ROLLBACK", "SAVEPOINT", "RELEASE", "EXPLAIN", "CREATE", "DROP", "ALTER")
+
+
+@lru_cache(maxsize=2048)
+def normalize_sql(statement: str) -> str:
+    """Reduce a statement to its shape so different parameters aggregate together"""
+    shape = re.sub(r"'(?:[^']|'')*'", "?", statement)
+    shape = re.sub(r"\b\d+(?:\.\d+)?\b", "?", shape)
+    # IN (?, ?, ?, ...) of any length is the same query
+    shape = re.sub(r"\(\s*\?(?:\s*,\s*\?)+\s*\)", "(?...)", shape)
+    return re.sub(r"\s+", " ", shape).strip()
+
+
+def is_full_scan(detail: str) -> bool:
+    """True for a plan step that reads a whole table without an index"""
+    if not detail.startswith("SCAN ") or "USING" in detail or "VIRTUAL TABLE" in detail:
+        return False
+    # Scans of materialized subqueries and constant rows are not table scans
+    return not detail.startswith(("SCAN (", "SCAN CONSTANT ROW"))
+
+
+class QueryProfiler:
+    """Aggregate SQL timings by statement shape.
+
+    Hooks the engine's cursor events, so every statement issued through
+    SQLAlchemy (ORM or Core) is timed. The first time a shape runs slower than
+    the threshold its query plan is captured and full table scans are flagged.
+    """
+
+    def __init__(self, slow_threshold_ms: float = 25.0, max_shapes: int = 1000):
+        self.slow_threshold_ms = slow_threshold_ms
+        self.max_shapes = max_shapes
+        self._stats: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def attach(self, engine) -> None:
+        event.listen(engine, "before_cursor_execute", self._before_execute)
+        event.listen(engine, "after_cursor_execute", self._after_execute)
+
+    def _before_execute(self, conn, cursor, statement, parameters, context, executemany):
+        # On the execution context rather than the connection, so a statement
+        # that raises leaves nothing behind for the next one to pick up
+        context._profiler_start = time.perf_counter()
+
+    def _after_execute(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed_ms = (time.perf_counter() - context._profiler_start) * 1000
+        shape = normalize_sql(statement)
+
+        with self._lock:
+            stats = self._stats.get(shape)
+            if stats is None:
+                if len(self._stats) >= self.max_shapes:
+                    return
+                stats = self._stats[shape] = {
+                    "sql": shape,
+                    "count": 0,
+                    "total_ms": 0.0,
+                    "max_ms": 0.0,
+                    "slow_count": 0,
+                    "plan": None,
+                    "full_scan": False
+                }
+            stats["count"] += 1
+            stats["total_ms"] += elapsed_ms
+            stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+            slow = elapsed_ms >= self.slow_threshold_ms
+            if slow:
+                stats["slow_count"] += 1
+            needs_plan = slow and stats["plan"] is None
+
+        if needs_plan and conn.dialect.name == "sqlite":
+            self._capture_plan(stats, cursor, statement, parameters, executemany)
+
+    def _capture_plan(self, stats, cursor, statement, parameters, executemany) -> None:
+        if statement.lstrip().upper().startswith(SKIP_EXPLAIN_PREFIXES):
+            return
+        if executemany:
+            parameters = parameters[0] if parameters else ()
+
+        try:
+            plan_cursor = cursor.connection.cursor()
+            try:
+                plan_cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters or ())
+                details = [row[-1] for row in plan_cursor.fetchall()]
+            finally:
+                plan_cursor.close()
+        except Exception as e:
+            details = [f"plan unavailable: {e}"]
+
+        with self._lock:
+            stats["plan"] = details
+            stats["full_scan"] = any(is_full_scan(d) for d in details)
+
+    def snapshot(self, sort: str = "total_ms", limit: int = 50) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = [dict(stats) for stats in self._stats.values()]
+
+        for row in rows:
+            row["avg_ms"] = round(row["total_ms"] / row["count"], 3)
+            row["total_ms"] = round(row["total_ms"], 3)
+            row["max_ms"] = round(row["max_ms"], 3)
+
+        rows.sort(key=lambda row: row.get(sort, 0), reverse=True)
+        return rows[:limit]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
@@ -1,6 +1,6 @@
 # backend/app/schemas.py
 from pydantic import BaseModel, EmailStr
-from typing import Optional, List
+from typing import Any, Dict, Optional, List
 from datetime import datetime
 
 class LeadBase(BaseModel):
@@ -39,6 +39,7 @@ class Lead(LeadBase):
     id: int
     score: float
     score_reasoning: Optional[str] = None
+    score_prompt_version: Optional[str] = None
     pipeline_stage: str
     created_at: datetime
     updated_at: datetime
@@ -46,6 +47,41 @@ class Lead(LeadBase):
 class Config:
     from_attributes = True
 
+class Message(BaseModel):
+    id: int
+    lead_id: int
+    message_type: Optional[str] = None
+    subject: Optional[str] = None
+    content: Optional[str] = None
+    sent: Optional[datetime] = None
+    created_at: datetime
+    prompt_version: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+class Activity(BaseModel):
+    id: int
+    lead_id: int
+    activity_type: Optional[str] = None
+    description: Optional[str] = None
+    timestamp: datetime
+    notes: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+class ActivityPage(BaseModel):
+    items: List[Activity]
+    has_more: bool
+    offset: int
+    limit: int
+
+class LeadDetail(BaseModel):
+    lead: Lead
+    messages: List[Message]
+    activities: ActivityPage
+
 class ScoringCriteria(BaseModel):
     company_size_weight: float = 0.25
     job_title_weight: float = 0.25
@@ -61,4 +97,14 @@ class StageUpdate(BaseModel):
 
 class MessageRequest(BaseModel):
     message_type: str = "initial_outreach"
-    custom_context: Optional[str] = None
\ No newline at end of file
+    custom_context: Optional[str] = None
+
+class MergeRequest(BaseModel):
+    duplicate_ids: List[int]
+
+class JobCreate(BaseModel):
+    kind: str
+    payload: Dict[str, Any] = {}
+    dedupe_key: Optional[str] = None
+    max_attempts: int = 5
+    delay_seconds: float = 0
@@ -0,0 +1,137 @@
+# backend/app/search.py
+"""SQLite FTS5 full-text search over leads and generated messages"""
+
+import html
+import re
+from typing import Any, Dict, List
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+# External-content FTS5 tables: the index stores only tokens, the text itself
+# stays in `leads` / `messages`. Triggers keep both sides in sync.
+LEAD_FTS_COLUMNS = ["first_name", "last_name", "company", "job_title", "notes"]
+MESSAGE_FTS_COLUMNS = ["subject", "content"]
+
+# bm25 column weights - a hit in the name or company outranks one in notes
+LEAD_RANK_WEIGHTS = "10.0, 10.0, 5.0, 3.0, 1.0"
+MESSAGE_RANK_WEIGHTS = "5.0, 1.0"
+
+# snippet() marks hits with private-use characters; the text around them is
+# raw lead/message content and is HTML-escaped before they become <mark> tags
+_HIT_START, _HIT_END = "\ue000", "\ue001"
+
+
+def _fts_ddl(table: str, columns: List[str]) -> List[str]:
+    fts = f"{table}_fts"
+    cols = ", ".join(columns)
+    new_cols = ", ".join(f"new.{c}" for c in columns)
+    old_cols = ", ".join(f"old.{c}" for c in columns)
+
+    return [
+        f"""CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5(
+            {cols}, content='{table}', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+        )""",
+        f"""CREATE TRIGGER IF NOT EXISTS {table}_fts_ai AFTER INSERT ON {table} BEGIN
+            INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_cols});
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS {table}_fts_ad AFTER DELETE ON {table} BEGIN
+            INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_cols});
+        END""",
+        # Only re-index when an indexed column changes, not on score/stage updates
+        f"""CREATE TRIGGER IF NOT EXISTS {table}_fts_au AFTER UPDATE OF {cols} ON {table} BEGIN
+            INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_cols});
+            INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_cols});
+        END""",
+    ]
+
+
+def init_search_index(engine) -> None:
+    """Create the FTS5 tables and sync triggers, backfilling existing rows once"""
+    if engine.dialect.name != "sqlite":
+        return
+
+    with engine.begin() as conn:
+        for table, columns in (("leads", LEAD_FTS_COLUMNS), ("messages", MESSAGE_FTS_COLUMNS)):
+            exists = conn.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                {"name": f"{table}_fts"}
+            ).first()
+
+            for statement in _fts_ddl(table, columns):
+                conn.execute(text(statement))
+
+            if not exists:
+                conn.execute(text(f"INSERT INTO {table}_fts({table}_fts) VALUES ('rebuild')"))
+
+
+def rebuild_search_index(engine) -> None:
+    """Rebuild both indexes from their content tables (after bulk loads)"""
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO leads_fts(leads_fts) VALUES ('rebuild')"))
+        conn.execute(text("INSERT INTO messages_fts(messages_fts) VALUES ('rebuild')"))
+
+
+def build_match_query(query: str, prefix: bool = True) -> str:
+    """Turn free text into a safe FTS5 MATCH expression.
+
+    Every token is quoted so user input can never inject FTS syntax; with
+    prefix matching the last token also matches as a prefix ("tech" -> TechCorp).
+    """
+    terms = re.findall(r"\w+", query, flags=re.UNICODE)
+    if not terms:
+        return ""
+
+    quoted = [f'"{term}"' for term in terms]
+    if prefix:
+        quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+def highlight_snippet(snippet: str) -> str:
+    """Escape a snippet for HTML, then wrap its hits in <mark> tags"""
+    return html.escape(snippet).replace(_HIT_START, "<mark>").replace(_HIT_END, "</mark>")
+
+
+def _with_highlight(row) -> Dict[str, Any]:
+    result = dict(row)
+    if result["snippet"] is not None:
+        result["snippet"] = highlight_snippet(result["snippet"])
+    return result
+
+
+def search_leads(db: Session, match: str, limit: int = 20) -> List[Dict[str, Any]]:
+    rows = db.execute(
+        text(f"""
+            SELECT l.id, l.first_name, l.last_name, l.company, l.job_title,
+                   l.pipeline_stage, l.score,
+                   bm25(leads_fts, {LEAD_RANK_WEIGHTS}) AS rank,
+                   snippet(leads_fts, -1, :hit_start, :hit_end, '…', 12) AS snippet
+            FROM leads_fts
+            JOIN leads l ON l.id = leads_fts.rowid
+            WHERE leads_fts MATCH :match AND l.is_deleted = 0
+            ORDER BY rank
+            LIMIT :limit
+        """),
+        {"match": match, "limit": limit, "hit_start": _HIT_START, "hit_end": _HIT_END}
+    ).mappings()
+    return [_with_highlight(row) for row in rows]
+
+
+def search_messages(db: Session, match: str, limit: int = 20) -> List[Dict[str, Any]]:
+    rows = db.execute(
+        text(f"""
+            SELECT m.id, m.lead_id, m.message_type, m.subject,
+                   bm25(messages_fts, {MESSAGE_RANK_WEIGHTS}) AS rank,
+                   snippet(messages_fts, -1, :hit_start, :hit_end, '…', 16) AS snippet
+            FROM messages_fts
+            JOIN messages m ON m.id = messages_fts.rowid
+            JOIN leads l ON l.id = m.lead_id
+            WHERE messages_fts MATCH :match AND l.is_deleted = 0
+            ORDER BY rank
+            LIMIT :limit
+        """),
+        {"match": match, "limit": limit, "hit_start": _HIT_START, "hit_end": _HIT_END}
+    ).mappings()
+    return [_with_highlight(row) for row in rows]
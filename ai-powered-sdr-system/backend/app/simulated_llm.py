@@ -0,0 +1,122 @@
+# backend/app/simulated_llm.py
+"""Offline stand-in for the Grok API, for load tests and benchmarks"""
+
+import hashlib
+import json
+import os
+import random
+import time
+from typing import Any, Dict, Optional
+
+from .grok_client import GrokClient
+from .prompts import PROMPT_DEFINITIONS
+
+# Registry prompts are recognized by their static system message
+_PROMPTS_BY_SYSTEM = {definition.system: definition.name for definition in PROMPT_DEFINITIONS}
+
+SENIOR_TITLES = ("CEO", "CTO", "CFO", "COO", "VP", "Director", "Head of")
+TARGET_INDUSTRIES = ("Technology", "Finance", "Healthcare", "SaaS", "Enterprise Software")
+TARGET_SIZES = ("50-200", "200-500", "500-1000")
+
+
+def _stable_jitter(text: str, spread: int) -> int:
+    digest = hashlib.blake2b(text.encode("utf-8"), digest_size=2).digest()
+    return int.from_bytes(digest, "little") % (2 * spread + 1) - spread
+
+
+def _input_payload(messages: list) -> Dict[str, Any]:
+    """The JSON tail a registry prompt appends after "Input:" """
+    content = messages[-1]["content"] if messages else ""
+    _, _, tail = content.rpartition("Input:\n")
+    try:
+        return json.loads(tail)
+    except ValueError:
+        return {}
+
+
+class SimulatedGrokClient(GrokClient):
+    """Answers chat completions locally with realistic timing.
+
+    Latency is log-normally distributed around `latency_ms`, a fraction
+    `error_rate` of calls fail like an upstream 503, and answers are
+    deterministic per lead so repeated runs are comparable. Configure with
+    SIMULATED_LLM_LATENCY_MS / SIMULATED_LLM_ERROR_RATE / SIMULATED_LLM_SEED.
+    """
+
+    def __init__(self, latency_ms: Optional[float] = None, error_rate: Optional[float] = None, seed: Optional[int] = None):
+        super().__init__(api_key="simulated")
+        self.latency_ms = latency_ms if latency_ms is not None else float(os.getenv("SIMULATED_LLM_LATENCY_MS", "800"))
+        self.error_rate = error_rate if error_rate is not None else float(os.getenv("SIMULATED_LLM_ERROR_RATE", "0"))
+        self._random = random.Random(seed if seed is not None else int(os.getenv("SIMULATED_LLM_SEED", "7")))
+
+    def test_connection(self) -> bool:
+        return True
+
+    def chat_completion(self, messages: list, temperature: float = 0.7, max_tokens: int = 1000) -> Dict[str, Any]:
+        self._local.usage = None
+        if self.latency_ms > 0:
+            # sigma 0.5 gives the long right tail real completions have
+            time.sleep(self._random.lognormvariate(0, 0.5) * self.latency_ms / 1000 / 1.133)
+        if self._random.random() < self.error_rate:
+            return {"error": "API request failed with status 503", "details": "simulated upstream error"}
+
+        prompt_name = _PROMPTS_BY_SYSTEM.get(messages[0]["content"]) if messages else None
+        payload = _input_payload(messages)
+        answer = self._answer(prompt_name, payload)
+        content = json.dumps(answer)
+
+        prompt_chars = sum(len(m.get("content", "")) for m in messages)
+        usage = {
+            "prompt_tokens": prompt_chars // 4,
+            "completion_tokens": min(len(content) // 4, max_tokens),
+        }
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        self._local.usage = usage
+        return {"choices": [{"message": {"role": "assistant", "content": content}}], "usage": usage}
+
+    def _answer(self, prompt_name: Optional[str], payload: Dict[str, Any]) -> Dict[str, Any]:
+        lead = payload.get("lead") or {}
+        name = (lead.get("name") or "there").split(" ")[0] or "there"
+        company = lead.get("company") or "your company"
+
+        if prompt_name == "lead_scoring":
+            title = lead.get("job_title") or ""
+            score = 40
+            strengths, weaknesses = [], []
+            if any(t in title for t in SENIOR_TITLES):
+                score += 25
+                strengths.append("Senior decision-maker")
+            else:
+                weaknesses.append("Limited buying authority")
+            if lead.get("industry") in TARGET_INDUSTRIES:
+                score += 15
+                strengths.append("Target industry")
+            if lead.get("company_size") in TARGET_SIZES:
+                score += 10
+                strengths.append("Ideal company size")
+            score = max(0, min(100, score + _stable_jitter(lead.get("email") or company, 5)))
+            action = "high_priority" if score >= 80 else "medium_priority" if score >= 50 else "low_priority"
+            return {
+                "score": score,
+                "reasoning": f"{title or 'Unknown role'} at {company}; fit assessed on title, industry and size.",
+                "strengths": strengths,
+                "weaknesses": weaknesses,
+                "recommended_action": action
+            }
+
+        if prompt_name == "message_personalization":
+            return {
+                "opener": f"I've been following what {company} is building, {name}.",
+                "hook": f"Teams like yours at {company} use automation to spend more time on deals that close."
+            }
+
+        if prompt_name in ("message_full", "message_tune"):
+            return {
+                "subject": f"An idea for {company}, {name}",
+                "content": f"Hi {name},\n\nI wanted to share how {company} could qualify leads 3x faster.\n\nWould a short call next week make sense?\n\nBest regards,\n[Your Name]",
+                "key_points": ["3x faster qualification", "40% higher conversion"],
+                "follow_up_timing": 3
+            }
+
+        # Ad-hoc analyze_json callers
+        return {"score": 50, "content": f"Hi {name}, a note for {company}.", "reasoning": "simulated"}
@@ -0,0 +1,238 @@
+# backend/app/token_budget.py
+"""Hourly and daily LLM token / cost budgets with priority-aware degradation"""
+
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from .llm_scheduler import current_priority
+from .metrics import metrics_registry
+
+WINDOWS = {"hour": 3600, "day": 86400}
+METERS = ("tokens", "cost")
+# Most to least severe
+STATUSES = ("exhausted", "near_real_time_throttled", "batch_throttled", "ok")
+class Reservation:
+    """Worst-case spend held against the budgets while a call is in flight"""
+
+    def __init__(self, call_site: str, tokens: int = 0, cost: float = 0.0,
+                 buckets: Optional[Dict[str, int]] = None, denied: Optional[str] = None):
+        self.call_site = call_site
+        self.tokens = tokens
+        self.cost = cost
+        self.buckets = buckets or {}
+        self.denied = denied
+
+
+class TokenBudget:
+    """Enforce token and cost limits per hour and per day, globally and per call site.
+
+    Limits are fixed UTC windows keyed by scope ("global" or a call site
+    such as "lead_scoring"). Before a completion, `reserve()` holds the
+    worst case (prompt estimate + max_tokens), so concurrent calls cannot
+    all slip in under the limit. `settle()` then swaps the hold for the
+    usage the provider reported.
+
+    Each priority class (see llm_scheduler) stops once less than its
+    reserve of an applicable limit is left. Batch work goes first, then
+    near-real-time, and interactive calls may spend down to
+    `interactive_reserve`.
+    Callers see a denial as an error result and take their local fallback
+    path: the rule-based scorer, or templates for messages.
+    """
+
+    def __init__(self, limits: Optional[Dict[str, Dict[Tuple[str, str], float]]] = None,
+                 input_price_per_mtok: float = 3.0, output_price_per_mtok: float = 15.0,
+                 batch_reserve: float = 0.25, near_real_time_reserve: float = 0.1, interactive_reserve: float = 0.0):
+        self.limits = limits or {}
+        self.input_price = input_price_per_mtok / 1e6
+        self.output_price = output_price_per_mtok / 1e6
+        self.reserves = {"batch": batch_reserve, "near_real_time": near_real_time_reserve, "interactive": interactive_reserve}
+        # (scope, window) -> {"bucket", "tokens", "cost", "held_tokens", "held_cost"}
+        self._usage: Dict[Tuple[str, str], Dict[str, float]] = {}
+        self._denied: Dict[Tuple[str, str], int] = {}
+        # call site -> (tokens, cost) of its latest reservation, the estimate allows() checks
+        self._typical: Dict[str, Tuple[int, float]] = {}
+        self._lock = threading.Lock()
+
+    def cost(self, prompt_tokens: int, completion_tokens: int) -> float:
+        return prompt_tokens * self.input_price + completion_tokens * self.output_price
+
+    def _entry(self, scope: str, window: str, now: float) -> Dict[str, float]:
+        bucket = int(now // WINDOWS[window])
+        entry = self._usage.get((scope, window))
+        if entry is None or entry["bucket"] != bucket:
+            entry = self._usage[(scope, window)] = {
+                "bucket": bucket, "tokens": 0, "cost": 0.0, "held_tokens": 0, "held_cost": 0.0
+            }
+        return entry
+
+    def _check(self, call_site: str, priority: str, tokens: int, cost: float, now: float) -> Optional[str]:
+        reserve = self.reserves.get(priority, 0.0)
+        for scope in ("global", call_site):
+            for (meter, window), limit in self.limits.get(scope, {}).items():
+                entry = self._entry(scope, window, now)
+                spent = entry[meter] + entry[f"held_{meter}"] + (tokens if meter == "tokens" else cost)
+                if limit - spent < reserve * limit:
+                    return f"{scope} {meter} per {window}"
+        return None
+
+    def reserve(self, call_site: str, messages: list, max_tokens: int) -> Reservation:
+        """Hold the worst-case spend of a completion, or return a denied reservation"""
+        prompt_tokens = sum(len(m.get("content", "")) for m in messages) // 4
+        tokens = prompt_tokens + max_tokens
+        cost = self.cost(prompt_tokens, max_tokens)
+        priority = current_priority()
+        now = time.time()
+
+        with self._lock:
+            self._typical[call_site] = (tokens, cost)
+            denied = self._check(call_site, priority, tokens, cost, now)
+            if denied:
+                key = (call_site, priority)
+                self._denied[key] = self._denied.get(key, 0) + 1
+                BUDGET_DENIED.inc(call_site, priority)
+                return Reservation(call_site, denied=denied)
+
+            buckets = {}
+            for scope in ("global", call_site):
+                for window in WINDOWS:
+                    entry = self._entry(scope, window, now)
+                    entry["held_tokens"] += tokens
+                    entry["held_cost"] += cost
+                    buckets[window] = entry["bucket"]
+            return Reservation(call_site, tokens, cost, buckets)
+
+    def settle(self, reservation: Reservation, usage: Optional[Dict[str, int]]) -> None:
+        """Release the hold and charge what the provider reported (nothing on failure)"""
+        if reservation.denied:
+            return
+        prompt_tokens = (usage or {}).get("prompt_tokens") or 0
+        completion_tokens = (usage or {}).get("completion_tokens") or 0
+        cost = self.cost(prompt_tokens, completion_tokens)
+        now = time.time()
+
+        with self._lock:
+            for scope in ("global", reservation.call_site):
+                for window in WINDOWS:
+                    entry = self._entry(scope, window, now)
+                    # A hold from a window that has since rolled over went with it
+                    if entry["bucket"] == reservation.buckets.get(window):
+                        entry["held_tokens"] -= reservation.tokens
+                        entry["held_cost"] -= reservation.cost
+                    entry["tokens"] += prompt_tokens + completion_tokens
+                    entry["cost"] += cost
+
+    def allows(self, call_site: str, priority: Optional[str] = None) -> bool:
+        """Would a call like the call site's last one be let through at this priority?"""
+        with self._lock:
+            tokens, cost = self._typical.get(call_site, (0, 0.0))
+            return self._check(call_site, priority or current_priority(), tokens, cost, time.time()) is None
+
+    def remaining(self) -> List[Dict[str, Any]]:
+        now = time.time()
+        rows = []
+        with self._lock:
+            for scope, limits in sorted(self.limits.items()):
+                for (meter, window), limit in sorted(limits.items()):
+                    entry = self._entry(scope, window, now)
+                    used, held = entry[meter], entry[f"held_{meter}"]
+                    remaining = max(limit - used - held, 0)
+                    fraction = remaining / limit if limit else 0.0
+                    # Status reflects what _check() would decide for a typical call
+                    sites = [scope] if scope != "global" else list(self._typical)
+                    typical = max((self._typical[site][METERS.index(meter)] for site in sites if site in self._typical), default=0)
+                    after = (remaining - typical) / limit if limit else 0.0
+                    if after < self.reserves["interactive"]:
+                        status = "exhausted"
+                    elif after < self.reserves["near_real_time"]:
+                        status = "near_real_time_throttled"
+                    elif after < self.reserves["batch"]:
+                        status = "batch_throttled"
+                    else:
+                        status = "ok"
+                    rows.append({
+                        "scope": scope,
+                        "meter": meter,
+                        "window": window,
+                        "limit": limit,
+                        "used": round(used, 6),
+                        "in_flight": round(held, 6),
+                        "remaining": round(remaining, 6),
+                        "remaining_fraction": round(fraction, 4),
+                        "resets_in_seconds": int((entry["bucket"] + 1) * WINDOWS[window] - now),
+                        "status": status
+                    })
+        return rows
+
+    def stats(self) -> Dict[str, Any]:
+        budgets = self.remaining()
+        statuses = {row["status"] for row in budgets}
+        now = time.time()
+        with self._lock:
+            usage: Dict[str, Dict[str, Any]] = {}
+            for (scope, window), entry in sorted(self._usage.items()):
+                if entry["bucket"] == int(now // WINDOWS[window]):
+                    usage.setdefault(scope, {})[window] = {"tokens": entry["tokens"], "cost": round(entry["cost"], 6)}
+            denied = [
+                {"call_site": call_site, "priority": priority, "count": count}
+                for (call_site, priority), count in sorted(self._denied.items())
+            ]
+        return {
+            "status": next((s for s in STATUSES if s in statuses), "ok"),
+            "reserves": self.reserves,
+            "prices_per_mtok": {"input": self.input_price * 1e6, "output": self.output_price * 1e6},
+            "budgets": budgets,
+            "usage": usage,
+            "denied": denied
+        }
+
+
+def _limit(name: str) -> float:
+    return float(os.getenv(name, "0") or 0)
+
+
+def limits_from_env() -> Dict[str, Dict[Tuple[str, str], float]]:
+    """Global LLM_BUDGET_{TOKENS,COST}_PER_{HOUR,DAY} plus per call site
+    LLM_BUDGET_CALL_SITES (e.g. "lead_scoring.tokens_per_day=200000,message_full.cost_per_hour=2").
+    Zero or unset means unlimited.
+    """
+    limits: Dict[str, Dict[Tuple[str, str], float]] = {}
+    for meter in METERS:
+        for window in WINDOWS:
+            value = _limit(f"LLM_BUDGET_{meter.upper()}_PER_{window.upper()}")
+            if value > 0:
+                limits.setdefault("global", {})[(meter, window)] = value
+
+    for item in os.getenv("LLM_BUDGET_CALL_SITES", "").split(","):
+        if "=" not in item:
+            continue
+        key, value = item.split("=", 1)
+        call_site, _, budget = key.strip().rpartition(".")
+        meter, _, window = budget.partition("_per_")
+        if not call_site or meter not in METERS or window not in WINDOWS:
+            raise ValueError(f"Unknown LLM budget '{key.strip()}'")
+        if float(value) > 0:
+            limits.setdefault(call_site, {})[(meter, window)] = float(value)
+    return limits
+
+
+BUDGET_DENIED = metrics_registry.counter(
+    "sdr_llm_budget_denied_total", "LLM calls refused by the token budget", ("call_site", "priority"))
+
+token_budget = TokenBudget(
+    limits_from_env(),
+    input_price_per_mtok=float(os.getenv("LLM_PRICE_INPUT_PER_MTOK", "3.0")),
+    output_price_per_mtok=float(os.getenv("LLM_PRICE_OUTPUT_PER_MTOK", "15.0")),
+    batch_reserve=float(os.getenv("LLM_BUDGET_BATCH_RESERVE", "0.25")),
+    near_real_time_reserve=float(os.getenv("LLM_BUDGET_NEAR_REAL_TIME_RESERVE", "0.1")),
+    interactive_reserve=float(os.getenv("LLM_BUDGET_INTERACTIVE_RESERVE", "0"))
+)
+
+metrics_registry.callback_gauge(
+    "sdr_llm_budget_remaining",
+    "Tokens or cost left in the current budget window",
+    lambda: {(row["scope"], row["meter"], row["window"]): row["remaining"] for row in token_budget.remaining()},
+    ("scope", "meter", "window")
+)
@@ -0,0 +1,424 @@
+# backend/app/tracing.py
+"""Request tracing: contextvar spans over HTTP, SQL and LLM calls with tail sampling"""
+
+import atexit
+import json
+import os
+import queue
+import random
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional
+
+import httpx
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from .metrics import route_template, statement_operation
+
+SERVICE_NAME = "sdr-api"
+TRACE_ID_HEADER = "x-trace-id"
+_TRACE_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+
+# OTLP span kinds
+KIND_INTERNAL, KIND_SERVER, KIND_CLIENT = 1, 2, 3
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+
+def _new_id(n_bytes: int) -> str:
+    return random.getrandbits(n_bytes * 8).to_bytes(n_bytes, "big").hex()
+
+
+class Trace:
+    """Spans of one request, collected until the root span ends"""
+
+    def __init__(self, trace_id: Optional[str] = None, max_spans: int = 2000):
+        self.trace_id = trace_id or _new_id(16)
+        self.max_spans = max_spans
+        self.spans: List["Span"] = []
+        self.dropped_spans = 0
+        self.has_error = False
+
+    def add(self, span: "Span") -> None:
+        # list.append is atomic, so spans ending on worker threads need no lock
+        if len(self.spans) < self.max_spans:
+            self.spans.append(span)
+        else:
+            self.dropped_spans += 1
+
+
+class Span:
+    def __init__(self, name: str, trace: Trace, parent_id: Optional[str] = None,
+                 attributes: Optional[Dict[str, Any]] = None, kind: int = KIND_INTERNAL):
+        self.name = name
+        self.trace = trace
+        self.span_id = _new_id(8)
+        self.parent_id = parent_id
+        self.kind = kind
+        self.attributes = dict(attributes) if attributes else {}
+        self.error: Optional[str] = None
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+
+    @property
+    def trace_id(self) -> str:
+        return self.trace.trace_id
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def set_error(self, error: Any) -> None:
+        self.error = str(error)[:500] or type(error).__name__
+        self.trace.has_error = True
+
+    def end(self) -> None:
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+            self.trace.add(self)
+
+
+class _NoopSpan:
+    """Returned outside a trace so call sites never need to check"""
+
+    trace_id = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def set_error(self, error: Any) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+@contextmanager
+def span(name: str, attributes: Optional[Dict[str, Any]] = None, kind: int = KIND_INTERNAL) -> Iterator[Any]:
+    """Child span of the current one; a no-op when no trace is active"""
+    parent = _current_span.get()
+    if parent is None:
+        yield NOOP_SPAN
+        return
+
+    child = Span(name, parent.trace, parent.span_id, attributes, kind)
+    token = _current_span.set(child)
+    try:
+        yield child
+    except BaseException as e:
+        child.set_error(e)
+        raise
+    finally:
+        _current_span.reset(token)
+        child.end()
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [{"key": key, "value": _otlp_value(value)} for key, value in attributes.items() if value is not None]
+
+
+def to_otlp(trace: Trace) -> Dict[str, Any]:
+    """OTLP/HTTP JSON (ExportTraceServiceRequest) for one trace"""
+    spans = []
+    for s in trace.spans:
+        spans.append({
+            "traceId": trace.trace_id,
+            "spanId": s.span_id,
+            "parentSpanId": s.parent_id or "",
+            "name": s.name,
+            "kind": s.kind,
+            "startTimeUnixNano": str(s.start_ns),
+            "endTimeUnixNano": str(s.end_ns),
+            "attributes": _otlp_attributes(s.attributes),
+            "status": {"code": 2, "message": s.error} if s.error else {"code": 1}
+        })
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": _otlp_attributes({"service.name": SERVICE_NAME})},
+            "scopeSpans": [{"scope": {"name": "sdr.tracing"}, "spans": spans}]
+        }]
+    }
+
+
+class TraceExporter:
+    """Ship kept traces off the request path.
+
+    Traces are queued and written by a background thread either as one OTLP
+    JSON payload per line to a file ("jsonl") or POSTed to an OTLP/HTTP
+    collector ("otlp"). A full queue drops the trace rather than blocking.
+    """
+
+    def __init__(self, kind: str = "jsonl", path: str = "traces.jsonl",
+                 endpoint: str = "http://localhost:4318/v1/traces", max_queue: int = 1000):
+        self.kind = kind
+        self.path = path
+        self.endpoint = endpoint
+        self._queue: "queue.Queue[Optional[Trace]]" = queue.Queue(maxsize=max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self.exported = 0
+        self.dropped = 0
+        self.failed = 0
+
+    def submit(self, trace: Trace) -> None:
+        if self.kind == "none":
+            return
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(trace)
+        except queue.Full:
+            self.dropped += 1
+
+    def stop(self, timeout: float = 5.0) -> None:
+        if self._thread and self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout)
+
+    def _ensure_started(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+            self._thread.start()
+            atexit.register(self.stop)
+
+    def _run(self) -> None:
+        while True:
+            trace = self._queue.get()
+            if trace is None:
+                return
+            try:
+                self._export(to_otlp(trace))
+                self.exported += 1
+            except Exception as e:
+                self.failed += 1
+                print(f"Warning: Failed to export trace {trace.trace_id}: {str(e)}")
+
+    def _export(self, payload: Dict[str, Any]) -> None:
+        if self.kind == "otlp":
+            response = httpx.post(self.endpoint, json=payload, timeout=5.0)
+            response.raise_for_status()
+        else:
+            with open(self.path, "a") as f:
+                f.write(json.dumps(payload, separators=(",", ":")) + "\n")
+
+
+class Tracer:
+    """Start request traces and decide at the end which ones to keep.
+
+    Sampling happens when the root span ends (tail sampling), so every trace
+    that errored or ran longer than `slow_ms` is kept in full, plus a random
+    `sample_rate` fraction of healthy ones for a baseline.
+    """
+
+    def __init__(self, exporter: TraceExporter, slow_ms: float = 1000.0, sample_rate: float = 0.0, keep_recent: int = 100):
+        self.exporter = exporter
+        self.slow_ms = slow_ms
+        self.sample_rate = sample_rate
+        self._recent: deque = deque(maxlen=keep_recent)
+        self.started = 0
+        self.kept = 0
+
+    def start_trace(self, name: str, attributes: Optional[Dict[str, Any]] = None,
+                    trace_id: Optional[str] = None, kind: int = KIND_SERVER) -> Span:
+        self.started += 1
+        return Span(name, Trace(trace_id), None, attributes, kind)
+
+    def finish(self, root: Span) -> bool:
+        """End the root span; returns True if the trace was kept"""
+        root.end()
+        trace = root.trace
+        if trace.has_error:
+            reason = "error"
+        elif root.duration_ms >= self.slow_ms:
+            reason = "slow"
+        elif self.sample_rate and random.random() < self.sample_rate:
+            reason = "sampled"
+        else:
+            return False
+
+        root.set_attribute("sampling.reason", reason)
+        if trace.dropped_spans:
+            root.set_attribute("trace.dropped_spans", trace.dropped_spans)
+        self.kept += 1
+        self._recent.append(root)
+        self.exporter.submit(trace)
+        return True
+
+    def recent(self, limit: int = 50) -> List[Dict[str, Any]]:
+        roots = list(self._recent)[-limit:]
+        return [{
+            "trace_id": root.trace_id,
+            "name": root.name,
+            "duration_ms": round(root.duration_ms, 3),
+            "reason": root.attributes.get("sampling.reason"),
+            "spans": len(root.trace.spans),
+            "error": root.trace.has_error
+        } for root in reversed(roots)]
+
+    def get(self, trace_id: str) -> Optional[Dict[str, Any]]:
+        for root in self._recent:
+            if root.trace_id == trace_id:
+                return to_otlp(root.trace)
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "started": self.started,
+            "kept": self.kept,
+            "slow_ms": self.slow_ms,
+            "sample_rate": self.sample_rate,
+            "exporter": self.exporter.kind,
+            "exported": self.exporter.exported,
+            "export_dropped": self.exporter.dropped,
+            "export_failed": self.exporter.failed
+        }
+
+
+def trace_engine(engine, name: str) -> None:
+    """Record a span for every SQL statement issued inside a trace"""
+
+    def before_execute(conn, cursor, statement, parameters, context, executemany):
+        parent = _current_span.get()
+        if parent is None:
+            context._trace_span = None
+            return
+        context._trace_span = Span("db.query", parent.trace, parent.span_id, {
+            "db.system": conn.dialect.name,
+            "db.engine": name,
+            "db.operation": statement_operation(statement),
+            "db.statement": statement[:1000],
+            "db.executemany": executemany
+        }, KIND_CLIENT)
+
+    def after_execute(conn, cursor, statement, parameters, context, executemany):
+        sql_span = context._trace_span
+        if sql_span is not None:
+            if cursor.rowcount >= 0:
+                sql_span.set_attribute("db.rows", cursor.rowcount)
+            sql_span.end()
+
+    def on_error(exception_context):
+        sql_span = getattr(exception_context.execution_context, "_trace_span", None)
+        if sql_span is not None:
+            sql_span.set_error(exception_context.original_exception)
+            sql_span.end()
+
+    event.listen(engine, "before_cursor_execute", before_execute)
+    event.listen(engine, "after_cursor_execute", after_execute)
+    event.listen(engine, "handle_error", on_error)
+
+
+def trace_sessions() -> None:
+    """Span each Session.commit(), with its flush statements as children.
+
+    Commit time (the fsync, or waiting for SQLite's write lock) is otherwise
+    invisible between statement spans.
+    """
+
+    def before_commit(session):
+        parent = _current_span.get()
+        if parent is None:
+            return
+        commit_span = Span("db.commit", parent.trace, parent.span_id, kind=KIND_CLIENT)
+        session.info["trace_commit"] = (commit_span, _current_span.set(commit_span))
+
+    def end_commit(session, error: Optional[str] = None):
+        commit_span, token = session.info.pop("trace_commit", (None, None))
+        if commit_span is None:
+            return
+        if error:
+            commit_span.set_error(error)
+        try:
+            _current_span.reset(token)
+        except ValueError:
+            # Ended from a different context; the span itself is still recorded
+            pass
+        commit_span.end()
+
+    event.listen(Session, "before_commit", before_commit)
+    event.listen(Session, "after_commit", lambda session: end_commit(session))
+    event.listen(Session, "after_rollback", lambda session: end_commit(session, "rolled back"))
+
+
+class TracingMiddleware:
+    """ASGI middleware opening the root span of every HTTP request.
+
+    An incoming X-Trace-Id (32 hex chars) is continued, and every response
+    carries the trace id in X-Trace-Id whether or not the trace is kept.
+    """
+
+    def __init__(self, app, tracer: Tracer):
+        self.app = app
+        self.tracer = tracer
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        incoming = dict(scope.get("headers") or ()).get(TRACE_ID_HEADER.encode(), b"").decode("latin-1").lower()
+        root = self.tracer.start_trace(f"HTTP {scope['method']}", {
+            "http.method": scope["method"],
+            "http.target": scope.get("path", "")
+        }, trace_id=incoming if _TRACE_ID_PATTERN.match(incoming) else None)
+        token = _current_span.set(root)
+
+        async def send_with_trace_id(message):
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                root.set_attribute("http.status_code", status)
+                if status >= 500:
+                    root.set_error(f"HTTP {status}")
+                message["headers"] = list(message.get("headers", ())) + [(TRACE_ID_HEADER.encode(), root.trace_id.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_trace_id)
+        except BaseException as e:
+            root.set_error(e)
+            raise
+        finally:
+            _current_span.reset(token)
+            route = route_template(scope)
+            root.name = f"HTTP {scope['method']} {route}"
+            root.set_attribute("http.route", route)
+            self.tracer.finish(root)
+
+
+def tracer_from_env() -> Tracer:
+    """TRACE_EXPORTER=none|jsonl|otlp, TRACE_FILE, TRACE_OTLP_ENDPOINT, TRACE_SLOW_MS, TRACE_SAMPLE_RATE"""
+    exporter = TraceExporter(
+        kind=os.getenv("TRACE_EXPORTER", "none"),
+        path=os.getenv("TRACE_FILE", "traces.jsonl"),
+        endpoint=os.getenv("TRACE_OTLP_ENDPOINT", "http://localhost:4318/v1/traces")
+    )
+    return Tracer(
+        exporter,
+        slow_ms=float(os.getenv("TRACE_SLOW_MS", "1000")),
+        sample_rate=float(os.getenv("TRACE_SAMPLE_RATE", "0"))
+    )
@@ -0,0 +1,321 @@
+# backend/app/worker.py
+"""Background worker process: runs LLM-heavy jobs from the durable job queue.
+
+    python -m app.worker --concurrency 8
+    python -m app.worker --kinds score_lead --follow-ups
+
+Start as many as the Grok rate limit allows; they share the jobs table
+and never claim the same job. SIGTERM stops claiming and lets running
+jobs finish; anything cut off is redelivered once its lease expires.
+"""
+
+import argparse
+import json
+import os
+import signal
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+from dotenv import load_dotenv
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from . import models, schemas
+from .activity_log import ActivityWriter
+from .database import ReadSessionLocal, init_db, run_write, shutdown_db
+from .follow_ups import FollowUpScheduler, follow_up_days, schedule_follow_up
+from .grok_client import client_from_env
+from .jobs import JOB_HANDLERS, JobQueue, LeaseLost, job_handler, job_queue
+from .lead_cache import LEAD_COLUMNS
+from .lead_scorer import LeadScorer, AUTO_QUALIFY_SCORE, should_auto_qualify
+from .llm_scheduler import llm_priority
+from .message_generator import MessageGenerator
+from .token_budget import token_budget
+
+# Built in main() so importing this module needs no API key
+services = SimpleNamespace(lead_scorer=None, message_generator=None, activity_writer=None)
+
+
+def load_lead(lead_id: int) -> Optional[SimpleNamespace]:
+    db = ReadSessionLocal()
+    try:
+        row = db.execute(
+            select(*LEAD_COLUMNS).where(models.Lead.id == lead_id, models.Lead.is_deleted == False)
+        ).first()
+    finally:
+        db.close()
+    return SimpleNamespace(**row._asdict()) if row else None
+
+
+@job_handler("score_lead")
+def run_score_lead(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Score one lead. `batch` jobs (score-batch) behave like the batch
+    endpoint: a lead that already has a score keeps it while the token
+    budget throttles batch work, and nothing is auto-qualified."""
+    lead = load_lead(payload["lead_id"])
+    if lead is None:
+        return {"skipped": "lead not found"}
+    batch = payload.get("batch", False)
+    if batch and lead.score and not token_budget.allows("lead_scoring"):
+        return {"skipped": "budget"}
+
+    criteria = schemas.ScoringCriteria(**payload["criteria"]) if payload.get("criteria") else None
+    score_data = services.lead_scorer.score_lead(lead, custom_criteria=criteria)
+
+    def save(db: Session):
+        db_lead = db.get(models.Lead, lead.id)
+        db_lead.score = score_data["score"]
+        db_lead.score_reasoning = score_data["reasoning"]
+        db_lead.score_prompt_version = score_data.get("prompt_version")
+        auto_qualified = not batch and should_auto_qualify(db_lead.score, db_lead.pipeline_stage)
+        if auto_qualified:
+            db_lead.pipeline_stage = "qualified"
+        return auto_qualified
+
+    auto_qualified = run_write(save)
+    if not batch:
+        services.activity_writer.log(
+            lead_id=lead.id,
+            activity_type="lead_scored",
+            description=f"Lead scored: {score_data['score']}/100" + (f" (was {lead.score})" if lead.score else ""),
+            notes=score_data["reasoning"][:200] if score_data["reasoning"] else None
+        )
+    if auto_qualified:
+        services.activity_writer.log(
+            lead_id=lead.id,
+            activity_type="auto_stage_change",
+            description=f"Auto-qualified based on high score ({score_data['score']})",
+            notes=f"Automatically moved to Qualified stage due to score >= {AUTO_QUALIFY_SCORE}"
+        )
+    return {"lead_id": lead.id, "score": score_data["score"], "auto_qualified": auto_qualified}
+
+
+@job_handler("generate_message")
+def run_generate_message(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Generate and save a message like the generate-message endpoint,
+    including the auto-move to contacted and the follow-up schedule"""
+    lead = load_lead(payload["lead_id"])
+    if lead is None:
+        return {"skipped": "lead not found"}
+    message_type = payload.get("message_type", "initial_outreach")
+    message = services.message_generator.generate_message(lead, message_type)
+
+    auto_contacted = message_type == "initial_outreach" and lead.pipeline_stage in ["new", "qualified"]
+
+    def save(db: Session):
+        db_message = models.Message(
+            lead_id=lead.id,
+            message_type=message_type,
+            content=message["content"],
+            subject=message.get("subject"),
+            prompt_version=message.get("prompt_version")
+        )
+        db.add(db_message)
+        if auto_contacted:
+            db.get(models.Lead, lead.id).pipeline_stage = "contacted"
+        db.flush()
+        schedule_follow_up(
+            db, lead.id, "contacted" if auto_contacted else lead.pipeline_stage, db_message.id, follow_up_days(message)
+        )
+        return db_message.id
+
+    message_id = run_write(save)
+    services.activity_writer.log(
+        lead_id=lead.id,
+        activity_type="message_generated",
+        description=f"{message_type.replace('_', ' ').title()} message generated",
+        notes=f"Subject: {message.get('subject', 'N/A')}"
+    )
+    if auto_contacted:
+        services.activity_writer.log(
+            lead_id=lead.id,
+            activity_type="auto_stage_change",
+            description=f"Auto-moved to Contacted after {message_type} message generated",
+            notes="Automatically moved to Contacted stage after initial outreach message was created"
+        )
+    return {"lead_id": lead.id, "message_id": message_id, "subject": message.get("subject")}
+
+
+class Worker:
+    """Claim jobs up to `concurrency` at a time and run their handlers.
+
+    The main loop claims only as many jobs as it has free slots, so a
+    worker never holds leases on work it has not started. A heartbeat
+    thread renews the leases of running jobs every third of the lease.
+    """
+
+    def __init__(self, queue: JobQueue, worker_id: str, concurrency: int = 4,
+                 kinds: Optional[List[str]] = None, poll_interval: float = 1.0):
+        self.queue = queue
+        self.worker_id = worker_id
+        self.concurrency = max(1, concurrency)
+        self.kinds = kinds or sorted(JOB_HANDLERS)
+        self.poll_interval = poll_interval
+        self._executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="job")
+        self._in_flight: Dict[int, Any] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._finished = threading.Event()
+        self.completed = 0
+        self.retried = 0
+        self.dead = 0
+        self.lease_lost = 0
+
+    def stop(self) -> None:
+        self._stopping.set()
+        self._wake.set()
+
+    def run(self, drain: bool = False) -> None:
+        """Work until stop(); with `drain`, return once nothing is due"""
+        heartbeat = threading.Thread(target=self._heartbeat, name="job-heartbeat", daemon=True)
+        heartbeat.start()
+        try:
+            while not self._stopping.is_set():
+                with self._lock:
+                    free = self.concurrency - len(self._in_flight)
+                jobs = []
+                if free > 0:
+                    try:
+                        jobs = self.queue.claim(self.worker_id, free, self.kinds)
+                    except Exception as e:
+                        print(f"Warning: Claiming jobs failed: {str(e)}")
+                for job in jobs:
+                    with self._lock:
+                        self._in_flight[job.id] = job
+                    self._executor.submit(self._run_job, job)
+
+                if jobs and len(jobs) == free:
+                    continue  # more may be due; claim again as soon as a slot frees
+                with self._lock:
+                    idle = not self._in_flight
+                if drain and idle and not jobs:
+                    return
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+        finally:
+            # Let running jobs finish; their results still need the lease
+            self._executor.shutdown(wait=True)
+            self._finished.set()
+            heartbeat.join()
+
+    def _run_job(self, job: Any) -> None:
+        try:
+            handler = JOB_HANDLERS[job.kind]
+            try:
+                payload = json.loads(job.payload)
+                # Jobs queued one lead at a time usually have someone waiting on
+                # them; those fanned out by a batch endpoint never do
+                with llm_priority("batch" if payload.get("batch") else "near_real_time"):
+                    result = handler(payload)
+            except Exception as e:
+                status = self.queue.fail(job.id, self.worker_id, job.attempts, job.max_attempts, f"{type(e).__name__}: {e}")
+                print(f"Warning: Job {job.id} ({job.kind}) failed on attempt {job.attempts}: {str(e)}; {status}")
+                if status == "dead":
+                    self.dead += 1
+                else:
+                    self.retried += 1
+                return
+            self.queue.complete(job.id, self.worker_id, result)
+            self.completed += 1
+        except LeaseLost as e:
+            # Another worker has it now; at-least-once means it simply runs again
+            self.lease_lost += 1
+            print(f"Warning: {str(e)}")
+        except Exception as e:
+            print(f"Warning: Recording job {job.id} failed: {str(e)}")
+        finally:
+            with self._lock:
+                self._in_flight.pop(job.id, None)
+            self._wake.set()
+
+    def _heartbeat(self) -> None:
+        interval = self.queue.lease.total_seconds() / 3
+        # Keeps renewing after stop() until the running jobs have finished
+        while not self._finished.wait(interval):
+            with self._lock:
+                job_ids = list(self._in_flight)
+            if not job_ids:
+                continue
+            try:
+                held = set(self.queue.heartbeat(self.worker_id, job_ids))
+            except Exception as e:
+                print(f"Warning: Job heartbeat failed: {str(e)}")
+                continue
+            for job_id in set(job_ids) - held:
+                with self._lock:
+                    still_running = job_id in self._in_flight
+                if still_running:
+                    print(f"Warning: Lost the lease on job {job_id}; it will be redelivered")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            running = len(self._in_flight)
+        return {
+            "worker_id": self.worker_id,
+            "running": running,
+            "completed": self.completed,
+            "retried": self.retried,
+            "dead": self.dead,
+            "lease_lost": self.lease_lost
+        }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Run background jobs from the SDR job queue")
+    parser.add_argument("--concurrency", type=int, default=int(os.getenv("WORKER_CONCURRENCY", "4")),
+                        help="jobs run at once in this process")
+    parser.add_argument("--kinds", default="", help=f"comma-separated job kinds (default: all of {', '.join(JOB_HANDLERS)})")
+    parser.add_argument("--worker-id", default=f"{socket.gethostname()}:{os.getpid()}")
+    parser.add_argument("--poll-interval", type=float, default=float(os.getenv("WORKER_POLL_SECONDS", "1.0")))
+    parser.add_argument("--follow-ups", action="store_true", help="also run the follow-up dispatcher in this process")
+    parser.add_argument("--drain", action="store_true", help="exit once no jobs are due (cron, tests)")
+    args = parser.parse_args(argv)
+
+    kinds = [kind.strip() for kind in args.kinds.split(",") if kind.strip()]
+    unknown = set(kinds) - set(JOB_HANDLERS)
+    if unknown:
+        parser.error(f"unknown job kinds: {', '.join(sorted(unknown))}")
+
+    init_db()
+    grok_client = client_from_env()
+    services.lead_scorer = LeadScorer(grok_client)
+    services.message_generator = MessageGenerator(grok_client)
+    services.activity_writer = ActivityWriter(sync=os.getenv("ACTIVITY_LOG_SYNC") == "1")
+
+    follow_up_scheduler = None
+    if args.follow_ups:
+        follow_up_scheduler = FollowUpScheduler(
+            services.message_generator,
+            services.activity_writer,
+            batch_size=int(os.getenv("FOLLOW_UP_BATCH_SIZE", "200")),
+            tick_interval=float(os.getenv("FOLLOW_UP_TICK_SECONDS", "30")),
+            max_touches=int(os.getenv("FOLLOW_UP_MAX_TOUCHES", "3")),
+            concurrency=args.concurrency
+        )
+        follow_up_scheduler.start()
+
+    worker = Worker(job_queue, args.worker_id, concurrency=args.concurrency, kinds=kinds,
+                    poll_interval=args.poll_interval)
+    signal.signal(signal.SIGTERM, lambda signum, frame: worker.stop())
+    signal.signal(signal.SIGINT, lambda signum, frame: worker.stop())
+
+    print(f"Worker {args.worker_id} started at {datetime.utcnow().isoformat()}: "
+          f"kinds={','.join(worker.kinds)} concurrency={worker.concurrency}")
+    try:
+        worker.run(drain=args.drain)
+    finally:
+        if follow_up_scheduler is not None:
+            follow_up_scheduler.stop()
+        services.activity_writer.stop()
+        shutdown_db()
+        print(f"Worker stopped: {json.dumps(worker.stats())}")
+
+
+if __name__ == "__main__":
+    main()
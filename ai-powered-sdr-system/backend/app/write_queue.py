@@ -0,0 +1,119 @@
+# backend/app/write_queue.py
+"""Single dedicated SQLite writer that group-commits small transactions"""
+
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Optional
+
+from sqlalchemy.orm import Session
+
+WriteFn = Callable[[Session], Any]
+
+
+class GroupCommitWriter:
+    """Funnel small write transactions through one thread and one connection.
+
+    Callers hand over a function that receives a session and performs its
+    writes. The writer drains whatever is queued (up to `max_batch`, waiting at
+    most `max_delay` seconds for stragglers), runs each function inside its own
+    SAVEPOINT and commits the whole group once. One fsync and one write-lock
+    acquisition then cover many activity logs / stage changes, and a failing
+    function only rolls back its own savepoint.
+    """
+
+    def __init__(self, session_factory: Callable[[], Session], max_batch: int = 64, max_delay: float = 0.002):
+        self.session_factory = session_factory
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._queue: "queue.Queue[Optional[tuple]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self.batches_committed = 0
+        self.writes_committed = 0
+
+    def start(self) -> None:
+        with self._start_lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="sqlite-writer", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Drain queued writes and stop the writer thread"""
+        if self._thread and self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout)
+
+    def submit(self, fn: WriteFn) -> Future:
+        self.start()
+        future: Future = Future()
+        self._queue.put((fn, future))
+        return future
+
+    def execute(self, fn: WriteFn, timeout: Optional[float] = 30.0) -> Any:
+        """Submit a write and block until its group has committed"""
+        return self.submit(fn).result(timeout)
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    def _collect(self, first: tuple) -> tuple:
+        batch = [first]
+        stopping = False
+        while len(batch) < self.max_batch:
+            try:
+                item = self._queue.get(timeout=self.max_delay)
+            except queue.Empty:
+                break
+            if item is None:
+                stopping = True
+                break
+            batch.append(item)
+        return batch, stopping
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+
+            batch, stopping = self._collect(item)
+            self._commit_batch(batch)
+            if stopping:
+                # Flush anything that raced in behind the stop marker
+                leftover = []
+                while not self._queue.empty():
+                    queued = self._queue.get_nowait()
+                    if queued is not None:
+                        leftover.append(queued)
+                if leftover:
+                    self._commit_batch(leftover)
+                return
+
+    def _commit_batch(self, batch: list) -> None:
+        session = self.session_factory()
+        done = []
+        try:
+            for fn, future in batch:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                try:
+                    with session.begin_nested():
+                        result = fn(session)
+                    done.append((future, result))
+                except Exception as e:
+                    future.set_exception(e)
+
+            session.commit()
+            self.batches_committed += 1
+            self.writes_committed += len(done)
+            for future, result in done:
+                future.set_result(result)
+        except Exception as e:
+            session.rollback()
+            for future, _ in done:
+                future.set_exception(e)
+        finally:
+            session.close()
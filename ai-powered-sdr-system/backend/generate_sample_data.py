@@ -1,12 +1,24 @@
 # backend/generate_sample_data.py
 """
-Sample data generator for demo purposes
-Run this after starting the backend to populate with sample leads
+Sample data generator
+
+Demo mode - run after starting the backend to post a handful of sample leads:
+    python generate_sample_data.py
+
+Bulk mode - write seeded synthetic leads, messages and activity histories
+straight to the database (DATABASE_URL) with bulk inserts, for benchmarks,
+load tests and index work at production scale:
+    python generate_sample_data.py --bulk 1000000 --seed 42
 """
 
-import requests
+import argparse
+import os
 import random
+import sys
 import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional, Tuple
 
 API_URL = "http://localhost:8001/api"
 
@@ -124,6 +136,8 @@ sample_leads = [
 ]
 
 def generate_sample_data():
+    import requests
+
     print("🚀 Generating sample data...")
     
     created_leads = []
@@ -175,7 +189,383 @@ def generate_sample_data():
     print(f"📊 Created {len(created_leads)} leads")
     print("🎯 You can now view the leads in the frontend at http://localhost:5173")
 
+# Bulk mode distributions - (value, weight) pairs
+TITLES = [
+    # (title, weight, seniority 0-3)
+    ("CEO", 2, 3), ("CTO", 2, 3), ("CFO", 1, 3), ("COO", 1, 3),
+    ("VP of Sales", 4, 2), ("VP of Marketing", 3, 2), ("VP of Engineering", 3, 2), ("Head of Growth", 3, 2),
+    ("Director of Sales", 6, 1), ("Director of Marketing", 5, 1), ("Director of Operations", 4, 1), ("Director of IT", 3, 1),
+    ("Sales Manager", 10, 1), ("Marketing Manager", 8, 1), ("Operations Manager", 6, 0),
+    ("Account Executive", 12, 0), ("Sales Development Representative", 10, 0), ("Business Analyst", 7, 0),
+    ("Software Engineer", 6, 0), ("Product Manager", 6, 0)
+]
+INDUSTRIES = [
+    ("Technology", 22), ("SaaS", 16), ("Finance", 12), ("Healthcare", 10), ("Enterprise Software", 8),
+    ("Retail", 8), ("Manufacturing", 8), ("Education", 5), ("Real Estate", 4), ("Logistics", 4), ("Media", 3)
+]
+COMPANY_SIZES = [("1-10", 14), ("11-50", 24), ("50-200", 26), ("200-500", 16), ("500-1000", 10), ("1000+", 10)]
+REGIONS = [
+    ("San Francisco, CA", "415", 10), ("New York, NY", "212", 12), ("Austin, TX", "512", 6), ("Seattle, WA", "206", 6),
+    ("Boston, MA", "617", 6), ("Chicago, IL", "312", 6), ("Los Angeles, CA", "213", 7), ("Denver, CO", "303", 4),
+    ("Atlanta, GA", "404", 4), ("Miami, FL", "305", 3), ("Toronto, ON", "416", 4), ("London, UK", "44", 8),
+    ("Berlin, DE", "49", 4), ("Paris, FR", "33", 3), ("Amsterdam, NL", "31", 2), ("Singapore, SG", "65", 3),
+    ("Sydney, AU", "61", 3), ("Bangalore, IN", "91", 3)
+]
+# Where leads end up; the funnel narrows with each stage
+STAGE_FUNNEL = [
+    ("new", 34), ("qualified", 20), ("contacted", 18), ("meeting", 10),
+    ("negotiation", 6), ("closed_won", 4), ("closed_lost", 8)
+]
+STAGE_PATH = ["new", "qualified", "contacted", "meeting", "negotiation", "closed_won"]
+# Messages a lead has received by the time it enters a stage
+STAGE_MESSAGES = {
+    "contacted": ["initial_outreach", "follow_up"],
+    "meeting": ["meeting_request"],
+    "negotiation": ["value_proposition", "problem_solution"],
+    "closed_won": ["casual_check_in"],
+    "closed_lost": ["casual_check_in"]
+}
+TARGET_INDUSTRIES = {"Technology", "SaaS", "Finance", "Healthcare", "Enterprise Software"}
+TARGET_SIZES = {"50-200", "200-500", "500-1000"}
+
+FIRST_NAMES = [
+    "James", "Mary", "John", "Patricia", "Robert", "Jennifer", "Michael", "Linda", "David", "Elizabeth",
+    "William", "Barbara", "Richard", "Susan", "Joseph", "Jessica", "Thomas", "Sarah", "Charles", "Karen",
+    "Daniel", "Nancy", "Matthew", "Lisa", "Anthony", "Priya", "Wei", "Aisha", "Carlos", "Sofia",
+    "Hiroshi", "Fatima", "Lukas", "Amara", "Diego", "Mei", "Olga", "Rahul", "Chloe", "Mateo"
+]
+LAST_NAMES = [
+    "Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis", "Rodriguez", "Martinez",
+    "Hernandez", "Lopez", "Wilson", "Anderson", "Thomas", "Taylor", "Moore", "Jackson", "Martin", "Lee",
+    "Chen", "Patel", "Kim", "Nguyen", "Singh", "Muller", "Rossi", "Tanaka", "Okafor", "Novak"
+]
+COMPANY_PREFIXES = [
+    "Acme", "Apex", "Blue", "Bright", "Cloud", "Core", "Data", "Delta", "Echo", "Evergreen", "Global", "Green",
+    "Horizon", "Insight", "Iron", "Lumen", "Meridian", "Nexus", "Nova", "Orbit", "Peak", "Pioneer", "Prime",
+    "Quantum", "Summit", "Swift", "Titan", "True", "Vertex", "Zenith"
+]
+COMPANY_SUFFIXES = [
+    "Systems", "Labs", "Analytics", "Solutions", "Health", "Capital", "Logistics", "Software", "Networks",
+    "Dynamics", "Partners", "Industries", "Technologies", "Works", "Group", "Digital", "Retail", "Media"
+]
+NOTES = [
+    "Met at SaaStr booth", "Referred by existing customer", "Downloaded pricing guide", "Attended webinar",
+    "Evaluating competitors this quarter", "Budget approved for next fiscal year", "Asked for a case study"
+]
+
+LEAD_COLUMNS = [
+    "id", "first_name", "last_name", "email", "phone", "company", "job_title", "industry", "company_size",
+    "location", "website", "score", "score_reasoning", "score_prompt_version", "pipeline_stage",
+    "created_at", "updated_at", "notes", "is_deleted", "deleted_at"
+]
+MESSAGE_COLUMNS = ["id", "lead_id", "message_type", "subject", "content", "sent", "created_at", "prompt_version"]
+ACTIVITY_COLUMNS = ["lead_id", "activity_type", "description", "timestamp", "notes"]
+SIGNATURE_COLUMNS = ["message_id", "signature"]
+BAND_COLUMNS = ["band", "bucket", "message_id"]
+
+
+def _fill(text: str, first_name: str, company: str, title: str) -> str:
+    return text.replace("\x01", first_name).replace("\x02", company).replace("\x03", title)
+
+
+def _ts(value: datetime) -> str:
+    """DateTime as SQLAlchemy stores it in SQLite"""
+    return value.isoformat(" ", "microseconds")
+
+
+class SyntheticLeads:
+    """Seeded builder for synthetic CRM rows.
+
+    Leads cluster into companies that share industry, size and location;
+    scores follow seniority and fit; stages follow a narrowing funnel with
+    timestamps that move forward through each lead's history. Every batch
+    has its own seed, so the output depends only on `seed` - not on how
+    many processes build it.
+    """
+
+    def __init__(self, seed: int, days: int, with_messages: bool, company_count: int, now: datetime):
+        from app.message_templates import render_message
+        from app.prompts import prompt_registry
+
+        self.seed = seed
+        self.days = days
+        self.with_messages = with_messages
+        self.now = now
+        self.render_message = render_message
+        self.score_version = prompt_registry.get("lead_scoring").key
+
+        self.titles, self.title_weights = [t[0] for t in TITLES], [t[1] for t in TITLES]
+        self.seniority = {title: level for title, _, level in TITLES}
+        self.industries, self.industry_weights = zip(*INDUSTRIES)
+        self.sizes, self.size_weights = zip(*COMPANY_SIZES)
+        self.regions, self.region_weights = [r[:2] for r in REGIONS], [r[2] for r in REGIONS]
+        self.stages, self.stage_weights = zip(*STAGE_FUNNEL)
+        self.rng = random.Random(seed)
+        self.companies = self._companies(company_count)
+        self._rendered: Dict[Tuple[str, str, str], Tuple[str, str]] = {}
+
+    def _companies(self, count: int) -> List[Tuple[str, str, str, str, Tuple[str, str]]]:
+        rng = self.rng
+        companies = []
+        per_round = len(COMPANY_PREFIXES) * len(COMPANY_SUFFIXES)
+        for c in range(count):
+            name = f"{COMPANY_PREFIXES[c % len(COMPANY_PREFIXES)]} {COMPANY_SUFFIXES[(c // len(COMPANY_PREFIXES)) % len(COMPANY_SUFFIXES)]}"
+            if c >= per_round:
+                name += f" {c // per_round + 1}"
+            domain = name.lower().replace(" ", "") + rng.choice([".com", ".io", ".co", ".ai"])
+            companies.append((
+                name,
+                domain,
+                rng.choices(self.industries, self.industry_weights)[0],
+                rng.choices(self.sizes, self.size_weights)[0],
+                rng.choices(self.regions, self.region_weights)[0]
+            ))
+        return companies
+
+    def _stage_history(self, stage: str) -> List[str]:
+        if stage == "closed_lost":
+            # Lost deals drop out somewhere along the path
+            return STAGE_PATH[:self.rng.randint(1, 5)] + ["closed_lost"]
+        return STAGE_PATH[:STAGE_PATH.index(stage) + 1]
+
+    def _score(self, title: str, industry: str, size: str, stage: str) -> float:
+        score = 30 + 12 * self.seniority[title] + self.rng.gauss(0, 10)
+        if industry in TARGET_INDUSTRIES:
+            score += 10
+        if size in TARGET_SIZES:
+            score += 8
+        if stage not in ("new", "closed_lost"):
+            score += 6
+        return round(min(100.0, max(0.0, score)), 1)
+
+    def _render(self, message_type: str, stage: str, industry: str, first_name: str, company: str, title: str):
+        """Subject, content and near-duplicate signature of one message.
+
+        Each (type, stage, industry) template is rendered once with
+        placeholder names that are filled in per message. The shingles the
+        template contributes regardless of names are reduced to one base
+        signature up front, so signing a message only folds in the shingles
+        that touch a name - identical to signing it from scratch.
+        """
+        from app.near_duplicates import band_buckets, message_text, minhash_from_hashes, shingle_hashes
+
+        key = (message_type, stage, industry)
+        if key not in self._rendered:
+            placeholder = SimpleNamespace(first_name="\x01", company="\x02", job_title="\x03",
+                                          industry=industry, pipeline_stage=stage)
+            rendered = self.render_message(placeholder, message_type)
+            subject, content = rendered["subject"], rendered["content"]
+            # Shingles present under two unrelated sets of names never touch a name
+            fixed = None
+            for names in (("qqa", "qqb qqc", "qqd"), ("zzp", "zzq zzr", "zzs")):
+                hashes = set(shingle_hashes(message_text(*(_fill(part, *names) for part in (subject, content)))))
+                fixed = hashes if fixed is None else fixed & hashes
+            self._rendered[key] = (subject, content, fixed, minhash_from_hashes(fixed))
+
+        subject, content, fixed, base = self._rendered[key]
+        subject, content = _fill(subject, first_name, company, title), _fill(content, first_name, company, title)
+        hashes = shingle_hashes(message_text(subject, content))
+        signature = minhash_from_hashes([h for h in hashes if h not in fixed], base)
+        return subject, content, signature.tobytes(), band_buckets(signature)
+
+    def _lead(self, lead_id: int, messages: List[tuple], activities: List[tuple], signatures: List[tuple]) -> tuple:
+        """One lead row; its messages, activities and signatures are appended to the given lists"""
+        rng = self.rng
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        # Squaring skews toward the first companies: a few accounts with many contacts, a long tail with one
+        company, domain, industry, size, (location, area_code) = self.companies[int(len(self.companies) * rng.random() ** 2)]
+        title = rng.choices(self.titles, self.title_weights)[0]
+        stage = rng.choices(self.stages, self.stage_weights)[0]
+
+        # Skewed toward recent leads; each stage needs time to reach
+        age_days = rng.betavariate(1.2, 2.2) * self.days
+        history = self._stage_history(stage)
+        if len(history) > 1 and age_days < 3 * len(history):
+            age_days = 3 * len(history) + rng.random() * 10
+        created = self.now - timedelta(days=age_days, seconds=rng.randrange(86400))
+
+        scored = stage != "new" or rng.random() < 0.7
+        score = self._score(title, industry, size, stage) if scored else 0.0
+
+        activities.append((lead_id, "lead_created", f"Lead {first} {last} was created",
+                           _ts(created), f"Company: {company}, Job Title: {title}"))
+        t = created + timedelta(seconds=rng.randint(2, 30))
+        if scored:
+            activities.append((lead_id, "lead_scored", f"Lead scored: {score}/100", _ts(t), None))
+
+        step = (self.now - t).total_seconds() / (len(history) + 1)
+        for previous, current in zip(history, history[1:]):
+            t += timedelta(seconds=rng.uniform(0.3, 1.0) * step)
+            activities.append((lead_id, "stage_change", f"Stage changed to {current}", _ts(t), None))
+            if not self.with_messages:
+                continue
+            for message_type in STAGE_MESSAGES.get(current, []):
+                sent = _ts(t - timedelta(hours=rng.randint(1, 48)))
+                subject, content, signature, buckets = self._render(message_type, previous, industry, first, company, title)
+                messages.append((lead_id, message_type, subject, content, sent, sent, "template@v1"))
+                signatures.append((signature, buckets))
+                activities.append((lead_id, "message_generated",
+                                   f"{message_type.replace('_', ' ').title()} message generated",
+                                   sent, f"Subject: {subject}"))
+
+        deleted = rng.random() < 0.01
+        updated = _ts(t)
+        return (
+            lead_id, first, last, f"{first}.{last}.{lead_id}@{domain}".lower(),
+            f"+1-{area_code}-555-{lead_id % 10000:04d}", company, title, industry, size, location,
+            f"https://{domain}", score,
+            f"{title} at a {size} {industry} company." if scored else None,
+            self.score_version if scored else None,
+            stage, _ts(created), updated,
+            rng.choice(NOTES) if rng.random() < 0.1 else None,
+            deleted, updated if deleted else None
+        )
+
+    def batch(self, batch_index: int, first_id: int, count: int):
+        """Rows for leads first_id .. first_id + count - 1: leads, messages
+        (without ids), activities, and each message's MinHash signature and
+        LSH buckets for the near-duplicate index"""
+        self.rng = random.Random(f"{self.seed}:{batch_index}")
+        messages, activities, signatures = [], [], []
+        leads = [
+            self._lead(lead_id, messages, activities, signatures)
+            for lead_id in range(first_id, first_id + count)
+        ]
+        return leads, messages, activities, signatures
+
+
+# Row builder of a worker process (see generate_bulk_data)
+_builder: Optional[SyntheticLeads] = None
+
+
+def _init_builder(config: Dict[str, Any]) -> None:
+    global _builder
+    _builder = SyntheticLeads(**config)
+
+
+def _build_batch(task: Tuple[int, int, int]):
+    return _builder.batch(*task)
+
+
+def _insert_rows(conn, table: str, columns: List[str], rows: List[tuple]) -> None:
+    if rows:
+        placeholder = "?" if conn.dialect.paramstyle in ("qmark", "numeric") else "%s"
+        values = ", ".join([placeholder] * len(columns))
+        conn.exec_driver_sql(f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({values})", rows)
+
+
+def generate_bulk_data(count: int, seed: int = 42, days: int = 365, with_messages: bool = True,
+                       batch_size: int = 20000, workers: Optional[int] = None) -> Dict[str, Any]:
+    """Append `count` synthetic leads with their histories to DATABASE_URL.
+
+    Batches - including message signatures for the near-duplicate index -
+    are built in `workers` processes while the parent inserts them with
+    executemany; the FTS index is rebuilt once at the end instead of per
+    row. Returns row counts and elapsed seconds.
+    """
+    from multiprocessing import Pool
+    from sqlalchemy import text
+    from app.database import engine, init_db
+    from app.search import init_search_index, rebuild_search_index
+
+    init_db()
+    is_sqlite = engine.dialect.name == "sqlite"
+    with engine.begin() as conn:
+        first_id = (conn.execute(text("SELECT COALESCE(MAX(id), 0) FROM leads")).scalar() or 0) + 1
+        message_id = (conn.execute(text("SELECT COALESCE(MAX(id), 0) FROM messages")).scalar() or 0) + 1
+        if is_sqlite:
+            # Per-row FTS triggers are far slower than one rebuild at the end
+            conn.execute(text("DROP TRIGGER IF EXISTS leads_fts_ai"))
+            conn.execute(text("DROP TRIGGER IF EXISTS messages_fts_ai"))
+
+    config = {
+        "seed": seed,
+        "days": days,
+        "with_messages": with_messages,
+        "company_count": max(10, count // 8),
+        "now": datetime.utcnow()
+    }
+    tasks = [
+        (index, first_id + offset, min(batch_size, count - offset))
+        for index, offset in enumerate(range(0, count, batch_size))
+    ]
+    workers = workers or os.cpu_count() or 1
+    pool = Pool(workers, initializer=_init_builder, initargs=(config,)) if workers > 1 else None
+    if pool is None:
+        _init_builder(config)
+
+    totals = {"leads": 0, "messages": 0, "activities": 0}
+    started = time.perf_counter()
+    conn = engine.connect()
+    if is_sqlite:
+        # Durability is pointless for a load that is simply rerun after a crash
+        synchronous = conn.exec_driver_sql("PRAGMA synchronous").scalar()
+        conn.exec_driver_sql("PRAGMA synchronous = OFF")
+        conn.commit()
+    try:
+        batches = pool.imap(_build_batch, tasks) if pool else map(_build_batch, tasks)
+        for leads, messages, activities, signatures in batches:
+            message_ids = range(message_id, message_id + len(messages))
+            message_id += len(messages)
+            _insert_rows(conn, "leads", LEAD_COLUMNS, leads)
+            _insert_rows(conn, "messages", MESSAGE_COLUMNS, [(i,) + m for i, m in zip(message_ids, messages)])
+            _insert_rows(conn, "activities", ACTIVITY_COLUMNS, activities)
+            _insert_rows(conn, "message_signatures", SIGNATURE_COLUMNS,
+                         [(i, blob) for i, (blob, _) in zip(message_ids, signatures)])
+            _insert_rows(conn, "message_lsh_bands", BAND_COLUMNS, [
+                (band, bucket, i)
+                for i, (_, buckets) in zip(message_ids, signatures)
+                for band, bucket in enumerate(buckets)
+            ])
+            conn.commit()
+
+            totals["leads"] += len(leads)
+            totals["messages"] += len(messages)
+            totals["activities"] += len(activities)
+            elapsed = time.perf_counter() - started
+            print(f"  {totals['leads']:>9} leads  {totals['messages']:>9} messages  "
+                  f"{totals['activities']:>9} activities  ({totals['leads'] / elapsed:,.0f} leads/s)")
+    finally:
+        if pool:
+            pool.terminate()
+        conn.rollback()
+        if is_sqlite:
+            conn.exec_driver_sql(f"PRAGMA synchronous = {synchronous}")
+            conn.commit()
+        conn.close()
+        if is_sqlite:
+            print("Rebuilding search index...")
+            rebuild_search_index(engine)
+            init_search_index(engine)
+
+    if is_sqlite:
+        with engine.begin() as conn:
+            conn.execute(text("ANALYZE"))
+    totals["seconds"] = round(time.perf_counter() - started, 2)
+    return totals
+
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Populate the SDR database with sample data")
+    parser.add_argument("--bulk", type=int, help="Write this many synthetic leads directly to DATABASE_URL")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed; the same seed gives the same data")
+    parser.add_argument("--days", type=int, default=365, help="How far back lead histories reach")
+    parser.add_argument("--no-messages", action="store_true", help="Leads and activities only")
+    parser.add_argument("--batch-size", type=int, default=20000, help="Leads per insert transaction")
+    parser.add_argument("--workers", type=int, help="Processes building rows (default: one per CPU)")
+    args = parser.parse_args()
+
+    if args.bulk:
+        totals = generate_bulk_data(
+            args.bulk, seed=args.seed, days=args.days, with_messages=not args.no_messages,
+            batch_size=args.batch_size, workers=args.workers
+        )
+        print(f"\n✨ Wrote {totals['leads']} leads, {totals['messages']} messages and "
+              f"{totals['activities']} activities in {totals['seconds']}s")
+        sys.exit(0)
+
+    import requests
+
     # Check if backend is running
     try:
         response = requests.get(f"{API_URL[:-4]}/health")
@@ -185,4 +575,4 @@ if __name__ == "__main__":
             print("⚠️  Backend is not responding correctly")
     except:
         print("❌ Backend is not running. Please start it first:")
-        print("   cd backend && source venv/bin/activate && uvicorn app.main:app --reload")
\ No newline at end of file
+        print("   cd backend && source venv/bin/activate && uvicorn app.main:app --reload")
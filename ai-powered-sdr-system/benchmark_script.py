@@ -1,218 +1,620 @@
 """
 Performance benchmarks for AI-SDR System
-Run: python benchmark.py --output benchmarks/results.json
+Run: python benchmark_script.py run --output benchmarks/results.json
+     python benchmark_script.py run --output benchmarks/baseline.json          # record a baseline
+     python benchmark_script.py run --baseline benchmarks/baseline.json        # run and gate against it
+     python benchmark_script.py compare benchmarks/baseline.json benchmarks/results.json --threshold 0.15
+
+Every case runs against a scratch SQLite database (override with
+BENCHMARK_DATABASE_URL) and a simulated Grok backend, warms up, then
+repeats and reports mean/median with a 95% confidence interval.
+`compare` exits non-zero when a case's median is more than `threshold`
+slower than the baseline and the two confidence intervals do not overlap.
 """
 import time
-import asyncio
 import statistics
-from typing import List, Dict, Any
+from typing import Callable, List, Dict, Any, Optional
 from pathlib import Path
 import json
 import argparse
 from datetime import datetime
+import platform
+import gc
+import re
+import sqlite3
 import sys
 import os
+import tempfile
+import threading
+import tracemalloc
+
+# Benchmarks must never write into a real database
+SCRATCH_DB = Path(tempfile.gettempdir()) / f"sdr-benchmark-{os.getpid()}.db"
+os.environ["DATABASE_URL"] = os.getenv("BENCHMARK_DATABASE_URL", f"sqlite:///{SCRATCH_DB}")
+os.environ["SDR_LLM_BACKEND"] = "simulated"
+os.environ.setdefault("QUERY_PROFILER", "0")
+os.environ.setdefault("PREGENERATION", "0")
+os.environ.setdefault("TRACE_EXPORTER", "none")
 
 # Add backend to path
 sys.path.insert(0, str(Path(__file__).parent / "backend"))
 
-from app.database import SessionLocal, init_db
+from app.database import SessionLocal, engine, init_db
 from app.models import Lead
-from app.schemas import LeadCreate
-from sqlalchemy import text
+from app import schemas
+from app.lead_queries import LIST_VIEW_FIELDS, fetch_lead_rows
+from app.lead_scorer import LeadScorer
+from app.message_generator import MessageGenerator
+from app.simulated_llm import SimulatedGrokClient
+from pydantic import TypeAdapter
+from sqlalchemy import func, insert, text
+
+STAGES = ["new", "qualified", "contacted", "meeting", "negotiation", "closed_won", "closed_lost"]
+TITLES = ["CEO", "CTO", "VP Sales", "Director of Marketing", "Sales Manager", "Account Executive", "Analyst"]
+INDUSTRIES = ["Technology", "SaaS", "Finance", "Healthcare", "Retail", "Manufacturing"]
+SIZES = ["1-10", "11-50", "50-200", "200-500", "500-1000", "1000+"]
+
+# How FastAPI validates and encodes a List[schemas.Lead] response_model
+LEAD_LIST = TypeAdapter(List[schemas.Lead])
+
+# Two-sided 95% Student t critical values by degrees of freedom
+T_CRITICAL_95 = {
+    1: 12.706, 2: 4.303, 3: 3.182, 4: 2.776, 5: 2.571, 6: 2.447, 7: 2.365, 8: 2.306, 9: 2.262,
+    10: 2.228, 11: 2.201, 12: 2.179, 13: 2.160, 14: 2.145, 15: 2.131, 16: 2.120, 17: 2.110,
+    18: 2.101, 19: 2.093, 20: 2.086, 25: 2.060, 30: 2.042, 40: 2.021, 60: 2.000, 120: 1.980
+}
+
+
+def t_critical(df: int) -> float:
+    for bound in sorted(T_CRITICAL_95):
+        if df <= bound:
+            return T_CRITICAL_95[bound]
+    return 1.960
+
+
+def summarize(times: List[float], warmup: int) -> Dict[str, Any]:
+    mean = statistics.mean(times)
+    std = statistics.stdev(times) if len(times) > 1 else 0.0
+    half_width = t_critical(len(times) - 1) * std / len(times) ** 0.5 if len(times) > 1 else 0.0
+    return {
+        "mean": mean,
+        "median": statistics.median(times),
+        "min": min(times),
+        "max": max(times),
+        "std": std,
+        "ci95_low": mean - half_width,
+        "ci95_high": mean + half_width,
+        "iterations": len(times),
+        "warmup": warmup
+    }
+
+
+# Frames that belong to the profiler rather than the code being measured
+TRACEMALLOC_FILTERS = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>")
+]
+
+
+def short_path(filename: str) -> str:
+    """sqlalchemy/..., json/... or app/... instead of an absolute path"""
+    return re.sub(r"^.*/(site-packages|backend|python3\.\d+)/", "", filename)
+
+
+def top_allocations(before: tracemalloc.Snapshot, after: tracemalloc.Snapshot, top: int) -> List[Dict[str, Any]]:
+    """Source lines owning the most memory allocated between two snapshots"""
+    diff = after.filter_traces(TRACEMALLOC_FILTERS).compare_to(before.filter_traces(TRACEMALLOC_FILTERS), "lineno")
+    return [
+        {
+            "line": f"{short_path(stat.traceback[0].filename)}:{stat.traceback[0].lineno}",
+            "size_bytes": stat.size_diff,
+            "blocks": stat.count_diff
+        }
+        for stat in diff[:top]
+        if stat.size_diff > 0
+    ]
+
+
+class PeakSampler(threading.Thread):
+    """Snapshots traced memory each time it reaches a new high, so the
+    transient peak of a call can be attributed, not just what it returns"""
+
+    def __init__(self, interval: float = 0.005, growth: float = 1.1):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.growth = growth
+        self.high = 0
+        self.snapshot: Optional[tracemalloc.Snapshot] = None
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            current, _ = tracemalloc.get_traced_memory()
+            if current > self.high * self.growth:
+                self.high = current
+                self.snapshot = tracemalloc.take_snapshot()
+
+    def stop(self) -> Optional[tracemalloc.Snapshot]:
+        self._stopped.set()
+        self.join()
+        return self.snapshot
+
+
+def lead_rows(start: int, count: int) -> List[Dict[str, Any]]:
+    """Deterministic lead rows for bulk loading"""
+    now = datetime.utcnow()
+    return [
+        {
+            "first_name": f"Bench{i}",
+            "last_name": "Lead",
+            "email": f"bench{i}@example.com",
+            "company": f"Company{i % 500}",
+            "job_title": TITLES[i % len(TITLES)],
+            "industry": INDUSTRIES[i % len(INDUSTRIES)],
+            "company_size": SIZES[i % len(SIZES)],
+            "location": "San Francisco, CA",
+            "score": float(i % 100),
+            "score_reasoning": "Benchmark lead " * 8,
+            "pipeline_stage": STAGES[i % len(STAGES)],
+            "is_deleted": i % 50 == 0,
+            "created_at": now,
+            "updated_at": now
+        }
+        for i in range(start, start + count)
+    ]
+
 
 class PerformanceBenchmark:
-    def __init__(self):
-        self.results = {}
+    def __init__(self, llm_latency_ms: float = 0.0, sizes: Optional[List[int]] = None, only: Optional[str] = None):
+        self.results = {"cases": {}}
+        self.llm_latency_ms = llm_latency_ms
+        self.sizes = sizes or [1000, 10000, 100000]
+        self.only = only
+        self.loaded = 0
         init_db()
-        
-    def timed(self, func, iterations=10):
-        """Time a function over multiple iterations"""
+
+    def timed(
+        self,
+        name: str,
+        func: Callable[[], Any],
+        iterations: int = 10,
+        warmup: int = 2,
+        setup: Optional[Callable[[], Any]] = None,
+        teardown: Optional[Callable[[], Any]] = None,
+        **extra
+    ) -> Optional[Dict[str, Any]]:
+        """Time a function over multiple iterations after warming up; setup/teardown run untimed"""
+        if self.only and not name.startswith(self.only):
+            return None
+
         times = []
-        for _ in range(iterations):
+        for i in range(warmup + iterations):
+            if setup:
+                setup()
             start = time.perf_counter()
             func()
-            times.append(time.perf_counter() - start)
-        return {
-            "mean": statistics.mean(times),
-            "median": statistics.median(times),
-            "min": min(times),
-            "max": max(times),
-            "std": statistics.stdev(times) if len(times) > 1 else 0,
-            "iterations": iterations
-        }
-    
+            elapsed = time.perf_counter() - start
+            if teardown:
+                teardown()
+            if i >= warmup:
+                times.append(elapsed)
+
+        result = summarize(times, warmup)
+        # Per-second rates for cases that process a known number of items
+        if "items" in extra:
+            extra["items_per_second"] = extra["items"] / result["median"]
+        result.update(extra)
+        self.results["cases"][name] = result
+        print(f"  {name:<34} median {result['median'] * 1000:9.2f}ms  "
+              f"95% CI [{result['ci95_low'] * 1000:.2f}, {result['ci95_high'] * 1000:.2f}]ms")
+        return result
+
+    def load_leads(self, total: int):
+        """Grow the leads table to `total` rows (soft-deleted rows included)"""
+        if total <= self.loaded:
+            return
+        print(f"Loading leads up to {total}...")
+        with engine.begin() as conn:
+            for start in range(self.loaded, total, 10000):
+                conn.execute(insert(Lead), lead_rows(start, min(10000, total - start)))
+        self.loaded = total
+        with engine.begin() as conn:
+            conn.execute(text("ANALYZE"))
+
     def benchmark_database_inserts(self, n=1000):
         """Benchmark lead insertion"""
         print(f"Benchmarking {n} database inserts...")
-        
-        db = SessionLocal()
-        try:
-            def insert_batch():
-                leads = [
-                    Lead(
-                        first_name=f"Test{i}",
-                        last_name="User",
-                        email=f"test{i}@example.com",
-                        company="Acme Corp",
-                        job_title="VP Sales"
-                    )
+
+        def cleanup():
+            with engine.begin() as conn:
+                conn.execute(text("DELETE FROM leads WHERE email LIKE 'insert%@example.com'"))
+
+        def orm_insert():
+            db = SessionLocal()
+            try:
+                db.add_all([
+                    Lead(first_name=f"Insert{i}", last_name="User", email=f"insert{i}@example.com",
+                         company="Acme Corp", job_title="VP Sales")
                     for i in range(n)
-                ]
-                db.bulk_save_objects(leads)
+                ])
                 db.commit()
-                # Cleanup
-                db.execute(text("DELETE FROM leads WHERE email LIKE 'test%@example.com'"))
-                db.commit()
-            
-            result = self.timed(insert_batch, iterations=5)
-            self.results["database_inserts"] = {
-                **result,
-                "batch_size": n,
-                "inserts_per_second": n / result["mean"]
-            }
-        finally:
-            db.close()
-    
+            finally:
+                db.close()
+
+        def core_insert():
+            with engine.begin() as conn:
+                conn.execute(insert(Lead), [
+                    {"first_name": f"Insert{i}", "last_name": "User", "email": f"insert{i}@example.com",
+                     "company": "Acme Corp", "job_title": "VP Sales", "score": 0.0,
+                     "pipeline_stage": "new", "is_deleted": False}
+                    for i in range(n)
+                ])
+
+        self.timed("inserts.orm_add_all", orm_insert, iterations=5, warmup=1, teardown=cleanup, items=n)
+        self.timed("inserts.core_executemany", core_insert, iterations=5, warmup=1, teardown=cleanup, items=n)
+
     def benchmark_database_queries(self):
         """Benchmark common query patterns"""
-        print("Benchmarking database queries...")
-        
+        print(f"Benchmarking database queries ({self.loaded} leads)...")
+
         db = SessionLocal()
         try:
-            # Create test data
-            test_leads = [
-                Lead(
-                    first_name=f"Query{i}",
-                    last_name="Test",
-                    email=f"query{i}@test.com",
-                    company=f"Company{i % 10}",
-                    score=float(i % 100)
-                )
-                for i in range(1000)
-            ]
-            db.bulk_save_objects(test_leads)
-            db.commit()
-            
+            probe = f"bench{self.loaded // 2}@example.com"
             queries = {
-                "full_scan": lambda: db.query(Lead).filter(Lead.email.like("%query%")).all(),
-                "indexed_lookup": lambda: db.query(Lead).filter_by(email="query500@test.com").first(),
-                "filtered_query": lambda: db.query(Lead).filter(Lead.score > 80).all(),
-                "aggregation": lambda: db.query(Lead).filter(Lead.company.like("Company%")).count()
+                "indexed_lookup": lambda: db.query(Lead).filter_by(email=probe).first(),
+                "primary_key": lambda: db.get(Lead, self.loaded // 2, populate_existing=True),
+                "filtered_score": lambda: db.query(Lead).filter(Lead.is_deleted == False, Lead.score > 95).all(),
+                "stage_page": lambda: db.query(Lead).filter(
+                    Lead.is_deleted == False, Lead.pipeline_stage == "meeting"
+                ).order_by(Lead.id).limit(50).all(),
+                "full_scan": lambda: db.query(Lead).filter(Lead.company.like("%pany49%")).all(),
+                "count_by_company": lambda: db.query(Lead).filter(Lead.company.like("Company1%")).count()
             }
-            
-            query_results = {}
             for name, query_func in queries.items():
-                query_results[name] = self.timed(query_func, iterations=20)
-            
-            self.results["database_queries"] = query_results
-            
-            # Cleanup
-            db.execute(text("DELETE FROM leads WHERE email LIKE 'query%@test.com'"))
-            db.commit()
+                self.timed(f"queries.{name}", query_func, iterations=20, warmup=3, teardown=db.expunge_all)
         finally:
             db.close()
-    
-    def benchmark_json_serialization(self):
-        """Benchmark lead serialization"""
-        print("Benchmarking JSON serialization...")
-        
+
+    def benchmark_list_serialization(self, n: int):
+        """Benchmark the GET /api/leads serialization paths at `n` rows"""
+        print(f"Benchmarking list serialization ({n} rows)...")
+        iterations = 20 if n <= 1000 else 5 if n <= 10000 else 3
+
+        def orm_response_model():
+            # What the default endpoint does: ORM hydration plus response_model validation
+            db = SessionLocal()
+            try:
+                leads = db.query(Lead).filter(Lead.is_deleted == False).limit(n).all()
+                validated = LEAD_LIST.validate_python(leads, from_attributes=True)
+                return json.dumps(LEAD_LIST.dump_python(validated, mode="json"))
+            finally:
+                db.close()
+
+        def sparse_fields():
+            # The fields= path: Core rows straight to JSON
+            db = SessionLocal()
+            try:
+                return json.dumps(fetch_lead_rows(db, LIST_VIEW_FIELDS, 0, n))
+            finally:
+                db.close()
+
+        self.timed(f"serialize.orm_{n}", orm_response_model, iterations=iterations, warmup=1, items=n)
+        self.timed(f"serialize.sparse_{n}", sparse_fields, iterations=iterations, warmup=1, items=n)
+
+    def benchmark_llm(self):
+        """Benchmark scoring and generation against the simulated Grok backend"""
+        print(f"Benchmarking scoring and generation (simulated latency {self.llm_latency_ms}ms)...")
+        client = SimulatedGrokClient(latency_ms=self.llm_latency_ms, error_rate=0.0, seed=7)
+        scorer = LeadScorer(client)
+        hybrid = MessageGenerator(client, mode="hybrid")
+        full = MessageGenerator(client, mode="full")
+
         db = SessionLocal()
         try:
-            leads = db.query(Lead).limit(100).all()
-            
-            def serialize():
-                return [
-                    {
-                        "id": lead.id,
-                        "first_name": lead.first_name,
-                        "last_name": lead.last_name,
-                        "email": lead.email,
-                        "company": lead.company,
-                        "score": lead.score,
-                        "pipeline_stage": lead.pipeline_stage
-                    }
-                    for lead in leads
-                ]
-            
-            result = self.timed(serialize, iterations=100)
-            self.results["json_serialization"] = {
-                **result,
-                "leads_serialized": len(leads),
-                "leads_per_second": len(leads) / result["mean"]
-            }
+            lead = db.query(Lead).filter(Lead.is_deleted == False).first()
+            self.timed("llm.score_lead", lambda: scorer.score_lead(lead), iterations=30, warmup=3)
+            self.timed("llm.generate_hybrid", lambda: hybrid.generate_message(lead, "follow_up"), iterations=30, warmup=3)
+            self.timed("llm.generate_full", lambda: full.generate_message(lead, "follow_up"), iterations=30, warmup=3)
         finally:
             db.close()
-    
-    def benchmark_memory_usage(self):
-        """Estimate memory footprint"""
-        print("Benchmarking memory usage...")
-        import sys
-        
-        db = SessionLocal()
+
+    def benchmark_batch_scoring(self):
+        """Benchmark POST /api/leads/score-batch over every lead currently loaded"""
+        print(f"Benchmarking batch scoring ({self.loaded} leads)...")
+        os.environ["SIMULATED_LLM_LATENCY_MS"] = str(self.llm_latency_ms)
+        from app import main
+
+        def score_batch():
+            db = SessionLocal()
+            try:
+                return main.score_all_leads(criteria=None, db=db)
+            finally:
+                db.close()
+
+        self.timed("batch.score_all", score_batch, iterations=3, warmup=1, items=self.loaded)
+
+    def benchmark_analytics(self, n: int):
+        """Benchmark the pipeline analytics aggregate over roughly `n` leads"""
+        print(f"Benchmarking analytics ({self.loaded} leads)...")
+
+        def pipeline():
+            db = SessionLocal()
+            try:
+                return db.query(
+                    Lead.pipeline_stage,
+                    func.count(Lead.id).label("count"),
+                    func.avg(Lead.score).label("avg_score")
+                ).group_by(Lead.pipeline_stage).all()
+            finally:
+                db.close()
+
+        self.timed(f"analytics.pipeline_{n}", pipeline, iterations=20, warmup=2, items=self.loaded)
+
+    def profile_memory(self, name: str, func: Callable[[], Any], n: int, top: int = 10) -> Dict[str, Any]:
+        """Peak and retained traced memory of one call.
+
+        `peak` is the high-water mark during the call, `held` is what its
+        return value keeps alive, and `retained` is what is still allocated
+        once that value is released - caches, pools and leaks. Snapshots are
+        traced themselves, so the numbers come from a clean first call and
+        attribution from a second, sampled one.
+        """
+        gc.collect()
+        tracemalloc.start()
         try:
-            # Single lead object
-            lead = Lead(
-                first_name="Test",
-                last_name="User",
-                email="test@example.com",
-                company="Acme Corp",
-                job_title="VP Sales",
-                score=85.0
-            )
-            single_lead_size = sys.getsizeof(lead.__dict__)
-            
-            # 1000 leads
-            leads = [lead for _ in range(1000)]
-            bulk_size = sys.getsizeof(leads)
-            
-            self.results["memory_usage"] = {
-                "single_lead_bytes": single_lead_size,
-                "1000_leads_bytes": bulk_size,
-                "estimated_10k_leads_mb": (bulk_size * 10) / (1024 * 1024)
-            }
+            tracemalloc.reset_peak()
+            base, _ = tracemalloc.get_traced_memory()
+            value = func()
+            held, peak = tracemalloc.get_traced_memory()
+            body_bytes = len(value.content) if hasattr(value, "content") else None
+            value = None
+            gc.collect()
+            retained, _ = tracemalloc.get_traced_memory()
         finally:
-            db.close()
-    
+            tracemalloc.stop()
+
+        gc.collect()
+        tracemalloc.start()
+        try:
+            before = tracemalloc.take_snapshot()
+            sampler = PeakSampler()
+            sampler.start()
+            value = func()
+            at_peak = sampler.stop()
+            at_return = tracemalloc.take_snapshot()
+            value = None
+        finally:
+            tracemalloc.stop()
+
+        result = {
+            "leads": n,
+            "peak_bytes": peak - base,
+            "held_bytes": held - base,
+            "retained_bytes": retained - base,
+            "peak_bytes_per_lead": round((peak - base) / n, 1),
+            "top_allocations_at_peak": top_allocations(before, at_peak or at_return, top),
+            "top_allocations_held": top_allocations(before, at_return, top)
+        }
+        if body_bytes is not None:
+            result["body_bytes"] = body_bytes
+        self.results.setdefault("memory", {})[name] = result
+        print(f"  {name:<34} peak {result['peak_bytes'] / 2**20:8.1f}MB  held {result['held_bytes'] / 2**20:8.1f}MB  "
+              f"retained {result['retained_bytes'] / 2**20:6.1f}MB  ({result['peak_bytes_per_lead']:.0f} B/lead peak)")
+        return result
+
+    def run_memory(self, top: int = 10):
+        """Profile memory of loading, serializing and returning leads at each size"""
+        from fastapi.testclient import TestClient
+        from app.main import app
+
+        print("=== AI-SDR Memory Profile (tracemalloc) ===\n")
+        with TestClient(app) as client:
+            # Lazy imports and first-request setup should not count against any case
+            self.load_leads(100)
+            client.get("/api/leads", params={"limit": 10})
+            client.get("/api/leads", params={"limit": 10, "fields": ",".join(LIST_VIEW_FIELDS)})
+            client.get("/api/leads/export", params={"format": "ndjson", "stage": "none"})
+
+            for size in sorted(self.sizes):
+                self.load_leads(size + size // 40)  # every 50th row is soft-deleted
+                print(f"Profiling {size} leads...")
+
+                def orm_load():
+                    with SessionLocal() as db:
+                        return db.query(Lead).filter(Lead.is_deleted == False).limit(size).all()
+
+                def core_load():
+                    with SessionLocal() as db:
+                        return fetch_lead_rows(db, LIST_VIEW_FIELDS, 0, size)
+
+                self.profile_memory(f"load.orm_{size}", orm_load, size, top)
+                self.profile_memory(f"load.core_{size}", core_load, size, top)
+
+                leads = orm_load()
+                self.profile_memory(
+                    f"serialize.response_model_{size}",
+                    lambda: json.dumps(LEAD_LIST.dump_python(LEAD_LIST.validate_python(leads, from_attributes=True), mode="json")),
+                    size, top
+                )
+                leads = None
+
+                self.profile_memory(
+                    f"endpoint.list_{size}",
+                    lambda: client.get("/api/leads", params={"limit": size}), size, top
+                )
+                self.profile_memory(
+                    f"endpoint.list_fields_{size}",
+                    lambda: client.get("/api/leads", params={"limit": size, "fields": ",".join(LIST_VIEW_FIELDS)}), size, top
+                )
+                self.profile_memory(
+                    f"endpoint.export_ndjson_{size}",
+                    lambda: client.get("/api/leads/export", params={"format": "ndjson"}), self.loaded, top
+                )
+
+        self.results["metadata"] = {
+            "timestamp": datetime.now().isoformat(),
+            "python_version": sys.version,
+            "platform": platform.platform(),
+            "sizes": self.sizes,
+            "mode": "memory"
+        }
+        return self.results
+
     def run_all(self):
         """Run all benchmarks"""
         print("=== AI-SDR Performance Benchmarks ===\n")
-        
+
         self.benchmark_database_inserts(1000)
-        self.benchmark_database_queries()
-        self.benchmark_json_serialization()
-        self.benchmark_memory_usage()
-        
+
+        # LLM-bound cases on a small table so batch scoring stays short
+        self.load_leads(200)
+        self.benchmark_llm()
+        self.benchmark_batch_scoring()
+
+        queries_at = 10000 if 10000 in self.sizes else max(self.sizes)
+        for size in sorted(self.sizes):
+            self.load_leads(size + size // 40)  # every 50th row is soft-deleted
+            if size == queries_at:
+                self.benchmark_database_queries()
+            self.benchmark_list_serialization(size)
+            self.benchmark_analytics(size)
+
         # Add metadata
         self.results["metadata"] = {
             "timestamp": datetime.now().isoformat(),
             "python_version": sys.version,
+            "platform": platform.platform(),
+            "sqlite_version": sqlite3.sqlite_version,
+            "llm_latency_ms": self.llm_latency_ms,
+            "sizes": self.sizes
         }
-        
+
         return self.results
-    
+
     def save_results(self, output_path: str):
         """Save results to JSON"""
         Path(output_path).parent.mkdir(parents=True, exist_ok=True)
         with open(output_path, 'w') as f:
             json.dump(self.results, f, indent=2)
         print(f"\nResults saved to {output_path}")
-    
+
     def print_summary(self):
         """Print human-readable summary"""
+        if "memory" in self.results:
+            print("\n=== Memory Summary (top lines at peak) ===")
+            for name, result in self.results["memory"].items():
+                lines = ", ".join(f"{a['line']} {a['size_bytes'] / 2**20:.1f}MB" for a in result["top_allocations_at_peak"][:3])
+                print(f"{name}: {lines}")
+            return
+
+        cases = self.results["cases"]
         print("\n=== Performance Summary ===")
-        print(f"Database Inserts: {self.results['database_inserts']['inserts_per_second']:.0f} inserts/sec")
-        print(f"Indexed Query: {self.results['database_queries']['indexed_lookup']['mean']*1000:.2f}ms")
-        print(f"Full Scan: {self.results['database_queries']['full_scan']['mean']*1000:.2f}ms")
-        print(f"JSON Serialization: {self.results['json_serialization']['leads_per_second']:.0f} leads/sec")
-        print(f"Memory (10K leads): {self.results['memory_usage']['estimated_10k_leads_mb']:.2f}MB")
+        for name, result in cases.items():
+            if "items_per_second" in result:
+                print(f"{name}: {result['items_per_second']:.0f} items/sec")
+
+
+def compare_results(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float) -> List[Dict[str, Any]]:
+    """Per-case comparison rows; a case regresses when its median slows past the
+    threshold and its confidence interval sits entirely above the baseline's"""
+    rows = []
+    for name, base in baseline["cases"].items():
+        result = current["cases"].get(name)
+        if result is None:
+            rows.append({"case": name, "status": "missing"})
+            continue
+        change = result["median"] / base["median"] - 1 if base["median"] else 0.0
+        separated = result["ci95_low"] > base["ci95_high"]
+        if change > threshold and separated:
+            status = "regressed"
+        elif change < -threshold and result["ci95_high"] < base["ci95_low"]:
+            status = "improved"
+        else:
+            status = "ok"
+        rows.append({
+            "case": name,
+            "status": status,
+            "baseline_median": base["median"],
+            "current_median": result["median"],
+            "change": change
+        })
+    return rows
+
+
+def print_comparison(rows: List[Dict[str, Any]], threshold: float) -> int:
+    """Print the comparison table and return the process exit code"""
+    print(f"\n=== Comparison against baseline (threshold {threshold:.0%}) ===")
+    for row in rows:
+        if row["status"] == "missing":
+            print(f"  {row['case']:<34} missing from current results")
+            continue
+        print(f"  {row['case']:<34} {row['baseline_median'] * 1000:9.2f}ms -> {row['current_median'] * 1000:9.2f}ms "
+              f"({row['change']:+.1%})" + ("" if row["status"] == "ok" else f" {row['status'].upper()}"))
+    regressions = [row for row in rows if row["status"] == "regressed"]
+    if regressions:
+        print(f"\n{len(regressions)} case(s) regressed: {', '.join(row['case'] for row in regressions)}")
+        return 1
+    print("\nNo regressions")
+    return 0
+
+
+def load_results(path: str) -> Dict[str, Any]:
+    with open(path) as f:
+        return json.load(f)
+
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Run AI-SDR performance benchmarks")
-    parser.add_argument("--output", default="benchmarks/results.json", help="Output file path")
-    args = parser.parse_args()
-    
-    benchmark = PerformanceBenchmark()
-    benchmark.run_all()
+    subcommands = parser.add_subparsers(dest="command")
+
+    run_parser = subcommands.add_parser("run", help="Run the suite")
+    run_parser.add_argument("--output", default="benchmarks/results.json", help="Output file path")
+    run_parser.add_argument("--baseline", help="Compare against this baseline after running")
+    run_parser.add_argument("--threshold", type=float, default=0.15, help="Allowed median slowdown before failing")
+    run_parser.add_argument("--sizes", default="1000,10000,100000", help="Lead counts for list serialization")
+    run_parser.add_argument("--llm-latency-ms", type=float, default=0.0,
+                            help="Simulated Grok latency; 0 measures only the application's own overhead")
+    run_parser.add_argument("--only", help="Run only cases whose name starts with this prefix")
+
+    memory_parser = subcommands.add_parser("memory", help="Profile peak and retained memory with tracemalloc")
+    memory_parser.add_argument("--output", default="benchmarks/memory.json", help="Output file path")
+    memory_parser.add_argument("--sizes", default="10000,100000", help="Lead counts, e.g. 10000,100000,1000000")
+    memory_parser.add_argument("--top", type=int, default=10, help="Source lines to attribute per case")
+
+    compare_parser = subcommands.add_parser("compare", help="Compare two result files")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=0.15)
+
+    argv = sys.argv[1:]
+    if not argv or argv[0] not in ("run", "memory", "compare", "-h", "--help"):
+        argv = ["run"] + argv
+    args = parser.parse_args(argv)
+
+    if args.command == "compare":
+        rows = compare_results(load_results(args.baseline), load_results(args.current), args.threshold)
+        sys.exit(print_comparison(rows, args.threshold))
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    if args.command == "memory":
+        benchmark = PerformanceBenchmark(sizes=sizes)
+    else:
+        benchmark = PerformanceBenchmark(llm_latency_ms=args.llm_latency_ms, sizes=sizes, only=args.only)
+    try:
+        if args.command == "memory":
+            benchmark.run_memory(top=args.top)
+        else:
+            benchmark.run_all()
+    finally:
+        engine.dispose()
+        if not os.getenv("BENCHMARK_DATABASE_URL"):
+            for suffix in ("", "-wal", "-shm"):
+                Path(f"{SCRATCH_DB}{suffix}").unlink(missing_ok=True)
     benchmark.print_summary()
     benchmark.save_results(args.output)
+
+    if getattr(args, "baseline", None):
+        rows = compare_results(load_results(args.baseline), benchmark.results, args.threshold)
+        sys.exit(print_comparison(rows, args.threshold))
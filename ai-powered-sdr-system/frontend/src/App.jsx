@@ -147,6 +147,23 @@ function App() {
     }
   };
 
+  // Lead drawer: lead, recent messages and first activity page in one request
+  const fetchLeadDetail = async (leadId) => {
+    try {
+      const response = await fetch(`${API_URL}/leads/${leadId}/full`);
+      if (!response.ok) throw new Error('Failed to fetch lead');
+      const data = await response.json();
+      setSelectedLead(data.lead);
+      setLeads(prev => prev.map(l => l.id === leadId ? data.lead : l));
+      setActivities(data.activities.items);
+      return data.lead;
+    } catch (error) {
+      console.error('Error fetching lead detail:', error);
+      setActivities([]);
+      return null;
+    }
+  };
+
   const fetchActivities = async (leadId) => {
     try {
       const response = await fetch(`${API_URL}/leads/${leadId}/activities`);
@@ -435,19 +452,11 @@ function App() {
       const message = await response.json();
       setGeneratedMessage({ ...message, type: messageType });
 
-      // Refresh the selected lead to get updated pipeline stage
-      const updatedLeadResponse = await fetch(`${API_URL}/leads/${leadId}`);
-      if (updatedLeadResponse.ok) {
-        const updatedLead = await updatedLeadResponse.json();
-        setSelectedLead(updatedLead);
-        setLeads(prev => prev.map(l => l.id === leadId ? updatedLead : l));
-      }
+      // Refresh the selected lead (updated pipeline stage) and its activities
+      await fetchLeadDetail(leadId);
 
-      // Refresh pipeline stats and activities
+      // Refresh pipeline stats
       fetchPipelineStats();
-      if (selectedLead?.id === leadId) {
-        fetchActivities(leadId);
-      }
 
       // Use instant scroll instead of smooth for better performance
       setTimeout(() => {
@@ -817,7 +826,7 @@ function App() {
                           className={`lead-item ${selectedLead?.id === lead.id ? 'selected' : ''}`}
                           onClick={() => {
                             setSelectedLead(lead);
-                            fetchActivities(lead.id);
+                            fetchLeadDetail(lead.id);
                           }}
                         >
                           <input
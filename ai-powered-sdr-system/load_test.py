@@ -0,0 +1,394 @@
+"""
+HTTP load test for the AI-SDR API with a simulated Grok backend
+Run: python load_test.py --rates 5,10,20,40 --duration 15 --output benchmarks/load_test.json
+
+Starts uvicorn on a fresh seeded database with SDR_LLM_BACKEND=simulated,
+then drives open-loop mixed traffic (list, detail, create, stage change,
+scoring, generation) at each arrival rate in turn. Arrivals are Poisson and
+latency is measured from each request's scheduled arrival time, so queueing
+in front of a saturated server shows up in the percentiles instead of
+silently lowering the offered load. Stops at the first rate the service
+cannot sustain.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+BACKEND_DIR = Path(__file__).parent / "backend"
+
+STAGES = ["new", "qualified", "contacted", "meeting", "negotiation", "closed_won", "closed_lost"]
+MESSAGE_TYPES = ["initial_outreach", "follow_up", "meeting_request", "value_proposition"]
+DEFAULT_MIX = "list=35,detail=25,create=10,stage=10,score=10,generate=10"
+
+FIRST_NAMES = ["James", "Mary", "John", "Patricia", "Robert", "Jennifer", "Michael", "Linda", "David", "Sarah"]
+LAST_NAMES = ["Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis", "Chen", "Patel"]
+TITLES = ["CEO", "CTO", "VP of Sales", "Director of Marketing", "Sales Manager", "Account Executive", "Analyst"]
+INDUSTRIES = ["Technology", "SaaS", "Finance", "Healthcare", "Retail", "Manufacturing"]
+SIZES = ["1-10", "11-50", "50-200", "200-500", "500-1000", "1000+"]
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def parse_mix(spec: str) -> List[Tuple[str, float]]:
+    mix = []
+    for item in spec.split(","):
+        name, _, weight = item.partition("=")
+        if name.strip() not in OPERATIONS:
+            raise SystemExit(f"Unknown operation '{name}'. Choose from: {', '.join(OPERATIONS)}")
+        mix.append((name.strip(), float(weight or 1)))
+    return mix
+
+
+def seed_database(database_url: str, n: int, seed: int) -> None:
+    """Create the schema and bulk-insert leads directly, before the server starts"""
+    os.environ["DATABASE_URL"] = database_url
+    sys.path.insert(0, str(BACKEND_DIR))
+    from sqlalchemy import insert
+    from app.database import engine, init_db
+    from app import models
+
+    init_db()
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    rows = [
+        {
+            "first_name": rng.choice(FIRST_NAMES),
+            "last_name": rng.choice(LAST_NAMES),
+            "email": f"seed{i}@loadtest.example.com",
+            "company": f"Company {i % 97}",
+            "job_title": rng.choice(TITLES),
+            "industry": rng.choice(INDUSTRIES),
+            "company_size": rng.choice(SIZES),
+            "location": "San Francisco, CA",
+            "score": 0.0,
+            "pipeline_stage": rng.choice(STAGES[:4]),
+            "is_deleted": False,
+            "created_at": now,
+            "updated_at": now
+        }
+        for i in range(n)
+    ]
+    with engine.begin() as conn:
+        conn.execute(insert(models.Lead), rows)
+    engine.dispose()
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class AppServer:
+    """uvicorn in a subprocess, stopped on exit"""
+
+    def __init__(self, port: int, env: Dict[str, str], workers: int = 1):
+        self.port = port
+        self.env = env
+        self.workers = workers
+        self.process: Optional[subprocess.Popen] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def __enter__(self):
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(self.port),
+             "--workers", str(self.workers), "--log-level", "warning"],
+            cwd=BACKEND_DIR,
+            env=self.env
+        )
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise SystemExit(f"Server exited during startup with code {self.process.returncode}")
+            try:
+                if httpx.get(f"{self.url}/health", timeout=1.0).status_code == 200:
+                    return self
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.2)
+        self.__exit__(None, None, None)
+        raise SystemExit("Server did not become ready within 30s")
+
+    def __exit__(self, *exc):
+        if self.process and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+
+
+class LoadGenerator:
+    def __init__(self, client: httpx.AsyncClient, lead_ids: List[int], mix: List[Tuple[str, float]],
+                 concurrency: int, timeout: float, seed: int):
+        self.client = client
+        self.lead_ids = lead_ids
+        self.operations = [name for name, _ in mix]
+        self.weights = [weight for _, weight in mix]
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.rng = random.Random(seed)
+
+    async def run_step(self, rate: float, duration: float) -> Dict[str, Any]:
+        """Offer `rate` requests/second for `duration` seconds and wait for all of them"""
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(self.concurrency)
+        samples: List[Tuple[str, float, bool]] = []
+        tasks = []
+
+        start = loop.time()
+        scheduled = start
+        while True:
+            scheduled += self.rng.expovariate(rate)
+            if scheduled - start > duration:
+                break
+            delay = scheduled - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            operation = self.rng.choices(self.operations, self.weights)[0]
+            tasks.append(asyncio.create_task(self._issue(operation, scheduled, semaphore, samples)))
+
+        await asyncio.gather(*tasks)
+        elapsed = loop.time() - start
+        return summarize_step(rate, duration, elapsed, samples)
+
+    async def _issue(self, operation: str, scheduled: float, semaphore: asyncio.Semaphore, samples: list) -> None:
+        loop = asyncio.get_running_loop()
+        async with semaphore:
+            try:
+                ok = await asyncio.wait_for(OPERATIONS[operation](self), self.timeout)
+            except Exception:
+                ok = False
+        samples.append((operation, loop.time() - scheduled, ok))
+
+    def _lead_id(self) -> int:
+        return self.rng.choice(self.lead_ids)
+
+    async def op_list(self) -> bool:
+        response = await self.client.get("/api/leads", params={"limit": 50})
+        return response.status_code == 200
+
+    async def op_detail(self) -> bool:
+        response = await self.client.get(f"/api/leads/{self._lead_id()}/full")
+        return response.status_code == 200
+
+    async def op_create(self) -> bool:
+        response = await self.client.post("/api/leads", json={
+            "first_name": self.rng.choice(FIRST_NAMES),
+            "last_name": self.rng.choice(LAST_NAMES),
+            "email": f"load-{uuid.uuid4().hex[:12]}@loadtest.example.com",
+            "company": f"Company {self.rng.randrange(97)}",
+            "job_title": self.rng.choice(TITLES),
+            "industry": self.rng.choice(INDUSTRIES),
+            "company_size": self.rng.choice(SIZES)
+        })
+        if response.status_code == 200:
+            self.lead_ids.append(response.json()["id"])
+            return True
+        return False
+
+    async def op_stage(self) -> bool:
+        response = await self.client.put(f"/api/leads/{self._lead_id()}/stage", json={"stage": self.rng.choice(STAGES)})
+        return response.status_code == 200
+
+    async def op_score(self) -> bool:
+        response = await self.client.post(f"/api/leads/{self._lead_id()}/score")
+        return response.status_code == 200
+
+    async def op_generate(self) -> bool:
+        response = await self.client.post(
+            f"/api/leads/{self._lead_id()}/generate-message",
+            params={"message_type": self.rng.choice(MESSAGE_TYPES)}
+        )
+        return response.status_code == 200
+
+
+OPERATIONS = {
+    "list": LoadGenerator.op_list,
+    "detail": LoadGenerator.op_detail,
+    "create": LoadGenerator.op_create,
+    "stage": LoadGenerator.op_stage,
+    "score": LoadGenerator.op_score,
+    "generate": LoadGenerator.op_generate
+}
+
+
+def latency_stats(latencies: List[float]) -> Dict[str, float]:
+    ms = [latency * 1000 for latency in latencies]
+    return {
+        "p50": round(percentile(ms, 50), 2),
+        "p95": round(percentile(ms, 95), 2),
+        "p99": round(percentile(ms, 99), 2),
+        "max": round(max(ms), 2) if ms else 0.0
+    }
+
+
+def summarize_step(rate: float, duration: float, elapsed: float, samples: List[Tuple[str, float, bool]]) -> Dict[str, Any]:
+    endpoints = {}
+    for operation in sorted({s[0] for s in samples}):
+        op_samples = [s for s in samples if s[0] == operation]
+        errors = sum(1 for s in op_samples if not s[2])
+        endpoints[operation] = {
+            "requests": len(op_samples),
+            "errors": errors,
+            "error_rate": round(errors / len(op_samples), 4),
+            "rps": round(len(op_samples) / elapsed, 2),
+            "latency_ms": latency_stats([s[1] for s in op_samples])
+        }
+
+    errors = sum(1 for s in samples if not s[2])
+    return {
+        "offered_rps": rate,
+        "duration_s": duration,
+        "elapsed_s": round(elapsed, 3),
+        "requests": len(samples),
+        "arrival_rps": round(len(samples) / duration, 2),
+        "achieved_rps": round((len(samples) - errors) / elapsed, 2) if elapsed else 0.0,
+        "error_rate": round(errors / len(samples), 4) if samples else 0.0,
+        "latency_ms": latency_stats([s[1] for s in samples]),
+        "endpoints": endpoints
+    }
+
+
+def is_saturated(step: Dict[str, Any], slo_p95_ms: float, max_error_rate: float) -> Optional[str]:
+    """Why this step is past the saturation point, or None if the service kept up"""
+    if step["requests"] == 0:
+        return None
+    # In-flight work left when arrivals stop must clear within the SLO plus 10% of the step
+    drain_s = step["elapsed_s"] - step["duration_s"]
+    if drain_s > slo_p95_ms / 1000 + 0.1 * step["duration_s"]:
+        return f"throughput fell behind arrivals ({drain_s:.1f}s backlog at end of step)"
+    if step["latency_ms"]["p95"] > slo_p95_ms:
+        return f"p95 {step['latency_ms']['p95']:.0f}ms exceeds the {slo_p95_ms:.0f}ms SLO"
+    if step["error_rate"] > max_error_rate:
+        return f"error rate {step['error_rate']:.1%} exceeds {max_error_rate:.1%}"
+    return None
+
+
+def print_step(step: Dict[str, Any]) -> None:
+    latency = step["latency_ms"]
+    print(f"\n{step['offered_rps']:>6.1f} req/s offered -> {step['achieved_rps']:.1f} req/s achieved, "
+          f"errors {step['error_rate']:.1%}, p50 {latency['p50']:.0f}ms p95 {latency['p95']:.0f}ms p99 {latency['p99']:.0f}ms")
+    for operation, stats in step["endpoints"].items():
+        latency = stats["latency_ms"]
+        print(f"    {operation:<9} n={stats['requests']:<5} rps={stats['rps']:<7} err={stats['error_rate']:<6.1%} "
+              f"p50={latency['p50']:.0f}ms p95={latency['p95']:.0f}ms p99={latency['p99']:.0f}ms")
+
+
+async def run(args, base_url: str, lead_ids: List[int]) -> Dict[str, Any]:
+    mix = parse_mix(args.mix)
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    steps = []
+    saturation = None
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=args.timeout) as client:
+        generator = LoadGenerator(client, lead_ids, mix, args.concurrency, args.timeout, args.seed)
+        for rate in [float(r) for r in args.rates.split(",")]:
+            step = await generator.run_step(rate, args.duration)
+            reason = is_saturated(step, args.slo_p95_ms, args.max_error_rate)
+            step["saturated"] = reason
+            steps.append(step)
+            print_step(step)
+            if reason:
+                saturation = {"offered_rps": rate, "reason": reason}
+                print(f"    saturated: {reason}")
+                if not args.no_stop:
+                    break
+
+    sustained = [s for s in steps if not s["saturated"]]
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "config": {
+            "rates": args.rates,
+            "duration_s": args.duration,
+            "concurrency": args.concurrency,
+            "mix": args.mix,
+            "workers": args.workers,
+            "llm_latency_ms": args.llm_latency_ms,
+            "llm_error_rate": args.llm_error_rate,
+            "seed_leads": args.seed_leads,
+            "slo_p95_ms": args.slo_p95_ms
+        },
+        "max_sustained_rps": max((s["achieved_rps"] for s in sustained), default=0.0),
+        "saturation": saturation,
+        "steps": steps
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the AI-SDR HTTP API")
+    parser.add_argument("--url", help="Target an already running server instead of starting one")
+    parser.add_argument("--rates", default="2,4,8,16,32,64", help="Comma-separated arrival rates (req/s), run in order")
+    parser.add_argument("--duration", type=float, default=15, help="Seconds per rate step")
+    parser.add_argument("--concurrency", type=int, default=64, help="Maximum requests in flight")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Operation weights, e.g. list=50,score=50")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--seed-leads", type=int, default=1000, help="Leads inserted before the run")
+    parser.add_argument("--llm-latency-ms", type=float, default=800, help="Mean simulated Grok latency")
+    parser.add_argument("--llm-error-rate", type=float, default=0.0, help="Fraction of simulated Grok calls that fail")
+    parser.add_argument("--slo-p95-ms", type=float, default=2000, help="p95 latency above which a step counts as saturated")
+    parser.add_argument("--max-error-rate", type=float, default=0.01)
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--no-stop", action="store_true", help="Keep going after the saturation point")
+    parser.add_argument("--output", default="benchmarks/load_test.json", help="Output file path")
+    args = parser.parse_args()
+
+    if args.url:
+        leads = httpx.get(f"{args.url}/api/leads", params={"fields": "id", "limit": 10000}, timeout=30).json()
+        report = asyncio.run(run(args, args.url, [lead["id"] for lead in leads]))
+    else:
+        workdir = tempfile.mkdtemp(prefix="sdr-load-")
+        database_url = f"sqlite:///{workdir}/load_test.db"
+        print(f"Seeding {args.seed_leads} leads into {database_url}")
+        seed_database(database_url, args.seed_leads, args.seed)
+
+        env = dict(os.environ)
+        env.update({
+            "DATABASE_URL": database_url,
+            "SDR_LLM_BACKEND": "simulated",
+            "SIMULATED_LLM_LATENCY_MS": str(args.llm_latency_ms),
+            "SIMULATED_LLM_ERROR_RATE": str(args.llm_error_rate),
+            "QUERY_PROFILER": env.get("QUERY_PROFILER", "0"),
+            # Slow traces under load are kept next to the scratch database
+            "TRACE_FILE": env.get("TRACE_FILE", f"{workdir}/traces.jsonl")
+        })
+        with AppServer(free_port(), env, workers=args.workers) as server:
+            report = asyncio.run(run(args, server.url, list(range(1, args.seed_leads + 1))))
+
+    print(f"\nMax sustained throughput: {report['max_sustained_rps']} req/s")
+    if report["saturation"]:
+        print(f"Saturation at {report['saturation']['offered_rps']} req/s offered: {report['saturation']['reason']}")
+
+    Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()